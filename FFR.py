@@ -1,8 +1,9 @@
+import time
+STARTUP_T0 = time.perf_counter()  # reported by --startup-benchmark
 import tkinter as tk
 from tkinter import ttk, Scrollbar, Button, messagebox, filedialog
-import requests
-from PIL import Image, ImageTk
 from io import BytesIO
+import io
 import os
 import sys
 import json
@@ -12,20 +13,23 @@ import webbrowser
 import zlib
 import base64
 import hashlib
-import xml.etree.ElementTree as ET
-from Crypto.Cipher import AES
 import shutil
 import threading
 import queue
+import heapq
+import bisect
+import traceback
+import itertools
 import platform
-import urllib.request
-import zipfile
-import tarfile
 import stat
-import pygame
-from urllib.parse import quote
-import time
+from urllib.parse import quote, urlsplit
 import random
+from contextlib import contextmanager, nullcontext
+from collections import deque
+
+# Heavy libraries (requests, PIL, pycryptodome, pygame, xml, zipfile, tarfile)
+# are imported on first use so the window can paint before they load.
+IMPORT_DONE = time.perf_counter()
 
 class SmartPreviewSystem:
     def __init__(self):
@@ -34,12 +38,19 @@ class SmartPreviewSystem:
         self.position = 0
         self.parent_app = None
         self.current_temp_file = None
-        
-        # Initialize pygame mixer for audio playback
+        self.mixer_ready = False
+
+    def ensure_mixer(self):
+        """Initialize the pygame mixer on first playback"""
+        if self.mixer_ready:
+            return True
+        import pygame
         try:
             pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+            self.mixer_ready = True
         except pygame.error as e:
             print(f"Audio initialization failed: {e}")
+        return self.mixer_ready
 
     def normalize_text(self, text):
         """Smart text normalization for matching"""
@@ -107,6 +118,7 @@ class SmartPreviewSystem:
 
     def search_deezer_comprehensive(self, artist, title):
         """Comprehensive Deezer search"""
+        import requests
         search_strategies = [
             f'artist:"{artist}" track:"{title}"',
             f"{artist} {title}",
@@ -163,7 +175,11 @@ class SmartPreviewSystem:
 
     def play_preview(self, preview_url):
         """Play 30-second preview from URL"""
+        import requests
         try:
+            if not self.ensure_mixer():
+                raise Exception("Audio output is not available")
+            import pygame
             if self.is_playing:
                 self.stop()
             
@@ -180,33 +196,31 @@ class SmartPreviewSystem:
             with open(temp_mp3_file, 'wb') as f:
                 f.write(response.content)
             
-            # Convert MP3 to WAV using FFmpeg for better compatibility
-            ffmpeg_path = getattr(self.parent_app, 'ffmpeg_path', 'ffmpeg')
-            
-            # Convert to WAV
-            creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-            subprocess.run([
-                ffmpeg_path, '-y', '-i', temp_mp3_file, 
-                '-acodec', 'pcm_s16le', '-ar', '22050', '-ac', '2',
-                temp_wav_file
-            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=creation_flags)
-            
-            # Clean up the MP3 file
-            os.remove(temp_mp3_file)
-            
-            # Play the WAV file
-            pygame.mixer.music.load(temp_wav_file)
+            # pygame plays MP3 directly; only fall back to an FFmpeg WAV conversion if it can't
+            try:
+                pygame.mixer.music.load(temp_mp3_file)
+                playing_file = temp_mp3_file
+            except pygame.error:
+                self.parent_app.ffmpeg.run([
+                    '-y', '-i', temp_mp3_file,
+                    '-acodec', 'pcm_s16le', '-ar', '22050', '-ac', '2',
+                    temp_wav_file
+                ], label="preview")
+                os.remove(temp_mp3_file)
+                pygame.mixer.music.load(temp_wav_file)
+                playing_file = temp_wav_file
+
             pygame.mixer.music.play()
             self.is_playing = True
             self.current_url = preview_url
-            self.current_temp_file = temp_wav_file  # Store for cleanup
+            self.current_temp_file = playing_file  # Store for cleanup
                 
             # Clean up temp file after a delay
             def cleanup():
                 time.sleep(40)  # Wait for playback to complete
                 try:
-                    if os.path.exists(temp_wav_file):
-                        os.remove(temp_wav_file)
+                    if os.path.exists(playing_file):
+                        os.remove(playing_file)
                 except:
                     pass
             
@@ -226,7 +240,10 @@ class SmartPreviewSystem:
     
     def stop(self):
         """Stop current playback"""
+        if not self.mixer_ready:
+            return
         try:
+            import pygame
             pygame.mixer.music.stop()
             pygame.mixer.music.unload()
             self.is_playing = False
@@ -242,168 +259,2073 @@ class SmartPreviewSystem:
     
     def is_playing_status(self):
         """Check if currently playing"""
+        if not self.mixer_ready:
+            return False
+        import pygame
         return pygame.mixer.music.get_busy() and self.is_playing
 
-class FortniteTracksGUI:
-    def __init__(self, root):
-        self.root = root
-        self.settings_file = "settings.json"
-        
-        # Add queue for thread communication
-        self.download_queue_thread = queue.Queue()
-        self.downloading = False
-        self.ffmpeg_ready = False
-        
-        # Add song queue for downloads
-        self.song_queue = []
-        self.current_download_index = 0
-        
-        # Initialize preview system
-        self.preview_system = SmartPreviewSystem()
-        self.preview_system.parent_app = self
+class PipelineTracer:
+    """Records per-stage timings, bytes and request counts for download jobs"""
+
+    STAGES = ["catalog", "metadata", "blurl", "mpd", "probe", "segments", "analyze", "ffmpeg", "cleanup"]
+    MAX_BYTES = 10 * 1024 * 1024  # the trace file is rotated to <name>.1 beyond this
+
+    def __init__(self, trace_path=None, on_job_complete=None):
+        self.trace_path = trace_path
+        self.on_job_complete = on_job_complete
+        self.lock = threading.Lock()
+        self.size = None  # bytes in the trace file, read on the first write
+        self.local = threading.local()
+        self.last_job = None
+
+    def current_job(self):
+        """Return the job traced on this thread, if any"""
+        return getattr(self.local, 'job', None)
+
+    def begin_job(self, job_id, sid=None, title=None):
+        """Start tracing a job on the calling thread"""
+        self.local.job = {
+            'job': job_id,
+            'sid': sid,
+            'title': title,
+            'start': time.perf_counter(),
+            'stages': {}
+        }
+        self.local.spans = []
+        self.local.failed_stage = None
 
-        # Register cleanup to delete WAV files when app closes
-        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+    def end_job(self, status="done", publish=True):
+        """Finish the job on the calling thread and write its summary record"""
+        job = self.current_job()
+        if job is None:
+            return
+        self.local.job = None
+        self.local.spans = []
+        record = {
+            'event': 'job',
+            'job': job['job'],
+            'sid': job['sid'],
+            'title': job['title'],
+            'status': status,
+            'duration': round(time.perf_counter() - job['start'], 4),
+            'stages': job['stages']
+        }
+        self.write(record)
+        with self.lock:
+            self.last_job = record
+        if publish and self.on_job_complete:
+            self.on_job_complete(record)
+
+    def suspend_job(self):
+        """Detach the calling thread's job so another thread can resume it"""
+        job = self.current_job()
+        self.local.job = None
+        self.local.spans = []
+        return job
+
+    def resume_job(self, job):
+        """Continue a suspended job on the calling thread"""
+        self.local.job = job
+        self.local.spans = []
+        self.local.failed_stage = None
+
+    def failed_stage(self):
+        """Stage of the last span on this thread that ended with an error, if any"""
+        return getattr(self.local, 'failed_stage', None)
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        """Time a pipeline stage; counters recorded inside it are attributed to it"""
+        if not hasattr(self.local, 'spans'):
+            self.local.spans = []
+        span = {'stage': stage, 'bytes': 0, 'requests': 0, 'retries': 0}
+        span.update(attrs)
+        self.local.spans.append(span)
+        start = time.perf_counter()
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = str(e) or e.__class__.__name__
+            self.local.failed_stage = stage
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self.local.spans.pop()
+            job = self.current_job()
+            record = {'event': 'span', 'job': job['job'] if job else None, 'sid': job['sid'] if job else None}
+            record.update(span)
+            record['duration'] = round(duration, 4)
+            if error:
+                record['error'] = error
+            self.write(record)
+            if job is not None:
+                totals = job['stages'].setdefault(stage, {'duration': 0.0, 'bytes': 0, 'requests': 0, 'retries': 0})
+                totals['duration'] = round(totals['duration'] + duration, 4)
+                totals['bytes'] += span['bytes']
+                totals['requests'] += span['requests']
+                totals['retries'] += span['retries']
+
+    def record(self, bytes=0, requests=0, retries=0):
+        """Add counters to the innermost open span on this thread"""
+        spans = getattr(self.local, 'spans', None)
+        if not spans:
+            return
+        span = spans[-1]
+        span['bytes'] += bytes
+        span['requests'] += requests
+        span['retries'] += retries
+
+    def response_hook(self, response, *args, **kwargs):
+        """requests response hook counting every HTTP round-trip"""
+        size = 0
+        if response.request.method != 'HEAD':
+            try:
+                size = int(response.headers.get('content-length', 0))
+            except ValueError:
+                size = 0
+        self.record(bytes=size, requests=1)
+
+    def write(self, record):
+        """Append a record to the JSON-lines trace file"""
+        if not self.trace_path:
+            return
+        record = dict(record, ts=round(time.time(), 3))
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+        with self.lock:
+            try:
+                if self.size is None:
+                    os.makedirs(os.path.dirname(self.trace_path) or ".", exist_ok=True)
+                    self.size = os.path.getsize(self.trace_path) if os.path.exists(self.trace_path) else 0
+                if self.size and self.size + len(line) > self.MAX_BYTES:
+                    # Keep one previous file so full-catalog runs cannot grow the trace without bound
+                    os.replace(self.trace_path, self.trace_path + ".1")
+                    self.size = 0
+                with open(self.trace_path, 'ab') as f:
+                    f.write(line)
+                self.size += len(line)
+            except OSError as e:
+                print(f"Could not write trace record: {e}")
 
-        settings = self.load_settings()
-        self.extract_folder = settings.get("extract_folder", os.getcwd())
-        self.dark_mode = settings.get("dark_mode", True)
-        self.sorting_method = settings.get("sorting_method", "Last Added")
-        self.sort_ascending = settings.get("sort_ascending", True)
-        self.auto_open_folder = settings.get("auto_open_folder", False)
-        self.file_format = settings.get("file_format", "wav")
-        self.file_format_var = tk.StringVar(value=self.file_format)
-        self.extracting_method = settings.get("extracting_method", "Stereo")
-        self.extracting_method_var = tk.StringVar(value=self.extracting_method)
-        self.file_naming = settings.get("file_naming", "Only Stem Type")
-        self.file_naming_var = tk.StringVar(value=self.file_naming)
+    @staticmethod
+    def format_bytes(size):
+        for unit in ["B", "KB", "MB", "GB"]:
+            if size < 1024 or unit == "GB":
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
+
+    def summary_text(self, record=None):
+        """One-line breakdown of where a job's time went"""
+        record = record or self.last_job
+        if not record:
+            return ""
+        parts = []
+        for stage in self.STAGES:
+            totals = record['stages'].get(stage)
+            if not totals:
+                continue
+            part = f"{stage} {totals['duration']:.1f}s"
+            if totals['bytes']:
+                part += f" ({self.format_bytes(totals['bytes'])}, {totals['requests']} req)"
+            elif totals['requests']:
+                part += f" ({totals['requests']} req)"
+            if totals['retries']:
+                part += f" +{totals['retries']} retries"
+            parts.append(part)
+        title = record['title'] or record['job']
+        return f"{title}: {record['duration']:.1f}s — " + " · ".join(parts)
+
+class RunProfiler:
+    """Opt-in profiling of pipeline stages and Tk callbacks: cProfile, tracemalloc samples and per-thread CPU time,
+    written as one report per run"""
+
+    SAMPLE_INTERVAL = 10.0  # seconds between tracemalloc samples
+    TOP = 10
+    # From Python 3.12 cProfile runs on sys.monitoring: one profiler per process, which sees every thread.
+    # Before that a profiler only sees the thread that enabled it, so each thread gets its own.
+    PROCESS_WIDE = sys.version_info >= (3, 12)
+
+    def __init__(self, folder="profiles"):
+        import tracemalloc
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.states = {}  # thread id -> profile, section depth and run generation
+        self.generation = 0
+        self.shared = None  # the run's process-wide profiler, when PROCESS_WIDE
+        self.closed = threading.Event()
+        self.original_call_wrapper = None
+        tracemalloc.start()
+        self.start_run()
+        threading.Thread(target=self.sample_memory, name="profiler-memory", daemon=True).start()
+
+    def start_run(self):
+        """Reset the counters; callers other than __init__ hold the lock"""
+        import tracemalloc
+        self.generation += 1
+        self.run_start = time.time()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.sections = {}  # name -> [calls, wall, cpu, longest]
+        self.threads = {}  # thread name -> [sections, wall, cpu]
+        self.memory = []  # (elapsed, traced, peak, lines that grew since the previous sample)
+        self.unprofiled = {}  # section name -> calls cProfile could not see, reported rather than dropped
+        tracemalloc.reset_peak()
+        if self.PROCESS_WIDE:
+            import cProfile
+            self.shared = cProfile.Profile()
+            try:
+                self.shared.enable()
+            except ValueError:
+                # Another tool (a debugger, coverage) holds the profiling hook; every section is reported as missed
+                self.shared = None
+
+    @contextmanager
+    def section(self, name):
+        """Profile the calling thread while the block runs and charge its wall and CPU time to name"""
+        import cProfile
+        thread = threading.current_thread()
+        with self.lock:
+            state = self.states.get(thread.ident)
+            if state is None or state['generation'] != self.generation:
+                state = {'profile': None if self.PROCESS_WIDE else cProfile.Profile(), 'depth': 0, 'enabled': False,
+                         'generation': self.generation}
+                self.states[thread.ident] = state
+            if self.PROCESS_WIDE:
+                profiled = self.shared is not None
+            elif state['depth'] == 0:
+                try:
+                    state['profile'].enable()
+                    state['enabled'] = True
+                except ValueError:
+                    pass
+                profiled = state['enabled']
+            else:
+                profiled = state['enabled']
+            if not profiled:
+                self.unprofiled[name] = self.unprofiled.get(name, 0) + 1
+            state['depth'] += 1
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            with self.lock:
+                state['depth'] -= 1
+                if state['depth'] == 0 and state['enabled']:
+                    state['profile'].disable()
+                    state['enabled'] = False
+                if state['generation'] == self.generation:
+                    totals = self.sections.setdefault(name, [0, 0.0, 0.0, 0.0])
+                    totals[0] += 1
+                    totals[1] += wall
+                    totals[2] += cpu
+                    totals[3] = max(totals[3], wall)
+                    if state['depth'] == 0:
+                        # Nested sections are already inside the outer one's time
+                        totals = self.threads.setdefault(thread.name, [0, 0.0, 0.0])
+                        totals[0] += 1
+                        totals[1] += wall
+                        totals[2] += cpu
+
+    def profile_tk_callbacks(self):
+        """Run every Tk command, binding and after() callback registered from now on inside a section"""
+        profiler = self
+        self.original_call_wrapper = tk.CallWrapper
+
+        class ProfiledCallWrapper(tk.CallWrapper):
+            def __call__(self, *args):
+                name = getattr(self.func, '__name__', type(self.func).__name__)
+                with profiler.section(f"tk:{name}"):
+                    return super().__call__(*args)
+
+        tk.CallWrapper = ProfiledCallWrapper
 
-        self.root.title("Fortnite Festival Extractor")
-        self.root.geometry("900x600")
-        
-        if getattr(sys, 'frozen', False):
-            application_path = sys._MEIPASS
+    @staticmethod
+    def relevant(entries, count):
+        """The first count statistics not allocated by tracemalloc itself or the import system.
+
+        Filtering the grouped statistics rather than every trace keeps the sampler cheap, which matters
+        on 3.12+ where the process-wide profiler sees the sampler thread too."""
+        import tracemalloc
+        kept = []
+        for entry in entries:
+            filename = entry.traceback[0].filename
+            if filename != tracemalloc.__file__ and not filename.startswith("<frozen importlib._bootstrap"):
+                kept.append(entry)
+                if len(kept) == count:
+                    break
+        return kept
+
+    def sample_memory(self):
+        import tracemalloc
+        previous = None
+        while not self.closed.wait(self.SAMPLE_INTERVAL):
+            snapshot = tracemalloc.take_snapshot()
+            traced, peak = tracemalloc.get_traced_memory()
+            growth = []
+            if previous is not None:
+                growth = [str(entry) for entry in self.relevant(snapshot.compare_to(previous, 'lineno'), 3)
+                          if entry.size_diff > 0]
+            previous = snapshot
+            with self.lock:
+                self.memory.append((time.perf_counter() - self.wall_start, traced, peak, growth))
+
+    def write_report(self, pipeline_stats=None):
+        """Write the run's text report and a .prof file for pstats/snakeviz, then start a new run; returns the path"""
+        import pstats
+        import tracemalloc
+        with self.lock:
+            if self.PROCESS_WIDE:
+                profiles = [self.shared] if self.shared is not None else []
+                if self.shared is not None:
+                    self.shared.disable()
+                mid_section = 0
+            else:
+                profiles = [state['profile'] for state in self.states.values()
+                            if state['generation'] == self.generation and state['depth'] == 0]
+                mid_section = sum(1 for state in self.states.values()
+                                  if state['generation'] == self.generation and state['depth'] > 0)
+            sections, threads, memory, unprofiled = self.sections, self.threads, self.memory, self.unprofiled
+            run_start, wall = self.run_start, time.perf_counter() - self.wall_start
+            cpu = time.process_time() - self.cpu_start
+            traced, peak = tracemalloc.get_traced_memory()
+            self.start_run()
+        if not sections:
+            return None
+
+        out = io.StringIO()
+        out.write(f"Run started {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run_start))}\n")
+        out.write(f"Wall {wall:.1f} s, process CPU {cpu:.1f} s\n\n")
+        out.write(f"{'Section':<40}{'calls':>8}{'wall s':>10}{'cpu s':>10}{'longest s':>11}\n")
+        for name, (calls, section_wall, section_cpu, longest) in sorted(sections.items(), key=lambda item: -item[1][1]):
+            out.write(f"{name[:39]:<40}{calls:>8}{section_wall:>10.3f}{section_cpu:>10.3f}{longest:>11.3f}\n")
+        out.write(f"\n{'Thread':<40}{'sections':>8}{'wall s':>10}{'cpu s':>10}\n")
+        for name, (calls, thread_wall, thread_cpu) in sorted(threads.items(), key=lambda item: -item[1][2]):
+            out.write(f"{name[:39]:<40}{calls:>8}{thread_wall:>10.3f}{thread_cpu:>10.3f}\n")
+        if pipeline_stats:
+            out.write("\nPipeline\n")
+            for name, s in pipeline_stats.items():
+                out.write(f"  {name}: {s['workers']} workers, {s['jobs']} jobs, {s['utilization'] * 100:.0f}% busy\n")
+
+        out.write(f"\nMemory: {traced / 1e6:.1f} MB traced, {peak / 1e6:.1f} MB peak this run\n")
+        for elapsed, sample_traced, sample_peak, growth in memory:
+            out.write(f"  +{elapsed:6.0f} s  {sample_traced / 1e6:8.1f} MB  (peak {sample_peak / 1e6:.1f} MB)\n")
+            for line in growth:
+                out.write(f"      {line}\n")
+        out.write("Largest live allocations:\n")
+        for entry in self.relevant(tracemalloc.take_snapshot().statistics('lineno'), self.TOP):
+            out.write(f"  {entry}\n")
+
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, time.strftime("run-%Y%m%d-%H%M%S", time.localtime(run_start)))
+        stats = None
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile, stream=out)
+            else:
+                stats.add(profile)
+        if unprofiled:
+            missed = ", ".join(f"{name} ×{count}" for name, count in sorted(unprofiled.items(), key=lambda item: -item[1]))
+            out.write(f"\ncProfile could not see {sum(unprofiled.values())} section call(s) because another profiler "
+                      f"was active; the hot paths below leave them out: {missed}\n")
+        if stats is not None:
+            out.write("\nHot paths by cumulative time")
+            if mid_section:
+                out.write(f" ({mid_section} thread(s) still inside a section are left for the next report)")
+            out.write(":\n")
+            stats.sort_stats("cumulative").print_stats(30)
+            stats.dump_stats(path + ".prof")
+        with open(path + ".txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        return path + ".txt"
+
+    def close(self):
+        """Stop sampling and tracing and put Tk's callback wrapper back"""
+        import tracemalloc
+        self.closed.set()
+        with self.lock:
+            if self.shared is not None:
+                self.shared.disable()
+                self.shared = None
+        tracemalloc.stop()
+        if self.original_call_wrapper is not None:
+            tk.CallWrapper = self.original_call_wrapper
+            self.original_call_wrapper = None
+
+class WakingQueue(queue.Queue):
+    """Queue that calls on_put after every put, so a consumer can sleep until something arrives"""
+
+    def __init__(self):
+        super().__init__()
+        self.on_put = None
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        if self.on_put is not None:
+            self.on_put()
+
+class ProgressAggregator:
+    """Keeps the latest progress per job and hands the UI one coalesced frame at a time"""
+
+    RATE_WINDOW = 5.0  # seconds of history used for throughput and ETA
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change  # called when the first change after a frame arrives
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.order = []
+        self.parked = {}  # paused jobs, out of the frame and the ETA until they report again
+        self.transferred = 0
+        self.points = 0.0
+        self.samples = deque()
+        self.last_progress = 0
+        self.last_status = ""
+        self.dirty = False
+
+    def update(self, job_id, progress=None, status=None):
+        """Record the newest progress (0-100) and/or status text for a job"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                job = self.parked.pop(job_id, None)
+                if job is not None:
+                    # A resumed job climbing back to where it paused is not throughput
+                    job['floor'] = job['progress']
+                else:
+                    job = {'progress': 0, 'status': ""}
+                self.jobs[job_id] = job
+                self.order.append(job_id)
+            if progress is not None:
+                floor = job.get('floor', 0)
+                if progress > max(job['progress'], floor):
+                    self.points += progress - max(job['progress'], floor)
+                if progress >= floor:
+                    job.pop('floor', None)
+                job['progress'] = progress
+                self.last_progress = progress
+            if status is not None:
+                job['status'] = status
+                self.last_status = status
+            changed = not self.dirty
+            self.dirty = True
+        # Outside the lock: the callback may wait for the UI thread, which takes it to draw
+        if changed and self.on_change is not None:
+            self.on_change()
+
+    def add_bytes(self, count):
+        """Count transferred bytes towards the aggregate throughput"""
+        with self.lock:
+            self.transferred += count
+
+    def park(self, job_id):
+        """Take a paused job out of the active set; it comes back with its progress on its next update"""
+        with self.lock:
+            changed = False
+            job = self.jobs.pop(job_id, None)
+            if job is not None:
+                self.order.remove(job_id)
+                self.parked[job_id] = job
+                changed = not self.dirty
+                self.dirty = True
+        if changed and self.on_change is not None:
+            self.on_change()
+
+    def finish(self, job_id):
+        """Drop a job from the active set, keeping its last state on screen"""
+        with self.lock:
+            changed = False
+            self.parked.pop(job_id, None)
+            if self.jobs.pop(job_id, None) is not None:
+                self.order.remove(job_id)
+                changed = not self.dirty
+                self.dirty = True
+        if changed and self.on_change is not None:
+            self.on_change()
+
+    def active_count(self):
+        with self.lock:
+            return len(self.jobs)
+
+    def snapshot(self, pending_jobs=0):
+        """Return the state to render, or None if nothing changed since the last frame"""
+        now = time.monotonic()
+        with self.lock:
+            self.samples.append((now, self.transferred, self.points))
+            while len(self.samples) > 2 and now - self.samples[0][0] > self.RATE_WINDOW:
+                self.samples.popleft()
+            if not self.dirty and not self.jobs:
+                return None
+            self.dirty = False
+
+            if not self.jobs:
+                return {'progress': self.last_progress, 'status': self.last_status}
+
+            progress = sum(job['progress'] for job in self.jobs.values()) / len(self.jobs)
+            if len(self.jobs) == 1:
+                status = self.jobs[self.order[0]]['status']
+            else:
+                status = f"{len(self.jobs)} songs in progress — {self.jobs[self.order[-1]]['status']}"
+
+            first_time, first_bytes, first_points = self.samples[0]
+            elapsed = now - first_time
+            details = []
+            if elapsed > 0.5:
+                rate = (self.transferred - first_bytes) / elapsed
+                if rate > 0:
+                    details.append(f"{PipelineTracer.format_bytes(rate)}/s")
+                point_rate = (self.points - first_points) / elapsed
+                remaining = sum(100 - job['progress'] for job in self.jobs.values()) + 100 * pending_jobs
+                if point_rate > 0 and remaining > 0:
+                    eta = int(remaining / point_rate)
+                    details.append(f"ETA {eta // 60}:{eta % 60:02d}")
+            if details:
+                status = f"{status} · {' · '.join(details)}"
+            return {'progress': progress, 'status': status}
+
+class RangedHTTPReader(io.RawIOBase):
+    """Seekable view of a remote file that prefetches fixed-size parts with parallel range requests"""
+
+    def __init__(self, session, url, size, part_size=2 * 1024 * 1024, workers=4, on_bytes=None):
+        from concurrent.futures import ThreadPoolExecutor
+        super().__init__()
+        self.session = session
+        self.url = url
+        self.size = size
+        self.part_size = part_size
+        self.window = workers
+        self.on_bytes = on_bytes
+        self.position = 0
+        self.parts = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
         else:
-            application_path = os.path.dirname(os.path.abspath(__file__))
-        
+            position = self.size + offset
+        self.position = max(0, position)
+        return self.position
+
+    def fetch_part(self, index):
+        import requests
+        start = index * self.part_size
+        end = min(start + self.part_size, self.size) - 1
+        for attempt in range(3):
+            try:
+                response = self.session.get(self.url, headers={'Range': f"bytes={start}-{end}"}, timeout=30)
+                response.raise_for_status()
+                if response.status_code != 206 or len(response.content) != end - start + 1:
+                    raise IOError(f"Bad range response for bytes {start}-{end}")
+                if self.on_bytes:
+                    self.on_bytes(len(response.content))
+                return response.content
+            except (requests.exceptions.RequestException, IOError):
+                if attempt == 2:
+                    raise
+                time.sleep(0.5 * (attempt + 1))
+
+    def get_part(self, index):
+        # Keep a bounded window of parts in flight ahead of the read position
+        last = (self.size - 1) // self.part_size
+        for i in list(self.parts):
+            if i < index or i >= index + self.window:
+                self.parts.pop(i).cancel()
+        for i in range(index, min(index + self.window, last + 1)):
+            if i not in self.parts:
+                self.parts[i] = self.executor.submit(self.fetch_part, i)
+        return self.parts[index].result()
+
+    def readinto(self, buffer):
+        if self.position >= self.size:
+            return 0
+        index = self.position // self.part_size
+        data = self.get_part(index)
+        offset = self.position - index * self.part_size
+        count = min(len(buffer), len(data) - offset)
+        buffer[:count] = data[offset:offset + count]
+        self.position += count
+        return count
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.parts.clear()
+        super().close()
+
+class StreamingHTTPReader(io.RawIOBase):
+    """Forward-only reader over a single streamed GET, for servers without range support"""
+
+    def __init__(self, response, on_bytes=None):
+        super().__init__()
+        self.response = response
+        self.response.raw.decode_content = True
+        self.on_bytes = on_bytes
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.response.raw.read(len(buffer))
+        if self.on_bytes and data:
+            self.on_bytes(len(data))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self.response.close()
+        super().close()
+
+class DigestReader(io.RawIOBase):
+    """Forward-only reader that hashes everything read through it, in order"""
+
+    def __init__(self, source, algorithm):
+        super().__init__()
+        self.source = source
+        self.digest = hashlib.new(algorithm)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.source.read(len(buffer))
+        self.digest.update(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+    def drain(self):
+        """Read (and hash) whatever the consumer left unread"""
+        block = bytearray(1024 * 1024)
+        while self.readinto(block):
+            pass
+
+    def close(self):
+        self.source.close()
+        super().close()
+
+class FFmpegProvisioner:
+    """Installs a static FFmpeg build into a per-user cache, streaming it out of the archive"""
+
+    # Checksum files the build hosts publish next to each archive. evermeet.cx (macOS) publishes only
+    # GPG signatures, so its builds are installed unverified and reported as such.
+    PUBLISHED_DIGESTS = {"www.gyan.dev": (".sha256", "sha256"), "johnvansickle.com": (".md5", "md5")}
+
+    def __init__(self, session, on_status=None, on_progress=None, on_bytes=None):
+        self.session = session
+        self.on_status = on_status or (lambda text: None)
+        self.on_progress = on_progress or (lambda value: None)
+        self.on_bytes = on_bytes
+        self.binary_name = "ffmpeg.exe" if platform.system() == "Windows" else "ffmpeg"
+        self.fetched = 0
+        self.total = 0
+
+    @staticmethod
+    def cache_root():
+        """Per-user cache directory shared by every install of the program"""
+        system = platform.system()
+        if system == "Windows":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            return os.path.join(base, "FestivalExtractor", "ffmpeg")
+        elif system == "Darwin":
+            return os.path.expanduser("~/Library/Caches/FestivalExtractor/ffmpeg")
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        return os.path.join(base, "festival-extractor", "ffmpeg")
+
+    def cache_dir(self, url):
+        return os.path.join(self.cache_root(), hashlib.sha1(url.encode()).hexdigest()[:12])
+
+    @staticmethod
+    def file_sha256(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def cached_binary(self, url):
+        """Return the cached binary for url if its recorded checksum still matches"""
+        cache_dir = self.cache_dir(url)
+        binary = os.path.join(cache_dir, self.binary_name)
+        manifest_path = os.path.join(cache_dir, "manifest.json")
+        if not (os.path.exists(binary) and os.path.exists(manifest_path)):
+            return None
         try:
-            icon_path = os.path.join(application_path, "icon.png")
-            if os.path.exists(icon_path):
-                self.root.iconphoto(False, tk.PhotoImage(file=icon_path))
-        except Exception:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('sha256') == self.file_sha256(binary):
+                return binary
+        except (OSError, ValueError):
             pass
+        print("Cached FFmpeg failed verification, downloading again")
+        return None
 
-        self.style = ttk.Style()
-        self.style.theme_use("clam")
+    def published_digest(self, url):
+        """(algorithm, hex digest) the build host publishes for the archive at url, or None if it publishes none"""
+        published = self.PUBLISHED_DIGESTS.get(urlsplit(url).hostname)
+        if published is None:
+            return None
+        suffix, algorithm = published
+        response = self.session.get(url + suffix, timeout=15)
+        response.raise_for_status()
+        length = hashlib.new(algorithm).digest_size * 2
+        match = re.search(rf"\b[0-9a-fA-F]{{{length}}}\b", response.text)
+        if not match:
+            raise Exception(f"No {algorithm} checksum found in {url + suffix}")
+        return algorithm, match.group(0).lower()
+
+    def count_bytes(self, count):
+        self.fetched += count
+        if self.on_bytes:
+            self.on_bytes(count)
+        if self.total > 0:
+            self.on_progress(5 + int(min(self.fetched / self.total, 1.0) * 90))
+
+    def open_archive(self, url):
+        """Open the archive as a file object, with parallel range requests when the server allows it"""
+        head = self.session.head(url, allow_redirects=True, timeout=15)
+        head.raise_for_status()
+        size = int(head.headers.get('content-length', 0))
+        self.total = size
+        if size > 0 and head.headers.get('accept-ranges', '').lower() == 'bytes':
+            return io.BufferedReader(RangedHTTPReader(self.session, head.url, size, on_bytes=self.count_bytes),
+                                     buffer_size=256 * 1024)
+        response = self.session.get(url, stream=True, timeout=30)
+        response.raise_for_status()
+        return io.BufferedReader(StreamingHTTPReader(response, on_bytes=self.count_bytes), buffer_size=256 * 1024)
+
+    def install(self, url):
+        """Download the archive for url and extract just the FFmpeg binary into the cache"""
+        self.on_status("Downloading audio processor...")
+        self.on_progress(5)
+
+        cache_dir = self.cache_dir(url)
+        os.makedirs(cache_dir, exist_ok=True)
+        target = os.path.join(cache_dir, self.binary_name)
+        partial = target + ".part"
+
+        expected = self.published_digest(url)
+        archive = self.open_archive(url)
+        checker = None
+        if expected:
+            # Checking the archive means reading all of it in order: the zip is spooled instead of
+            # read by range, and the tar is read to the end after the binary is out
+            checker = DigestReader(archive, expected[0])
+            archive = io.BufferedReader(checker, buffer_size=256 * 1024)
+        try:
+            try:
+                if url.endswith(".tar.xz"):
+                    digest = self.extract_from_tar(archive, partial)
+                else:
+                    digest = self.extract_from_zip(archive, partial)
+                if checker is not None and digest is not None:
+                    checker.drain()
+            finally:
+                archive.close()
+
+            if checker is not None and digest is not None and checker.digest.hexdigest() != expected[1]:
+                raise Exception(f"FFmpeg download does not match the {expected[0]} checksum published for {url}")
+            if digest is None:
+                raise Exception(f"{self.binary_name} not found in downloaded archive")
+        except BaseException:
+            # A broken or mismatching archive, or an interrupted download, leaves no half-written binary behind
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        if expected:
+            print(f"FFmpeg archive matches the published {expected[0]} checksum")
+        else:
+            print(f"FFmpeg archive NOT verified: {urlsplit(url).hostname} publishes no checksum to check it against")
+
+        self.on_status("Setting up audio processor..." if expected else "Setting up audio processor (download not verified)...")
+        os.chmod(partial, stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
+        os.replace(partial, target)
+        with open(os.path.join(cache_dir, "manifest.json"), 'w') as f:
+            json.dump({'url': url, 'sha256': digest, 'size': os.path.getsize(target),
+                       'archive_checksum': f"{expected[0]}:{expected[1]}" if expected else None}, f, indent=4)
+        self.on_progress(100)
+        return target
+
+    def copy_member(self, source, target_path):
+        """Copy an archive member to disk, hashing it on the way"""
+        digest = hashlib.sha256()
+        with open(target_path, 'wb') as target:
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                digest.update(block)
+                target.write(block)
+        return digest.hexdigest()
+
+    def extract_from_tar(self, archive, target_path):
+        # Stream mode reads members in order and stops as soon as the binary is found,
+        # so the rest of the archive is never fetched or decompressed
+        import tarfile
+        with tarfile.open(fileobj=archive, mode='r|xz') as tar_ref:
+            for member in tar_ref:
+                if member.isfile() and os.path.basename(member.name) == self.binary_name:
+                    return self.copy_member(tar_ref.extractfile(member), target_path)
+        return None
 
-        main_frame = ttk.Frame(self.root, padding=10)
-        main_frame.pack(fill=tk.BOTH, expand=True)
+    def extract_from_zip(self, archive, target_path):
+        # With range support zipfile only fetches the central directory and the one member;
+        # without it the stream has to be spooled to disk first
+        import zipfile
+        import tempfile
+        spool = None
+        if not archive.seekable():
+            spool = tempfile.TemporaryFile()
+            shutil.copyfileobj(archive, spool, 1024 * 1024)
+            spool.seek(0)
+        try:
+            with zipfile.ZipFile(spool or archive, 'r') as zip_ref:
+                for file_info in zip_ref.infolist():
+                    if not file_info.is_dir() and os.path.basename(file_info.filename) == self.binary_name:
+                        with zip_ref.open(file_info) as source:
+                            return self.copy_member(source, target_path)
+        finally:
+            if spool:
+                spool.close()
+        return None
 
-        # Left side - Song list with search
-        left_frame = ttk.Frame(main_frame)
-        left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 15))
+class FFmpegError(subprocess.CalledProcessError):
+    """ffmpeg exited with an error; carries the tail of its stderr"""
 
-        search_frame = ttk.Frame(left_frame)
-        search_frame.pack(fill=tk.X, pady=(0, 5))
-        ttk.Label(search_frame, text="Search Song:").pack(side=tk.LEFT, padx=(0, 5))
-        self.search_entry = ttk.Entry(search_frame, width=50)
-        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-        self.search_entry.bind("<KeyRelease>", self.search_songs)
+    def __str__(self):
+        lines = (self.stderr or "").strip().splitlines()
+        message = f"ffmpeg exited with status {self.returncode}"
+        if lines:
+            message += ": " + " | ".join(lines[-3:])
+        return message
 
-        list_frame = ttk.Frame(left_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True)
-        self.song_listbox = tk.Listbox(list_frame, width=60, height=25, bg="#2E2E2E", fg="#FFFFFF", font=("Arial", 12))
-        self.song_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.song_listbox.bind("<<ListboxSelect>>", self.on_song_select)
+class JobInterrupted(Exception):
+    """A job stopped at one of its checkpoints because it was paused or cancelled"""
 
-        scrollbar = Scrollbar(list_frame, orient=tk.VERTICAL, command=self.song_listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.song_listbox.config(yscrollcommand=scrollbar.set)
+class JobCancelled(JobInterrupted):
+    pass
 
-        # Right side - Tabs
-        right_frame = ttk.Frame(main_frame)
-        right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+class JobPaused(JobInterrupted):
+    pass
 
-        # Create notebook for tabs
-        self.notebook = ttk.Notebook(right_frame)
-        self.notebook.pack(fill=tk.BOTH, expand=True)
+class SegmentFailed(Exception):
+    """A segment could not be fetched from any mirror; the download up to it is kept for a retry"""
 
-        # Song Info tab
-        self.song_info_frame = ttk.Frame(self.notebook, padding=10)
-        self.notebook.add(self.song_info_frame, text="Song Info")
+    def __init__(self, index, cause):
+        super().__init__(f"segment {index} failed: {cause}")
+        self.index = index
 
-        # Queue tab
-        self.queue_frame = ttk.Frame(self.notebook, padding=(10, 5, 10, 10))  # top, right, bottom, left
-        self.notebook.add(self.queue_frame, text="Queue")
+class JobControl:
+    """Pause, resume and cancel requests for one job, honoured at the job's checkpoints"""
 
-        # Progress bar (shared, but only visible in queue tab initially)
-        self.progress = ttk.Progressbar(self.queue_frame, orient="horizontal", length=400, mode="determinate")
-        self.progress.pack(pady=2)  # Reduced from 10 to 2
-        self.progress["maximum"] = 100
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()  # also aborts in-flight segment requests and ffmpeg
+        self.paused = False
+        self.parked = False  # stopped at a checkpoint, out of the pipeline until resumed
+
+    def checkpoint(self):
+        """Raise JobCancelled or JobPaused if either was requested since the last checkpoint"""
+        with self.lock:
+            if self.cancelled.is_set():
+                raise JobCancelled()
+            if self.paused:
+                self.parked = True
+                raise JobPaused()
+
+    def pause(self):
+        with self.lock:
+            if not self.cancelled.is_set():
+                self.paused = True
+
+    def resume(self):
+        """Lift a pause; returns True if the job had parked and has to be submitted again"""
+        with self.lock:
+            self.paused = False
+            parked, self.parked = self.parked, False
+            return parked
+
+    def cancel(self):
+        """Cancel the job; returns True if it had parked, so no worker will notice and the caller finishes it"""
+        with self.lock:
+            self.cancelled.set()
+            self.paused = False
+            parked, self.parked = self.parked, False
+            return parked
+
+class FFmpegService:
+    """Runs ffmpeg invocations with bounded concurrency, captured stderr and per-call timing"""
+
+    def __init__(self, ffmpeg_path="ffmpeg", max_processes=2, tracer=None):
+        self.ffmpeg_path = ffmpeg_path
+        self.slots = threading.BoundedSemaphore(max_processes)
+        self.tracer = tracer
+        self.history = deque(maxlen=50)
+
+    def run(self, args, label="ffmpeg", loglevel="warning", abort=None):
+        """Run ffmpeg with args and return a record of the invocation; raises FFmpegError on failure.
+
+        Setting the abort event terminates the process and raises JobCancelled.
+        """
+        command = [self.ffmpeg_path, "-hide_banner", "-nostdin", "-loglevel", loglevel, *args]
+        creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        with self.slots:
+            if abort is not None and abort.is_set():
+                raise JobCancelled()
+            start = time.perf_counter()
+            process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                       creationflags=creation_flags)
+            while True:
+                try:
+                    _, stderr = process.communicate(timeout=0.25)
+                    break
+                except subprocess.TimeoutExpired:
+                    if abort is not None and abort.is_set():
+                        self.stop(process)
+                        raise JobCancelled()
+            duration = time.perf_counter() - start
+
+        stderr_text = stderr.decode('utf-8', errors='replace')
+        record = {
+            'event': 'ffmpeg',
+            'label': label,
+            'duration': round(duration, 4),
+            'returncode': process.returncode,
+            'stderr': stderr_text[-4000:]
+        }
+        if self.tracer is not None:
+            job = self.tracer.current_job()
+            record['job'] = job['job'] if job else None
+            self.tracer.write(record)
+        self.history.append(record)
+
+        if process.returncode != 0:
+            raise FFmpegError(process.returncode, command, stderr=stderr_text)
+        if loglevel == "warning" and stderr_text.strip():
+            print(f"ffmpeg ({label}) warnings: {stderr_text.strip().splitlines()[-1]}")
+        # Callers that parse ffmpeg's report get the untrimmed stderr
+        return dict(record, stderr=stderr_text)
 
-        self.status_label = ttk.Label(self.queue_frame, text="Getting things ready...", font=("Arial", 12))
-        self.status_label.pack(pady=2)  # Reduced from 5 to 2
+    @staticmethod
+    def stop(process):
+        """Terminate a running ffmpeg, killing it if it does not exit promptly"""
+        process.terminate()
+        try:
+            process.communicate(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
 
-        # Queue listbox
-        queue_list_frame = ttk.Frame(self.queue_frame)
-        queue_list_frame.pack(fill=tk.X, expand=False, pady=(5, 2))
-        
-        ttk.Label(queue_list_frame, text="Download Queue:", font=("Arial", 12, "bold")).pack(anchor="w", pady=(0, 5))
-        
-        self.queue_listbox = tk.Listbox(queue_list_frame, height=20, bg="#2E2E2E", fg="#FFFFFF", font=("Arial", 11))
-        self.queue_listbox.pack(fill=tk.BOTH, expand=True)
-        self.queue_listbox.bind("<<ListboxSelect>>", self.on_queue_select)
+class CatalogStream:
+    """Incremental catalog parser: feed it text as it arrives and it returns each track row once that entry is complete
 
-        # Queue buttons frame - Triangle layout
-        queue_buttons_frame = ttk.Frame(self.queue_frame)
-        queue_buttons_frame.pack(fill=tk.X, pady=(5, 5))
+    Two payload shapes are recognized per entry: the spark-tracks page (an object of entries whose
+    'track' holds the fields and a 'qi' JSON string with the sid) and the older flat 'bSongs' list
+    of {an, tt, sid} objects. Only the entry currently being decoded is kept in memory.
+    """
 
-        # Top row - Download All button (centered)
-        top_button_frame = ttk.Frame(queue_buttons_frame)
-        top_button_frame.pack(pady=(0, 3))
+    WHITESPACE = " \t\r\n"
+    COMPACT_AFTER = 1 << 16  # drop consumed text once this much has piled up
+    MISSING = object()
 
-        self.download_all_button = ttk.Button(top_button_frame, text="Download All", command=self.download_all_queue)
-        self.download_all_button.pack()
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.state = "start"
+        self.key = None
+        self.schema = None
+
+    def feed(self, text):
+        """Add a chunk of the payload and return the rows (tuples in SongCatalog.FIELDS order) it completed"""
+        self.buffer += text
+        rows = []
+        while self.step(rows):
+            pass
+        if self.pos >= self.COMPACT_AFTER:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        return rows
+
+    def close(self):
+        if self.state != "done":
+            raise ValueError(f"catalog payload ended early (while reading {self.state})")
+
+    def skip(self, characters):
+        while self.pos < len(self.buffer) and self.buffer[self.pos] in characters:
+            self.pos += 1
+        return self.buffer[self.pos] if self.pos < len(self.buffer) else None
+
+    def decode(self):
+        """The complete JSON value at the cursor, or MISSING while it is still arriving"""
+        try:
+            value, end = self.decoder.raw_decode(self.buffer, self.pos)
+        except json.JSONDecodeError:
+            return self.MISSING
+        # A number that runs to the end of the buffer may continue in the next chunk
+        if end == len(self.buffer) and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return self.MISSING
+        self.pos = end
+        return value
+
+    def step(self, rows):
+        """Advance through one token; False when more text is needed"""
+        if self.state == "start":
+            char = self.skip(self.WHITESPACE)
+            if char is None:
+                return False
+            if char != "{":
+                raise ValueError("catalog payload is not a JSON object")
+            self.pos += 1
+            self.state = "key"
+        elif self.state == "key":
+            char = self.skip(self.WHITESPACE + ",")
+            if char is None:
+                return False
+            if char == "}":
+                self.pos += 1
+                self.state = "done"
+                return False
+            key = self.decode()
+            if key is self.MISSING:
+                return False
+            self.key = key
+            self.state = "colon"
+        elif self.state == "colon":
+            char = self.skip(self.WHITESPACE)
+            if char is None:
+                return False
+            if char != ":":
+                raise ValueError(f"catalog payload: expected ':' after {self.key!r}")
+            self.pos += 1
+            self.state = "value"
+        elif self.state == "value":
+            char = self.skip(self.WHITESPACE)
+            if char is None:
+                return False
+            if char == "[":
+                # Lists ('bSongs') are walked element by element instead of decoded whole
+                self.pos += 1
+                self.state = "list"
+                return True
+            value = self.decode()
+            if value is self.MISSING:
+                return False
+            self.collect(value, rows)
+            self.state = "key"
+        elif self.state == "list":
+            char = self.skip(self.WHITESPACE + ",")
+            if char is None:
+                return False
+            if char == "]":
+                self.pos += 1
+                self.state = "key"
+                return True
+            value = self.decode()
+            if value is self.MISSING:
+                return False
+            self.collect(value, rows)
+        else:
+            return False
+        return True
 
-        # Bottom row - Clear Queue and Remove Selected buttons (side by side, centered)
-        bottom_button_frame = ttk.Frame(queue_buttons_frame)
-        bottom_button_frame.pack(pady=(0, 0))
+    def collect(self, value, rows):
+        row = self.adapt(value)
+        if row is not None:
+            rows.append(row)
 
-        self.clear_queue_button = ttk.Button(bottom_button_frame, text="Clear Queue", command=self.clear_queue)
-        self.clear_queue_button.pack(side=tk.LEFT)
+    def adapt(self, value):
+        """Normalize one entry of either schema to a catalog row; None for entries that are not tracks"""
+        if not isinstance(value, dict):
+            return None
+        if isinstance(value.get('track'), dict):
+            track, schema = value['track'], "spark-tracks"
+            qi = track.get('qi', '{}')
+            try:
+                qi = json.loads(qi) if isinstance(qi, str) else qi
+            except json.JSONDecodeError:
+                qi = {}
+            sid = qi.get('sid', '') if isinstance(qi, dict) else ''
+        elif 'tt' in value and 'sid' in value:
+            track, schema = value, "bSongs"
+            sid = value['sid']
+        else:
+            return None
+        if self.schema is None:
+            self.schema = schema
+            print(f"Catalog schema: {schema}")
+        return (
+            track.get('tt', 'Unknown Title'),
+            track.get('an', 'Unknown Artist'),
+            track.get('au', ''),
+            track.get('ry', 'Unknown Year'),
+            track.get('dn', 'Unknown Duration'),
+            track.get('mt', 'Unknown BPM'),
+            sid or '',
+        )
+
+class SongCatalog:
+    """Column-oriented song catalog with interned strings, precomputed search/sort keys and a sid index"""
+
+    FIELDS = ("title", "artist", "cover_art_url", "release_year", "duration", "bpm", "sid")
 
-        self.remove_selected_button = ttk.Button(bottom_button_frame, text="Remove Selected", command=self.remove_selected_from_queue)
-        self.remove_selected_button.pack(side=tk.LEFT)
+    def __init__(self):
+        self.columns = {field: [] for field in self.FIELDS}
+        self.values = {}  # one shared object per distinct non-text value
+        self.by_sid = {}
+        self.search_blob = ""
+        self.offsets = []
+        self.orders = {}
+
+    def append(self, **fields):
+        row = len(self)
+        for field in self.FIELDS:
+            value = fields[field]
+            # Artists, years, BPMs and placeholders repeat across hundreds of tracks; keep one copy of each
+            if isinstance(value, str):
+                value = sys.intern(value)
+            elif value.__hash__ is not None:
+                value = self.values.setdefault(value, value)
+            self.columns[field].append(value)
+        if fields['sid']:
+            self.by_sid[fields['sid']] = row
+
+    def extend(self, rows):
+        """Append rows given as tuples in FIELDS order"""
+        for row in rows:
+            self.append(**dict(zip(self.FIELDS, row)))
+
+    def finish(self):
+        """Build the search text and sort orders once the catalog is complete"""
+        from array import array
+        titles, artists = self.columns['title'], self.columns['artist']
+        keys = [f"{title.lower()}\x00{artist.lower()}\n" for title, artist in zip(titles, artists)]
+        self.offsets = array('l', [0])
+        for key in keys:
+            self.offsets.append(self.offsets[-1] + len(key))
+        self.search_blob = "".join(keys)
+        rows = range(len(keys))
+        for name, column in (("artist", artists), ("title", titles)):
+            order = sorted(rows, key=lambda row: column[row].lower())
+            # rank[row] is the row's position in that order, so subsets sort by a plain array lookup
+            rank = array('l', bytes(len(order) * array('l').itemsize))
+            for position, row in enumerate(order):
+                rank[row] = position
+            self.orders[name] = rank
+        return self
+
+    def __len__(self):
+        return len(self.columns['sid'])
+
+    def __getitem__(self, row):
+        """Materialize one row as the song dict the download pipeline works with"""
+        return {field: self.columns[field][row] for field in self.FIELDS}
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+    def label(self, row):
+        """The row as shown in the song list"""
+        return f"{self.columns['artist'][row]} - {self.columns['title'][row]}"
+
+    def row_of(self, sid):
+        return self.by_sid.get(sid)
+
+    def search(self, query):
+        """Rows whose title or artist contains the lowercase query, in catalog order"""
+        if not query:
+            return list(range(len(self)))
+        from bisect import bisect_right
+        rows = []
+        position = self.search_blob.find(query)
+        while position != -1:
+            row = bisect_right(self.offsets, position) - 1
+            rows.append(row)
+            # Continue after this row so each row is reported once
+            position = self.search_blob.find(query, self.offsets[row + 1])
+        return rows
+
+    def ordered(self, rows, sorting_method, ascending=True):
+        """rows arranged for display by one of the sorting methods"""
+        if sorting_method == "A-Z by Artist":
+            rows = sorted(rows, key=self.orders["artist"].__getitem__)
+        elif sorting_method == "A-Z by Song Name":
+            rows = sorted(rows, key=self.orders["title"].__getitem__)
+        else:
+            rows = list(rows)
+        if not ascending:
+            rows.reverse()
+        return rows
+
+class LibraryIndex:
+    """SQLite record of completed extractions so batch runs can skip songs that are already up to date"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS extractions (
+            sid TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            method TEXT NOT NULL,
+            naming TEXT NOT NULL,
+            stems TEXT NOT NULL,
+            clip TEXT NOT NULL,
+            silent TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            title TEXT,
+            artist TEXT,
+            folder TEXT,
+            outputs TEXT,
+            completed_at REAL,
+            PRIMARY KEY (sid, profile, method, naming, stems, clip, silent)
+        )
+    """
+    VERSION = 2  # bumped whenever the key changes; older indexes are dropped and rebuilt by later runs
+
+    def __init__(self, path="library.sqlite"):
+        self.path = path
+        self.lock = threading.Lock()
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            import sqlite3
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            if self._db.execute("PRAGMA user_version").fetchone()[0] != self.VERSION:
+                self._db.execute("DROP TABLE IF EXISTS extractions")
+                self._db.execute(f"PRAGMA user_version = {self.VERSION}")
+            self._db.execute(self.SCHEMA)
+            self._db.commit()
+        return self._db
+
+    def is_current(self, key, profiles, content_hash):
+        """True when every profile was extracted from this exact source and its files are still there"""
+        with self.lock:
+            for profile in profiles:
+                row = self.db.execute(
+                    "SELECT content_hash, outputs FROM extractions "
+                    "WHERE sid=? AND profile=? AND method=? AND naming=? AND stems=? AND clip=? AND silent=?",
+                    (key['sid'], profile, key['method'], key['naming'], key['stems'], key['clip'], key['silent'])).fetchone()
+                if row is None or row[0] != content_hash:
+                    return False
+                if not all(os.path.exists(output['path']) for output in json.loads(row[1])):
+                    return False
+        return True
+
+    def record(self, key, profile, content_hash, title, artist, folder, paths):
+        """Store one completed profile together with the size and checksum of every file it wrote"""
+        outputs = [{'path': os.path.abspath(path), 'size': os.path.getsize(path),
+                    'sha256': FFmpegProvisioner.file_sha256(path)} for path in paths if os.path.exists(path)]
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key['sid'], profile, key['method'], key['naming'], key['stems'], key['clip'], key['silent'], content_hash,
+                 title, artist, os.path.abspath(folder), json.dumps(outputs), time.time()))
+            self.db.commit()
+
+    def extracted_sids(self, profile):
+        """Song ids that have any completed extraction in the given profile"""
+        with self.lock:
+            return {row[0] for row in self.db.execute("SELECT DISTINCT sid FROM extractions WHERE profile=?", (profile,))}
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight segment requests, tuned at runtime from throughput, latency and error rates"""
+
+    MIN_LIMIT = 1
+    MAX_LIMIT = 16
+    SONG_WINDOW = 8  # segments one song keeps in flight at most; more songs run when the limit is higher
+    WINDOW = 2.0  # seconds of transfers judged together
+    GAIN = 1.05  # a step up must raise throughput this much to be kept
+    HOLD_WINDOWS = 10  # windows spent at the knee before probing upward again
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, initial=4):
+        self.cond = threading.Condition()
+        self.limit = initial
+        self.in_flight = 0
+        self.songs = 0
+        self.interactive = 0  # interactive songs transferring now; batch songs leave room for them
+        self.state = "probing"
+        self.throughput = 0.0
+        self.reference = None  # throughput measured before the last step up
+        self.hold = 0
+        self.srtt = None  # smoothed request latency and its deviation, reported in the trace
+        self.rttvar = 0.0
+        self.reset_window()
+
+    def reset_window(self):
+        self.window = {'start': time.monotonic(), 'bytes': 0, 'ok': 0, 'errors': 0, 'throttled': 0, 'saturated': False}
+
+    def batch_limit(self):
+        """Slots batch songs may hold while interactive songs are transferring"""
+        return self.limit - min(self.limit - 1, self.SONG_WINDOW * self.interactive)
+
+    def acquire(self, block=True, lane=1):
+        """Take a request slot; without block, returns False instead of waiting for one"""
+        with self.cond:
+            while self.in_flight >= (self.batch_limit() if lane else self.limit):
+                # Demand exceeded the limit, so this window measures the link and not the app
+                self.window['saturated'] = True
+                if not block:
+                    return False
+                self.cond.wait()
+            self.in_flight += 1
+            return True
 
-        # Settings button
-        self.settings_button = ttk.Button(self.root, text="Settings", command=self.open_settings_window)
-        self.settings_button.place(relx=1.0, rely=1.0, anchor="se", x=-10, y=-10)
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def songs_wanted(self):
+        """Songs needed to keep the limit busy, plus one resolving while the others transfer"""
+        return -(-self.limit // self.SONG_WINDOW) + 1
+
+    def acquire_song(self, cap, lane=1):
+        """Admit a song; interactive songs are always admitted straight away"""
+        with self.cond:
+            while lane and self.songs - self.interactive >= min(cap, self.songs_wanted()):
+                self.cond.wait()
+            self.songs += 1
+            if not lane:
+                self.interactive += 1
+
+    def release_song(self, lane=1):
+        with self.cond:
+            self.songs -= 1
+            if not lane:
+                self.interactive -= 1
+            self.cond.notify_all()
+
+    def record(self, size=0, latency=None, status=None):
+        """Feed one finished request: status None for success, else the HTTP status (0 for network errors)"""
+        with self.cond:
+            window = self.window
+            if status is None:
+                window['bytes'] += size
+                window['ok'] += 1
+                if self.srtt is None:
+                    self.srtt, self.rttvar = latency, latency / 2
+                else:
+                    self.rttvar = 0.75 * self.rttvar + 0.25 * abs(latency - self.srtt)
+                    self.srtt = 0.875 * self.srtt + 0.125 * latency
+            elif status in self.THROTTLE_STATUSES:
+                window['throttled'] += 1
+            elif status == 0 or status >= 500:
+                # Other 4xx answers are missing files on one mirror, not congestion
+                window['errors'] += 1
+            if time.monotonic() - window['start'] >= self.WINDOW:
+                self.adjust()
+                self.reset_window()
+                self.cond.notify_all()
+
+    def adjust(self):
+        """Close a window: halve on throttling or errors, step up while throughput grows, settle at the knee"""
+        window = self.window
+        self.throughput = window['bytes'] / max(time.monotonic() - window['start'], 1e-9)
+        total = window['ok'] + window['errors'] + window['throttled']
+        if window['throttled'] or window['errors'] > 0.1 * total:
+            self.limit = max(self.MIN_LIMIT, self.limit // 2)
+            self.state = "backoff"
+            self.reference = None
+            self.hold = 3
+        elif not window['saturated'] or not window['ok']:
+            return
+        elif self.hold:
+            self.hold -= 1
+        elif self.reference is None or self.throughput > self.reference * self.GAIN:
+            self.reference = self.throughput
+            self.limit = min(self.MAX_LIMIT, self.limit + 1)
+            self.state = "probing"
+        else:
+            # The last step up bought nothing: the link is full, so settle one below it
+            self.limit = max(self.MIN_LIMIT, self.limit - 1)
+            self.state = "steady"
+            self.reference = None
+            self.hold = self.HOLD_WINDOWS
+
+    def snapshot(self):
+        with self.cond:
+            return {'limit': self.limit, 'in_flight': self.in_flight, 'songs': self.songs, 'state': self.state,
+                    'throughput': round(self.throughput), 'latency': round(self.srtt, 3) if self.srtt else None}
+
+    def describe(self):
+        snap = self.snapshot()
+        return (f"Transfers: {snap['in_flight']}/{snap['limit']} in flight ({snap['state']}) · "
+                f"{snap['songs']} song{'s' if snap['songs'] != 1 else ''} · "
+                f"{PipelineTracer.format_bytes(snap['throughput'])}/s")
+
+class SegmentFetcher:
+    """Fetches media segments from every CDN mirror, hedging slow requests and tracking per-host health"""
+
+    HEDGE_PERCENTILE = 0.9
+    DEFAULT_HEDGE_DELAY = 1.5  # seconds, until enough latencies are known
+    MIN_HEDGE_DELAY = 0.25
+    TIMEOUT = 20
+    MIN_REQUEST_TIMEOUT = 5.0  # floor for small requests, however fast the host has been
+    LATENCY_MARGIN = 8  # small requests may take this many times the host's smoothed segment latency
+
+    def __init__(self, session_factory, controller, max_workers=None):
+        self.session_factory = session_factory
+        self.controller = controller
+        # Every admitted request may be hedged once
+        self.max_workers = max_workers or 2 * controller.MAX_LIMIT
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=200)
+        self.health = {}  # host -> smoothed latency, success/failure counts and cool-down deadline
+        self.executor = None
+        self.window_pool = None
+        self.bandwidth = 0  # bytes per second across all transfers, 0 for no cap
+        self.pace_lock = threading.Lock()
+        self.allowance = 0.0
+        self.pace_time = time.monotonic()
+
+    def pace(self, count):
+        """Hold the caller so that all segment transfers together stay under the bandwidth cap"""
+        if not self.bandwidth:
+            return
+        with self.pace_lock:
+            now = time.monotonic()
+            # Up to a second of unused allowance carries over as burst
+            self.allowance = min(self.bandwidth, self.allowance + (now - self.pace_time) * self.bandwidth) - count
+            self.pace_time = now
+            wait = -self.allowance / self.bandwidth
+        if wait > 0:
+            time.sleep(wait)
+
+    def ranked(self, bases):
+        """Mirrors ordered by health: cooling-down hosts last, then by smoothed latency"""
+        now = time.monotonic()
+        with self.lock:
+            def score(base):
+                health = self.health.get(urlsplit(base).netloc)
+                if health is None:
+                    return (False, 0.0)
+                return (health['down_until'] > now, health['latency'])
+            return sorted(bases, key=score)
+
+    def hedge_delay(self):
+        """Latency percentile after which a duplicate request is sent"""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < 10:
+            return self.DEFAULT_HEDGE_DELAY
+        return max(self.MIN_HEDGE_DELAY, samples[int(len(samples) * self.HEDGE_PERCENTILE) - 1])
+
+    def request_timeout(self, url):
+        """Timeout for a small request (e.g. a HEAD probe) to url's host, from its observed segment latency"""
+        with self.lock:
+            health = self.health.get(urlsplit(url).netloc)
+            latency = health['latency'] if health and health['successes'] else None
+        if latency is None:
+            # Nothing measured yet: as patient as a segment transfer
+            return self.TIMEOUT
+        return min(self.TIMEOUT, max(self.MIN_REQUEST_TIMEOUT, self.LATENCY_MARGIN * latency))
+
+    def mark(self, host, latency):
+        with self.lock:
+            health = self.health.setdefault(host, {'latency': 0.0, 'successes': 0, 'failures': 0, 'down_until': 0.0})
+            if latency is None:
+                health['failures'] += 1
+                health['down_until'] = time.monotonic() + min(60, 2 ** min(health['failures'], 6))
+            else:
+                health['latency'] = latency if health['successes'] == 0 else 0.8 * health['latency'] + 0.2 * latency
+                health['successes'] += 1
+                health['failures'] = 0
+                self.latencies.append(latency)
+
+    def attempt(self, url, cancel):
+        """One request; returns None if another copy of it already won"""
+        host = urlsplit(url).netloc
+        start = time.monotonic()
+        try:
+            with self.session_factory().get(url, stream=True, timeout=self.TIMEOUT) as response:
+                response.raise_for_status()
+                body = self.read_body(response, cancel)
+        except Exception as e:
+            if not cancel.is_set():
+                self.mark(host, None)
+                response = getattr(e, 'response', None)
+                self.controller.record(status=response.status_code if response is not None else 0)
+            raise
+        # A lost race still tells how slow the host was
+        latency = time.monotonic() - start
+        self.mark(host, latency)
+        if body is not None:
+            self.controller.record(len(body), latency)
+        return body
+
+    def read_body(self, response, cancel):
+        """Read the body into one buffer sized from Content-Length, without per-chunk copies"""
+        length = response.headers.get('content-length')
+        if not length or response.headers.get('content-encoding', 'identity') != 'identity':
+            chunks = []
+            for chunk in response.iter_content(65536):
+                if cancel.is_set():
+                    return None
+                chunks.append(chunk)
+                self.pace(len(chunk))
+            return b"".join(chunks)
+
+        body = bytearray(int(length))
+        view = memoryview(body)
+        filled = 0
+        while filled < len(body):
+            if cancel.is_set():
+                return None
+            count = response.raw.readinto(view[filled:filled + 262144])
+            if not count:
+                raise IOError(f"Connection closed after {filled} of {len(body)} bytes")
+            filled += count
+            self.pace(count)
+        return body
+
+    def fetch(self, bases, path, rounds=3, abort=None):
+        """Segment body from whichever mirror answers first, plus request/hedge/failure counts"""
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="segment")
+        # Failover order: every mirror by health, repeated for retries
+        candidates = [base + path for base in self.ranked(bases)] * rounds
+        stats = {'requests': 0, 'hedged': 0, 'failures': 0}
+        cancel = threading.Event()
+        pending = set()
+        error = None
+
+        def launch():
+            pending.add(self.executor.submit(self.attempt, candidates[stats['requests']], cancel))
+            stats['requests'] += 1
+
+        launch()
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=self.hedge_delay(), return_when=FIRST_COMPLETED)
+                if abort is not None and abort.is_set():
+                    raise JobCancelled()
+                if not done:
+                    # Slower than usual: race a duplicate on the next mirror, at most two in flight
+                    if len(pending) < 2 and stats['requests'] < len(candidates):
+                        stats['hedged'] += 1
+                        launch()
+                    continue
+                for future in done:
+                    pending.discard(future)
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        error = e
+                        stats['failures'] += 1
+                        continue
+                    if data is not None:
+                        return data, stats
+                if not pending and stats['requests'] < len(candidates):
+                    time.sleep(0.25 * stats['failures'])
+                    launch()
+        finally:
+            cancel.set()
+        raise error or Exception(f"No mirror returned {path}")
+
+    def fetch_admitted(self, bases, path, abort):
+        try:
+            return self.fetch(bases, path, abort=abort)
+        finally:
+            self.controller.release()
+
+    def fetch_in_order(self, bases, paths, lane=1, abort=None):
+        """Yield (body, stats) for each path in order, keeping as many in flight as the controller allows"""
+        from concurrent.futures import ThreadPoolExecutor
+        with self.lock:
+            if self.window_pool is None:
+                self.window_pool = ThreadPoolExecutor(max_workers=self.controller.MAX_LIMIT, thread_name_prefix="window")
+        in_flight = deque()
+        index = 0
+        try:
+            while index < len(paths) or in_flight:
+                # Only wait for a slot when this song has nothing in flight; otherwise write what has arrived
+                while (index < len(paths) and len(in_flight) < self.controller.SONG_WINDOW
+                       and self.controller.acquire(block=not in_flight, lane=lane)):
+                    in_flight.append(self.window_pool.submit(self.fetch_admitted, bases, paths[index], abort))
+                    index += 1
+                yield in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                if future.cancel():
+                    self.controller.release()
+
+class FailureLedger:
+    """Failed songs of batch runs with the stage and cause, shown without dialogs and kept for retry"""
+
+    def __init__(self, tracer=None):
+        self.lock = threading.Lock()
+        self.entries = {}  # queue key -> latest failure
+        self.tracer = tracer
+
+    def record(self, key, title, stage, cause):
+        with self.lock:
+            previous = self.entries.get(key)
+            entry = {'key': key, 'title': title, 'stage': stage, 'cause': cause,
+                     'attempts': previous['attempts'] + 1 if previous else 1, 'time': time.time()}
+            self.entries[key] = entry
+        if self.tracer is not None:
+            self.tracer.write(dict(entry, event='failure'))
+        return entry
+
+    def resolve(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def __iter__(self):
+        with self.lock:
+            entries = sorted(self.entries.values(), key=lambda entry: entry['time'])
+        return iter(entries)
 
-        self.apply_theme()
-        
-        # Initialize FFmpeg first
-        self.setup_ffmpeg()
-        
-        self.songs = self.fetch_and_extract_songs()
-        self.filtered_songs = self.songs
-        self.display_songs(self.filtered_songs)
+    @staticmethod
+    def describe(entry):
+        text = f"{entry['title']} — {entry['stage']}: {entry['cause']}"
+        if entry['attempts'] > 1:
+            text += f" (attempt {entry['attempts']})"
+        return text
 
-        # Start checking the download queue
-        self.check_download_queue()
+class DownloadQueue:
+    """Download queue keyed by song id, with per-item state and crash-safe persistence to disk"""
+
+    LABELS = {"running": "Downloading...", "paused": "Paused", "cancelled": "Cancelled", "failed": "Failed",
+              "done": "Done", "skipped": "Up to date"}
+
+    def __init__(self, path="queue.json", on_dirty=None):
+        self.path = path
+        # State changes are saved in batches: on_dirty is called once per batch and should call flush()
+        # soon after; without it every change is saved at once
+        self.on_dirty = on_dirty
+        self.dirty = False
+        self.items = {}  # key -> {'song': ..., 'state': 'pending' | 'running' | 'paused' | 'cancelled' | 'failed' | 'done' | 'skipped'}
+        self.keys = []  # display order
+        self.positions = {}  # key -> index in self.keys
+
+    @staticmethod
+    def key(song):
+        """Queue, ledger and work-folder key; each clip of a song is its own entry"""
+        base = song['sid'] or song['title']
+        clip = song.get('clip')
+        return f"{base}@{clip[0]:g}-{clip[1]:g}" if clip else base
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, song):
+        return self.key(song) in self.items
+
+    def __iter__(self):
+        return (self.items[key] for key in self.keys)
+
+    def item_at(self, index):
+        return self.items[self.keys[index]]
+
+    def index_of(self, key):
+        return self.positions.get(key)
+
+    def add(self, song, save=True):
+        """Append a song; returns False if it is already queued"""
+        key = self.key(song)
+        if key in self.items:
+            return False
+        self.positions[key] = len(self.keys)
+        self.keys.append(key)
+        self.items[key] = {'song': song, 'state': "pending"}
+        if save:
+            self.save()
+        return True
+
+    def add_many(self, songs):
+        """Append every song not queued yet with a single save; returns how many were added"""
+        added = sum(self.add(song, save=False) for song in songs)
+        if added:
+            self.save()
+        return added
+
+    def remove(self, index):
+        key = self.keys.pop(index)
+        for position in range(index, len(self.keys)):
+            self.positions[self.keys[position]] = position
+        del self.positions[key]
+        item = self.items.pop(key)
+        self.save()
+        return item
+
+    def remove_where(self, states):
+        """Drop every item in one of the given states, keeping the rest in order"""
+        self.keys = [key for key in self.keys if self.items[key]['state'] not in states]
+        self.items = {key: self.items[key] for key in self.keys}
+        self.positions = {key: position for position, key in enumerate(self.keys)}
+        self.save()
+
+    def clear(self):
+        self.remove_where({"pending", "running", "failed", "done", "skipped"})
+
+    def set_state(self, key, state):
+        """Change an item's state; returns its index, or None if it left the queue meanwhile"""
+        if key not in self.items:
+            return None
+        self.items[key]['state'] = state
+        self.mark_dirty()
+        return self.positions[key]
+
+    def count(self, state):
+        return sum(1 for item in self.items.values() if item['state'] == state)
+
+    def next_pending(self, after=None):
+        """First pending item, optionally only those after the given key"""
+        start = self.positions[after] + 1 if after in self.positions else 0
+        for key in self.keys[start:]:
+            if self.items[key]['state'] == "pending":
+                return self.items[key]
+        return None
 
+    def mark_dirty(self):
+        if self.on_dirty is None:
+            self.save()
+        elif not self.dirty:
+            self.dirty = True
+            self.on_dirty()
+
+    def flush(self):
+        """Save state changes made since the last save, if any"""
+        if self.dirty:
+            self.save()
+
+    def save(self):
+        """Write the queue atomically so a crash leaves either the old or the new file"""
+        self.dirty = False
+        data = [{'song': self.items[key]['song'], 'state': self.items[key]['state']} for key in self.keys]
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Could not save the queue: {e}")
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
         try:
-            if getattr(sys, 'frozen', False):
-                logo_path = os.path.join(sys._MEIPASS, "logo.png")
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load the saved queue: {e}")
+            return
+        for entry in data:
+            song = entry['song']
+            if song.get('clip'):
+                song['clip'] = tuple(song['clip'])
+            if self.add(song, save=False):
+                # A download that was running or paused when the program stopped is picked up again;
+                # its completed segments are still in its work folder
+                state = entry.get('state', "pending")
+                self.items[self.key(song)]['state'] = "pending" if state in ("running", "paused") else state
+
+class LaneQueue:
+    """Stage queue with priority lanes: lane 0 (interactive) always goes first and ignores the capacity"""
+
+    def __init__(self, capacity=0):
+        self.capacity = capacity  # batch jobs allowed to wait here, 0 for unbounded
+        self.cond = threading.Condition()
+        self.heap = []
+        self.batch = 0
+        self.sequence = itertools.count()
+
+    def put(self, job):
+        """Queue a job by (lane, order, arrival); batch jobs block while the queue is full"""
+        lane = job.get('lane', 1)
+        with self.cond:
+            while lane and self.capacity and self.batch >= self.capacity:
+                self.cond.wait()
+            heapq.heappush(self.heap, (lane, job.get('order', 0), next(self.sequence), job))
+            if lane:
+                self.batch += 1
+            self.cond.notify_all()
+
+    def get(self, max_lane=1):
+        """Take the most urgent job, waiting for one in a lane up to max_lane"""
+        with self.cond:
+            while not self.heap or self.heap[0][0] > max_lane:
+                self.cond.wait()
+            lane, _, _, job = heapq.heappop(self.heap)
+            if lane:
+                self.batch -= 1
+            self.cond.notify_all()
+            return job
+
+    def qsize(self):
+        with self.cond:
+            return len(self.heap)
+
+class StagedPipeline:
+    """Runs jobs through a chain of stages, each with its own workers, linked by bounded queues"""
+
+    def __init__(self, stages, on_idle=None, section=None):
+        # stages: (name, handler, workers, capacity); a handler returns True to pass the job on.
+        # Each stage also has an express worker that only takes interactive (lane 0) jobs,
+        # so a single song never waits behind a busy batch.
+        self.stages = [{'name': name, 'handler': handler, 'workers': workers,
+                        'queue': LaneQueue(capacity), 'busy': 0.0, 'jobs': 0}
+                       for name, handler, workers, capacity in stages]
+        self.on_idle = on_idle
+        self.section = section or (lambda name: nullcontext())  # wraps each handler call, e.g. for profiling
+        self.lock = threading.Lock()
+        self.idle = threading.Event()  # set once the last job of a run has been reported
+        self.idle.set()
+        self.outstanding = 0
+        self.run_start = None
+        self.started = False
+
+    def start(self):
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+        for index, stage in enumerate(self.stages):
+            for number in range(stage['workers']):
+                threading.Thread(target=self.worker, args=(index,), name=f"{stage['name']}-{number}", daemon=True).start()
+            threading.Thread(target=self.worker, args=(index, 0), name=f"{stage['name']}-express", daemon=True).start()
+
+    def submit(self, job, first_stage=0):
+        """Queue a job at the given stage; a resumed job continues where it parked"""
+        with self.lock:
+            if self.outstanding == 0:
+                # A new run: utilization is measured from here until the pipeline drains
+                self.run_start = time.perf_counter()
+                for stage in self.stages:
+                    stage['busy'] = 0.0
+                    stage['jobs'] = 0
+                self.idle.clear()
+            self.outstanding += 1
+        self.start()
+        self.stages[first_stage]['queue'].put(job)
+
+    def worker(self, index, max_lane=1):
+        stage = self.stages[index]
+        while True:
+            job = stage['queue'].get(max_lane)
+            start = time.perf_counter()
+            try:
+                with self.section(stage['name']):
+                    forward = stage['handler'](job)
+            except Exception as e:
+                print(f"Pipeline stage {stage['name']} failed: {e}")
+                forward = False
+            with self.lock:
+                stage['busy'] += time.perf_counter() - start
+                stage['jobs'] += 1
+            if forward and index + 1 < len(self.stages):
+                # Blocks while the next stage is backed up, which holds this stage back too
+                self.stages[index + 1]['queue'].put(job)
             else:
-                logo_path = "logo.png"
-            if os.path.exists(logo_path):
-                image = Image.open(logo_path)
-                image = image.resize((200, 70), Image.LANCZOS)
-                self.cached_logo = ImageTk.PhotoImage(image)
+                self.job_finished()
+
+    def job_finished(self):
+        with self.lock:
+            self.outstanding -= 1
+            idle = self.outstanding == 0
+        if idle:
+            if self.on_idle:
+                self.on_idle(self.stats())
+            self.idle.set()
+
+    def stats(self):
+        """Per-stage workers, finished jobs, busy seconds and utilization since the run started"""
+        elapsed = max(time.perf_counter() - (self.run_start or time.perf_counter()), 1e-9)
+        # Busy time counts the express worker too, but it idles unless someone is waiting on a song
+        return {stage['name']: {'workers': stage['workers'],
+                                'jobs': stage['jobs'],
+                                'busy': round(stage['busy'], 3),
+                                'utilization': round(min(stage['busy'] / (elapsed * stage['workers']), 1.0), 3),
+                                'queued': stage['queue'].qsize()}
+                for stage in self.stages}
+
+class ManifestPrefetcher:
+    """Resolves song manifests in the background and keeps them in a bounded LRU cache with a TTL"""
+
+    TTL = 600  # seconds a resolved manifest is trusted
+    MAX_PENDING = 4  # older selections that have not started yet are dropped past this
+    MAX_ENTRIES = 64
+
+    def __init__(self, resolve, tracer=None, max_workers=2):
+        from collections import OrderedDict
+        self.resolve = resolve
+        self.tracer = tracer
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # sid -> (created, future), least recently used first
+        self.executor = None
+
+    def fresh(self, entry):
+        if entry is None or entry[1].cancelled() or time.monotonic() - entry[0] >= self.TTL:
+            return False
+        return not (entry[1].done() and entry[1].exception() is not None)
+
+    def prefetch(self, song):
+        """Start resolving a song's manifest unless it is cached or already in flight"""
+        sid = song.get('sid')
+        if not sid:
+            return
+        with self.lock:
+            if self.fresh(self.entries.get(sid)):
+                return
+            if self.executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch")
+            # Skimming through the list should not leave a backlog of stale requests
+            pending = [key for key, (_, future) in self.entries.items() if not future.running() and not future.done()]
+            for key in pending[:max(0, len(pending) - self.MAX_PENDING + 1)]:
+                self.entries.pop(key)[1].cancel()
+            self.store(sid, self.executor.submit(self.run, song))
+
+    def store(self, sid, future):
+        """Insert as most recently used, evicting the least recently used entries; call with the lock held"""
+        self.entries.pop(sid, None)
+        while len(self.entries) >= self.MAX_ENTRIES:
+            self.entries.popitem(last=False)
+        self.entries[sid] = (time.monotonic(), future)
+
+    def run(self, song):
+        if self.tracer is not None:
+            self.tracer.begin_job(f"prefetch:{song['sid']}", sid=song['sid'], title=song.get('title'))
+        status = "failed"
+        try:
+            manifest = self.resolve(song)
+            status = "prefetched"
+            return manifest
+        finally:
+            if self.tracer is not None:
+                self.tracer.end_job(status, publish=False)
+
+    def get(self, song):
+        """Manifest for song from the cache, an in-flight prefetch, or resolved on the calling thread"""
+        from concurrent.futures import Future
+        sid = song['sid']
+        with self.lock:
+            entry = self.entries.get(sid)
+            if self.fresh(entry):
+                self.entries.move_to_end(sid)
             else:
-                self.cached_logo = None
-        except Exception:
-            self.cached_logo = None
+                entry = None
+        if entry is not None:
+            try:
+                return entry[1].result()
+            except Exception as e:
+                # Resolve again below so the error is raised on the job's own thread
+                print(f"Prefetch failed for {sid}: {e}")
+        manifest = self.resolve(song)
+        if manifest is not None:
+            future = Future()
+            future.set_result(manifest)
+            with self.lock:
+                self.store(sid, future)
+        return manifest
+
+class ExtractionPipeline:
+    """Download and stem-extraction pipeline shared by the GUI and headless runs"""
+
+    # Festival masters are 10-channel audio: five stereo stems on channels (0,1), (2,3) ... (8,9)
+    STEMS = ["Drums", "Bass", "Lead", "Vocals", "Other"]
+    OUTPUT_CODECS = {"wav": [], "flac": [], "mp3": ["-b:a", "320k"]}
+    STAGE_NAMES = ["fetch", "extract"]  # pipeline stages by index, as built in submit_to_pipeline
+
+    def __init__(self, settings_file="settings.json", profile=False):
+        self.settings_file = settings_file
+
+        # Add queue for thread communication
+        self.download_queue_thread = WakingQueue()
+
+        # Progress/status updates are coalesced here and drawn at a fixed frame rate
+        self.progress_channel = ProgressAggregator()
+        self.job_context = threading.local()
+        self.ffmpeg_ready = False
+
+        settings = self.load_settings()
+        self.settings = settings
+        self.extract_folder = settings.get("extract_folder", os.getcwd())
+        self.auto_open_folder = settings.get("auto_open_folder", False)
+        self.file_format = settings.get("file_format", "wav")
+        self.extracting_method = settings.get("extracting_method", "Stereo")
+        self.file_naming = settings.get("file_naming", "Only Stem Type")
+        self.selected_stems = [stem for stem in self.STEMS if stem in settings.get("stems", self.STEMS)]
+        self.extra_formats = settings.get("extra_formats", [])
+        self.silent_stems = settings.get("silent_stems", "Keep")
+        self.silence_threshold_db = settings.get("silence_threshold_db", -60.0)
+        self.skip_existing = settings.get("skip_existing", True)
+        self.fetch_workers = settings.get("fetch_workers", 4)
+        self.extract_workers = settings.get("extract_workers", 1)
+        self.shortest_first = settings.get("shortest_first", False)
+        self.bandwidth_limit = settings.get("bandwidth_limit", 0)  # Mbit/s, 0 for no cap
+        self.probe_timeout = settings.get("probe_timeout", 0)  # seconds per segment-count probe, 0 to follow latency
+        self.probe_attempts = max(1, settings.get("probe_attempts", 3))
+        self.trace_enabled = settings.get("trace_enabled", False)
+        self.profiling_enabled = settings.get("profiling_enabled", False)
+        # --profile turns profiling on for one session without changing the saved setting
+        self.profiler = RunProfiler() if self.profiling_enabled or profile else None
+
+        # Per-stage instrumentation, written as JSON lines to trace.jsonl in the data folder
+        self.tracer = PipelineTracer(os.path.join(self.data_folder(), "trace.jsonl") if self.trace_enabled else None,
+                                     on_job_complete=self.publish_trace_summary)
+        self._http = None
+        self._http_lock = threading.Lock()
+        self.ffmpeg = FFmpegService(tracer=self.tracer)
+        self.library = LibraryIndex("library.sqlite")
+        # Segment requests and concurrent songs follow the link instead of fixed constants
+        self.transfer = AdaptiveConcurrency()
+        self.segments = SegmentFetcher(lambda: self.http, self.transfer)
+        self.set_bandwidth_limit(self.bandwidth_limit)
+        self.prefetcher = ManifestPrefetcher(self.resolve_manifest, tracer=self.tracer)
+        self.failure_ledger = FailureLedger(tracer=self.tracer)
+        self.pipeline = None
+
+    @staticmethod
+    def data_folder():
+        """Per-user folder for logs and diagnostics, kept out of the working directory"""
+        system = platform.system()
+        if system == "Windows":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            return os.path.join(base, "FestivalExtractor")
+        elif system == "Darwin":
+            return os.path.expanduser("~/Library/Application Support/FestivalExtractor")
+        base = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+        return os.path.join(base, "festival-extractor")
+
+    @property
+    def http(self):
+        """Shared HTTP session, created on first use"""
+        if self._http is None:
+            with self._http_lock:
+                if self._http is None:
+                    import requests
+                    session = requests.Session()
+                    # Room for every admitted segment request plus its hedge
+                    adapter = requests.adapters.HTTPAdapter(pool_maxsize=2 * AdaptiveConcurrency.MAX_LIMIT)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.hooks['response'].append(self.tracer.response_hook)
+                    self._http = session
+        return self._http
 
     def setup_ffmpeg(self):
         """Setup FFmpeg in background thread"""
@@ -413,13 +2335,17 @@ class FortniteTracksGUI:
     def setup_ffmpeg_worker(self):
         """Background worker to setup FFmpeg"""
         try:
+            self.prune_work_folders()
             self.ffmpeg_path = self.get_or_download_ffmpeg()
+            self.ffmpeg.ffmpeg_path = self.ffmpeg_path
             self.ffmpeg_ready = True
             self.update_status("All set! Pick songs and add to queue 🎵")
             self.update_progress(0)
         except Exception as e:
             self.show_error(f"FFmpeg setup failed: {str(e)}")
             self.ffmpeg_ready = False
+        finally:
+            self.progress_channel.finish('setup')
 
     def get_or_download_ffmpeg(self):
         """Get FFmpeg path or download if needed"""
@@ -439,449 +2365,92 @@ class FortniteTracksGUI:
         else:
             ffmpeg_exe = os.path.join(ffmpeg_dir, "ffmpeg")
         
-        # Check if FFmpeg already exists
+        # Check if FFmpeg already exists next to the program
         if os.path.exists(ffmpeg_exe):
             return ffmpeg_exe
-        
+
+        # Then the per-user cache shared by every install
+        provisioner = FFmpegProvisioner(self.http, on_status=self.update_status,
+                                        on_progress=self.update_progress,
+                                        on_bytes=self.progress_channel.add_bytes)
+        url = self.ffmpeg_download_url()
+        cached = provisioner.cached_binary(url)
+        if cached:
+            return cached
+
         # Download FFmpeg
         self.update_status("First time setup - downloading tools...")
-        return self.download_ffmpeg_for_platform(ffmpeg_dir)
+        return provisioner.install(url)
 
-    def download_ffmpeg_for_platform(self, ffmpeg_dir):
-        """Download FFmpeg for the current platform"""
+    def ffmpeg_download_url(self):
+        """Static FFmpeg build for the current platform"""
         system = platform.system()
         machine = platform.machine().lower()
         
-        # Create directory
-        os.makedirs(ffmpeg_dir, exist_ok=True)
-        
         if system == "Windows":
             if "64" in machine or "amd64" in machine or "x86_64" in machine:
-                url = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
+                return "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
             else:
                 # Fallback for 32-bit (rare these days)
-                url = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
-            
-            return self.download_and_extract_windows(url, ffmpeg_dir)
+                return "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
             
         elif system == "Darwin":  # macOS
             # Use homebrew static builds
-            url = "https://evermeet.cx/ffmpeg/ffmpeg-6.0.zip"
-            return self.download_and_extract_macos(url, ffmpeg_dir)
+            return "https://evermeet.cx/ffmpeg/ffmpeg-6.0.zip"
             
         else:  # Linux
             if "64" in machine or "amd64" in machine or "x86_64" in machine:
-                url = "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz"
+                return "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz"
             else:
-                url = "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-arm64-static.tar.xz"
-            
-            return self.download_and_extract_linux(url, ffmpeg_dir)
-
-    def download_and_extract_windows(self, url, ffmpeg_dir):
-        """Download and extract FFmpeg for Windows"""
-        self.update_status("Downloading audio processor...")
-        self.update_progress(5)
-        
-        # Download
-        zip_path = os.path.join(ffmpeg_dir, "ffmpeg.zip")
-        self.download_with_progress(url, zip_path, 5, 70)
-        
-        self.update_status("Setting up audio processor...")
-        self.update_progress(75)
-        
-        # Extract
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            for file_info in zip_ref.infolist():
-                if file_info.filename.endswith('ffmpeg.exe'):
-                    # Extract just the ffmpeg.exe
-                    with zip_ref.open(file_info) as source:
-                        ffmpeg_path = os.path.join(ffmpeg_dir, "ffmpeg.exe")
-                        with open(ffmpeg_path, 'wb') as target:
-                            shutil.copyfileobj(source, target)
-                    break
-        
-        os.remove(zip_path)
-        self.update_progress(100)
-        return ffmpeg_path
+                return "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-arm64-static.tar.xz"
 
-    def download_and_extract_macos(self, url, ffmpeg_dir):
-        """Download and extract FFmpeg for macOS"""
-        self.update_status("Downloading audio processor...")
-        self.update_progress(5)
-        
-        # Download
-        zip_path = os.path.join(ffmpeg_dir, "ffmpeg.zip")
-        self.download_with_progress(url, zip_path, 5, 70)
-        
-        self.update_status("Setting up audio processor...")
-        self.update_progress(75)
-        
-        # Extract
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(ffmpeg_dir)
-        
-        ffmpeg_path = os.path.join(ffmpeg_dir, "ffmpeg")
-        os.chmod(ffmpeg_path, stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
-        
-        os.remove(zip_path)
-        self.update_progress(100)
-        return ffmpeg_path
-
-    def download_and_extract_linux(self, url, ffmpeg_dir):
-        """Download and extract FFmpeg for Linux"""
-        self.update_status("Downloading audio processor...")
-        self.update_progress(5)
-        
-        # Download
-        tar_path = os.path.join(ffmpeg_dir, "ffmpeg.tar.xz")
-        self.download_with_progress(url, tar_path, 5, 70)
-        
-        self.update_status("Setting up audio processor...")
-        self.update_progress(75)
-        
-        # Extract
-        with tarfile.open(tar_path, 'r:xz') as tar_ref:
-            for member in tar_ref.getmembers():
-                if member.name.endswith('ffmpeg') and not '/' in member.name.split('/')[-1]:
-                    # Extract the ffmpeg binary
-                    member.name = "ffmpeg"  # Rename to just ffmpeg
-                    tar_ref.extract(member, ffmpeg_dir)
-                    break
-        
-        ffmpeg_path = os.path.join(ffmpeg_dir, "ffmpeg")
-        os.chmod(ffmpeg_path, stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
-        
-        os.remove(tar_path)
-        self.update_progress(100)
-        return ffmpeg_path
-
-    def is_epic_games_song(self, artist):
-        """Check if song is made by Epic Games"""
-        # Clean the artist name and check for exact match
-        clean_artist = re.sub(r'[^\w\s]', '', artist.strip().lower())
-        clean_artist = re.sub(r'\s+', ' ', clean_artist).strip()
-        
-        # Only block previews for songs where the artist is literally "Epic Games"
-        epic_variants = [
-            "epic games",
-            "epicgames"
-        ]
-        
-        return clean_artist in epic_variants
-
-    def delete_all_wav_files(self):
-        """Delete all WAV files with 'temp' in the name when program closes"""
-        try:
-            import glob
-            
-            # Stop any playing audio first
-            if hasattr(self, 'preview_system'):
-                self.preview_system.stop()
-            
-            # Wait for pygame to release files
-            time.sleep(1)
-            
-            # Find and delete only WAV files with 'temp' in their name
-            wav_files = glob.glob("*temp*.wav")
-            deleted_count = 0
-            
-            for wav_file in wav_files:
-                try:
-                    if os.path.exists(wav_file):
-                        os.remove(wav_file)
-                        deleted_count += 1
-                        print(f"Deleted: {wav_file}")
-                except Exception as e:
-                    print(f"Could not delete {wav_file}: {e}")
-            
-            if deleted_count > 0:
-                print(f"Deleted {deleted_count} temporary WAV files")
-            
-        except Exception as e:
-            print(f"Error deleting temporary WAV files: {e}")
-
-    def on_closing(self):
-        """Handle app closing - delete all WAV files"""
-        print("Closing application and deleting WAV files...")
-        
-        # Delete all WAV files
-        self.delete_all_wav_files()
-        
-        # Close the application
-        self.root.destroy()
-
-    def play_song_preview(self, song):
-        """Play 30-second preview of the song"""
-        if hasattr(self, 'preview_button'):
-            self.preview_button.config(state="disabled")
-        try:
-            if hasattr(self, 'preview_status'):
-                self.preview_status.config(text="Searching for preview...")
-            
-            # Search for preview in a background thread
-            def search_and_play():
-                preview_url = self.preview_system.search_preview_ultimate(song['artist'], song['title'])
-                
-                if preview_url:
-                    # Update UI in main thread
-                    self.root.after(0, lambda: self.start_preview_playback(preview_url))
-                else:
-                    self.root.after(0, lambda: self.preview_not_found())
-            
-            threading.Thread(target=search_and_play, daemon=True).start()
-            
-        except Exception as e:
-            if hasattr(self, 'preview_status'):
-                self.preview_status.config(text="Preview error")
-            if hasattr(self, 'preview_button'):
-                self.preview_button.config(text="▶ Play Preview", state="normal")
-            print(f"Preview error: {e}")
-
-    def start_preview_playback(self, preview_url):
-        """Start playing the preview"""
-        try:
-            self.preview_system.play_preview(preview_url)
-            if hasattr(self, 'preview_status'):
-                self.preview_status.config(text="Playing 30s preview...")
-            if hasattr(self, 'preview_button'):
-                self.preview_button.config(text="⏹ Stop Preview", state="normal")
-            
-            # Cancel any existing auto-stop timer
-            if hasattr(self, 'auto_stop_timer'):
-                try:
-                    self.auto_stop_timer.cancel()
-                except:
-                    pass
-            
-            # Auto-stop after 30 seconds
-            def auto_stop_check():
-                self.stop_preview()
-
-            self.auto_stop_timer = threading.Timer(30.0, auto_stop_check)
-            self.auto_stop_timer.daemon = True
-            self.auto_stop_timer.start()
-            
-        except Exception as e:
-            if hasattr(self, 'preview_status'):
-                self.preview_status.config(text="Playback failed")
-            if hasattr(self, 'preview_button'):
-                self.preview_button.config(text="▶ Play Preview", state="normal")
-            print(f"Playback error: {e}")
-
-    def stop_preview(self):
-        """Stop preview playback"""
-        # Cancel auto-stop timer
-        if hasattr(self, 'auto_stop_timer'):
-            try:
-                self.auto_stop_timer.cancel()
-            except:
-                pass
-        
-        self.preview_system.stop()
-        if hasattr(self, 'preview_status'):
-            self.preview_status.config(text="")
-        if hasattr(self, 'preview_button'):
-            self.preview_button.config(text="▶ Play Preview", state="normal")
-
-    def toggle_preview(self, song):
-        """Toggle preview playback"""
-        if self.preview_system.is_playing_status():
-            # Currently playing, so stop
-            self.stop_preview()
-        else:
-            # Not playing, so start
-            self.play_song_preview(song)
-
-    def preview_not_found(self):
-        """Handle when no preview is found"""
-        if hasattr(self, 'preview_status'):
-            self.preview_status.config(text="No preview available")
-        if hasattr(self, 'preview_button'):
-            self.preview_button.config(text="▶ Play Preview", state="normal")
-
-    def download_with_progress(self, url, output_path, start_progress, end_progress):
-        """Download file with progress updates"""
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded_size = 0
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                downloaded_size += len(chunk)
-                if total_size > 0:
-                    progress = start_progress + int((downloaded_size / total_size) * (end_progress - start_progress))
-                    self.update_progress(progress)
-
-    def check_download_queue(self):
-        """Check for messages from download thread"""
-        try:
-            while True:
-                message = self.download_queue_thread.get_nowait()
-                if message['type'] == 'progress':
-                    self.progress["value"] = message['value']
-                elif message['type'] == 'status':
-                    self.status_label.config(text=message['text'])
-                elif message['type'] == 'error':
-                    messagebox.showerror("Error", message['text'])
-                    self.downloading = False
-                elif message['type'] == 'success':
-                    messagebox.showinfo("Success", message['text'])
-                    self.downloading = False
-                elif message['type'] == 'done':
-                    self.downloading = False
-                elif message['type'] == 'next_song':
-                    self.current_download_index += 1
-                    if self.current_download_index < len(self.song_queue):
-                        self.download_next_in_queue()
-                    else:
-                        self.queue_download_complete()
-                self.root.update_idletasks()
-        except queue.Empty:
-            pass
-        
-        # Schedule next check
-        self.root.after(100, self.check_download_queue)
+    def current_job_id(self):
+        """Job the calling thread is working on ('setup' outside of downloads)"""
+        return getattr(self.job_context, 'job_id', 'setup')
 
     def update_progress(self, value):
         """Thread-safe progress update"""
-        self.download_queue_thread.put({'type': 'progress', 'value': value})
+        self.progress_channel.update(self.current_job_id(), progress=value)
 
     def update_status(self, text):
         """Thread-safe status update"""
-        self.download_queue_thread.put({'type': 'status', 'text': text})
+        self.progress_channel.update(self.current_job_id(), status=text)
+
+    def publish_trace_summary(self, record):
+        """Thread-safe timing summary update"""
+        self.download_queue_thread.put({'type': 'trace_summary', 'text': self.tracer.summary_text(record)})
 
     def show_error(self, text):
-        """Thread-safe error display"""
+        """Thread-safe error display; errors of queued songs go to the failure ledger instead of a dialog"""
+        job = getattr(self.job_context, 'job', None)
+        if job is not None and job['queue']:
+            print(f"Error ({job['song']['title']}): {text}")
+            job['error'] = {'stage': self.tracer.failed_stage() or self.STAGE_NAMES[job['stage']],
+                            'cause': text}
+            return
         self.download_queue_thread.put({'type': 'error', 'text': text})
 
     def show_success(self, text):
         """Thread-safe success display"""
         self.download_queue_thread.put({'type': 'success', 'text': text})
 
-    def download_complete(self):
+    def download_complete(self, song=None, status="done"):
         """Signal download completion"""
-        self.download_queue_thread.put({'type': 'done'})
-
-    def next_song_signal(self):
-        """Signal to move to next song in queue"""
-        self.download_queue_thread.put({'type': 'next_song'})
-
-    def add_to_queue(self, song):
-        """Add song to download queue"""
-        # Check if song is already in queue
-        for queued_song in self.song_queue:
-            if queued_song['sid'] == song['sid']:
-                messagebox.showinfo("Already in Queue", f"{song['title']} is already in the download queue.")
-                return
-        
-        self.song_queue.append(song)
-        self.update_queue_display()
-        self.update_song_info_display()  # Refresh to update button state
-
-    def check_easter_egg(self, query):
-        """Check for easter egg and handle it"""
-        if query == "letmedownloadallthesongs":
-            result = messagebox.askyesno("Easter Egg Found!", 
-                                    "Are you sure you want to add all of the songs into your queue list?")
-            if result:
-                # Add all songs to queue (not just filtered ones)
-                added_count = 0
-                for song in self.songs:  # Changed from self.filtered_songs to self.songs
-                    if not self.is_song_in_queue(song):
-                        self.song_queue.append(song)
-                        added_count += 1
-                
-                self.update_queue_display()
-                self.update_song_info_display()
-                messagebox.showinfo("Songs Added", f"Added {added_count} songs to the queue!")
-            return True
-        return False
-
-    def remove_selected_from_queue(self):
-        """Remove selected song from queue"""
-        selection = self.queue_listbox.curselection()
-        if selection:
-            index = selection[0]
-            removed_song = self.song_queue.pop(index)
-            self.update_queue_display()
-            self.update_song_info_display()  # Refresh to update button state
-            messagebox.showinfo("Removed", f"Removed {removed_song['title']} from queue.")
-
-    def clear_queue(self):
-        """Clear all songs from queue"""
-        if self.song_queue:
-            if messagebox.askyesno("Clear Queue", "Are you sure you want to clear the entire queue?"):
-                self.song_queue.clear()
-                self.update_queue_display()
-                self.update_song_info_display()  # Refresh to update button state
-
-    def update_queue_display(self):
-        """Update the queue listbox display"""
-        self.queue_listbox.delete(0, tk.END)
-        for i, song in enumerate(self.song_queue):
-            display_text = f"{i+1}. {song['artist']} - {song['title']}"
-            if self.downloading and i == self.current_download_index:
-                display_text += " (Downloading...)"
-            self.queue_listbox.insert(tk.END, display_text)
-
-    def on_queue_select(self, event=None):
-        """Handle queue selection - switch to song info tab and show selected song"""
-        selection = self.queue_listbox.curselection()
-        if selection:
-            index = selection[0]
-            if index < len(self.song_queue):
-                selected_song = self.song_queue[index]
-                
-                # Switch to Song Info tab
-                self.notebook.select(0)  # Select first tab (Song Info)
-                
-                # Display the song info
-                self.display_song_info(selected_song)
-
-    def download_all_queue(self):
-        """Start downloading all songs in queue"""
-        if not self.song_queue:
-            messagebox.showwarning("Empty Queue", "No songs in queue to download.")
-            return
-            
-        if self.downloading:
-            messagebox.showwarning("Download in Progress", "A download is already in progress. Please wait for it to complete.")
-            return
-        
-        if not self.ffmpeg_ready:
-            messagebox.showwarning("FFmpeg is Not Ready", "Still setting up tools. Please wait a moment and try again.")
-            return
-        
-        self.downloading = True
-        self.current_download_index = 0
-        self.update_queue_display()
-        self.download_next_in_queue()
+        self.download_queue_thread.put({'type': 'done', 'key': DownloadQueue.key(song) if song else None,
+                                        'status': status})
 
-    def download_next_in_queue(self):
-        """Download the next song in queue"""
-        if self.current_download_index < len(self.song_queue):
-            song = self.song_queue[self.current_download_index]
-            self.update_queue_display()  # Update to show current downloading
-            download_thread = threading.Thread(target=self.download_song_thread, args=(song, True), daemon=True)
-            download_thread.start()
+    def job_parked_signal(self, job):
+        """Signal that a paused job has stopped and holds no worker"""
+        self.progress_channel.park(job['job_id'])
+        self.download_queue_thread.put({'type': 'job_parked', 'key': DownloadQueue.key(job['song'])})
 
-    def queue_download_complete(self):
-        """Handle completion of entire queue download"""
-        self.downloading = False
-        self.current_download_index = 0
-        self.song_queue.clear()  # Clear queue after successful download
-        self.update_queue_display()
-        self.update_song_info_display()
-        self.show_success(f"Queue download completed! All songs have been extracted.")
+    def next_song_signal(self, song, status):
+        """Signal to move to next song in queue, reporting how this one ended"""
+        self.download_queue_thread.put({'type': 'next_song', 'key': DownloadQueue.key(song), 'status': status})
 
-    def decompress_blurl(self, filepath):
-        with open(filepath, 'rb') as f:
-            f.seek(8)
-            decompressed = zlib.decompress(f.read())
-            return json.loads(decompressed)
+    def decompress_blurl(self, data):
+        """Decode a blurl playlist: an 8-byte header followed by zlib-compressed JSON"""
+        return json.loads(zlib.decompress(memoryview(data)[8:]))
 
     def parse_envelope(self, ev_b64):
         b = base64.b64decode(ev_b64)
@@ -893,6 +2462,7 @@ class FortniteTracksGUI:
         return nonce, key
 
     def aes_decrypt(self, key, data):
+        from Crypto.Cipher import AES
         cipher = AES.new(key, AES.MODE_ECB)
         if len(data) % 16 != 0:
             raise Exception("Ciphertext not multiple of block size")
@@ -922,14 +2492,19 @@ class FortniteTracksGUI:
                 offset += 0x34
         return None
 
-    def download_file(self, url, out_path):
-        r = requests.get(url, stream=True)
-        r.raise_for_status()
-        with open(out_path, 'wb') as f:
-            for chunk in r.iter_content(8192):
-                f.write(chunk)
+    def fetch_segment(self, bases, path, span):
+        """Fetch one segment through the mirror-aware fetcher and attribute its counters to the span"""
+        return self.count_segment(span, *self.segments.fetch(bases, path))
+
+    def count_segment(self, span, data, stats):
+        """Attribute a fetched segment's counters to the span open on this thread"""
+        self.tracer.record(bytes=len(data), requests=stats['requests'], retries=stats['failures'])
+        span['hedged'] += stats['hedged']
+        self.progress_channel.add_bytes(len(data))
+        return data
 
     def parse_mpd(self, mpd_xml):
+        import xml.etree.ElementTree as ET
         root = ET.fromstring(mpd_xml)
         ns = {'mpd': 'urn:mpeg:dash:schema:mpd:2011'}
         for period in root.findall('mpd:Period', ns):
@@ -964,6 +2539,31 @@ class FortniteTracksGUI:
             return estimated_count
         return 100  # Keep reasonable fallback
 
+    # Segment probes only decide how long the song is, so a slow answer must never read as "no segment"
+    ABSENT_STATUSES = (403, 404, 410)
+
+    def segment_exists(self, base_url, seg_info, count):
+        """HEAD the count-th segment: True if it exists, False only when the server says it does not"""
+        import requests
+        test_seg_num = seg_info['start_number'] + count - 1
+        test_url = base_url + seg_info['media'].replace('$Number$', str(test_seg_num))
+        # probe_timeout 0 follows the host's measured latency; each retry doubles the wait
+        timeout = self.probe_timeout or self.segments.request_timeout(test_url)
+        for attempt in range(self.probe_attempts):
+            try:
+                test_response = self.http.head(test_url, timeout=timeout * 2 ** attempt)
+                if test_response.status_code == 200:
+                    return True
+                if test_response.status_code in self.ABSENT_STATUSES:
+                    return False
+                problem = f"HTTP {test_response.status_code}"
+            except requests.exceptions.RequestException as e:
+                problem = str(e)
+            print(f"Probe of segment {test_seg_num} failed ({problem}), attempt {attempt + 1}/{self.probe_attempts}")
+            if attempt < self.probe_attempts - 1:
+                time.sleep(0.5 * (attempt + 1))
+        raise Exception(f"Could not determine whether segment {test_seg_num} exists: {problem}")
+
     def find_actual_segment_count(self, base_url, seg_info, mpd_xml):
         print("Finding actual segment count...")
         
@@ -988,19 +2588,12 @@ class FortniteTracksGUI:
         
         # First, verify our starting point (the estimate) actually works
         test_seg_num = seg_info['start_number'] + current - 1
-        test_url = base_url + seg_info['media'].replace('$Number$', str(test_seg_num))
-        
-        try:
-            test_response = requests.head(test_url, timeout=4)
-            if test_response.status_code == 200:
-                last_valid = current
-                print(f"Estimate segment {test_seg_num} exists")
-            else:
-                print(f"Estimate segment {test_seg_num} doesn't exist, searching backwards first...")
-                # If estimate doesn't work, binary search downward
-                return self.binary_search_segments(base_url, seg_info, 1, estimated_count - 1)
-        except:
-            print(f"Failed to check estimate segment, searching backwards...")
+        if self.segment_exists(base_url, seg_info, current):
+            last_valid = current
+            print(f"Estimate segment {test_seg_num} exists")
+        else:
+            print(f"Estimate segment {test_seg_num} doesn't exist, searching backwards first...")
+            # If estimate doesn't work, binary search downward
             return self.binary_search_segments(base_url, seg_info, 1, estimated_count - 1)
         
         # Step 2: Exponential search upward to find where segments stop existing
@@ -1010,19 +2603,13 @@ class FortniteTracksGUI:
         while checks_done < max_checks:
             current += step_size
             test_seg_num = seg_info['start_number'] + current - 1
-            test_url = base_url + seg_info['media'].replace('$Number$', str(test_seg_num))
             
-            try:
-                test_response = requests.head(test_url, timeout=3)
-                if test_response.status_code == 200:
-                    last_valid = current
-                    print(f"Segment {test_seg_num} exists, expanding search...")
-                    step_size = min(step_size * 2, 50)  # Exponentially increase step, but cap at 50
-                else:
-                    print(f"Segment {test_seg_num} doesn't exist, found upper bound around {current}")
-                    break
-            except:
-                print(f"Failed to check segment {test_seg_num}, found upper bound around {current}")
+            if self.segment_exists(base_url, seg_info, current):
+                last_valid = current
+                print(f"Segment {test_seg_num} exists, expanding search...")
+                step_size = min(step_size * 2, 50)  # Exponentially increase step, but cap at 50
+            else:
+                print(f"Segment {test_seg_num} doesn't exist, found upper bound around {current}")
                 break
                 
             checks_done += 1
@@ -1045,36 +2632,22 @@ class FortniteTracksGUI:
         """Verify the found count and check a few more segments just to be sure"""
         
         # Check the found segment exists
-        test_seg_num = seg_info['start_number'] + found_count - 1
-        test_url = base_url + seg_info['media'].replace('$Number$', str(test_seg_num))
-        
-        try:
-            test_response = requests.head(test_url, timeout=4)
-            if test_response.status_code != 200:
-                print(f"Warning: Found count {found_count} segment doesn't exist!")
-                return found_count - 1
-        except:
-            print(f"Warning: Cannot verify found count {found_count}")
+        if not self.segment_exists(base_url, seg_info, found_count):
+            print(f"Warning: Found count {found_count} segment doesn't exist!")
             return found_count - 1
         
         # Check 5 more segments beyond our found count to be absolutely sure
         for extra in range(1, 6):
-            test_seg_num = seg_info['start_number'] + found_count + extra - 1
-            test_url = base_url + seg_info['media'].replace('$Number$', str(test_seg_num))
-            
-            try:
-                test_response = requests.head(test_url, timeout=3)
-                if test_response.status_code == 200:
-                    found_count += 1
-                    print(f"Found additional segment {test_seg_num}, new count: {found_count}")
-                else:
-                    break
-            except:
+            if self.segment_exists(base_url, seg_info, found_count + 1):
+                found_count += 1
+                test_seg_num = seg_info['start_number'] + found_count - 1
+                print(f"Found additional segment {test_seg_num}, new count: {found_count}")
+            else:
                 break
         
         print(f"Final verified segment count: {found_count}")
         return found_count
-    
+
     def aggressive_search_from_high(self, base_url, seg_info, start_estimate):
         """Start from a high estimate and work backwards to find the true end"""
         print(f"Starting aggressive search from segment {start_estimate}")
@@ -1083,55 +2656,35 @@ class FortniteTracksGUI:
         upper_bound = start_estimate
         while upper_bound < start_estimate + 100:  # Limit to prevent infinite searching
             test_seg_num = seg_info['start_number'] + upper_bound - 1
-            test_url = base_url + seg_info['media'].replace('$Number$', str(test_seg_num))
             
-            try:
-                test_response = requests.head(test_url, timeout=4)
-                if test_response.status_code == 200:
-                    print(f"Segment {test_seg_num} exists, expanding search...")
-                    upper_bound += 20  # Jump by larger chunks
-                else:
-                    print(f"Found upper bound at segment {upper_bound}")
-                    break
-            except:
+            if self.segment_exists(base_url, seg_info, upper_bound):
+                print(f"Segment {test_seg_num} exists, expanding search...")
+                upper_bound += 20  # Jump by larger chunks
+            else:
                 print(f"Found upper bound at segment {upper_bound}")
                 break
         
         # Now binary search between start_estimate and upper_bound
         return self.binary_search_segments(base_url, seg_info, start_estimate, upper_bound)
-    
+
     def standard_segment_search(self, base_url, seg_info, estimated_count):
         """Standard search for songs under 3:58"""
         test_seg_num = seg_info['start_number'] + estimated_count - 1
-        test_url = base_url + seg_info['media'].replace('$Number$', str(test_seg_num))
         
-        try:
-            test_response = requests.head(test_url, timeout=5)
-            if test_response.status_code == 200:
-                # Estimate was correct or too low, check a few more
-                print(f"Segment {test_seg_num} exists, checking for additional segments...")
-                for extra in range(1, 21):  # Check up to 20 more
-                    test_url = base_url + seg_info['media'].replace('$Number$', str(test_seg_num + extra))
-                    try:
-                        test_response = requests.head(test_url, timeout=3)
-                        if test_response.status_code != 200:
-                            final_count = estimated_count + extra - 1
-                            print(f"Found actual segment count: {final_count}")
-                            return final_count
-                    except:
-                        final_count = estimated_count + extra - 1
-                        print(f"Found actual segment count: {final_count}")
-                        return final_count
-                # If all 20 extra segments exist, there might be more
-                return estimated_count + 20
-            else:
-                # Estimate was too high, binary search downward
-                print(f"Segment {test_seg_num} doesn't exist, searching backwards...")
-                return self.binary_search_segments(base_url, seg_info, 1, estimated_count)
-                
-        except Exception as e:
-            print(f"Error testing segments: {e}")
-            return estimated_count
+        if self.segment_exists(base_url, seg_info, estimated_count):
+            # Estimate was correct or too low, check a few more
+            print(f"Segment {test_seg_num} exists, checking for additional segments...")
+            for extra in range(1, 21):  # Check up to 20 more
+                if not self.segment_exists(base_url, seg_info, estimated_count + extra):
+                    final_count = estimated_count + extra - 1
+                    print(f"Found actual segment count: {final_count}")
+                    return final_count
+            # If all 20 extra segments exist, there might be more
+            return estimated_count + 20
+        else:
+            # Estimate was too high, binary search downward
+            print(f"Segment {test_seg_num} doesn't exist, searching backwards...")
+            return self.binary_search_segments(base_url, seg_info, 1, estimated_count)
 
     def binary_search_segments(self, base_url, seg_info, low_count, high_count):
         """Efficiently find the actual segment count using binary search"""
@@ -1143,232 +2696,1707 @@ class FortniteTracksGUI:
         
         while low <= high:
             mid = (low + high) // 2
-            test_seg_num = seg_info['start_number'] + mid - 1
-            test_url = base_url + seg_info['media'].replace('$Number$', str(test_seg_num))
             
-            try:
-                test_response = requests.head(test_url, timeout=4)
-                if test_response.status_code == 200:
-                    last_valid = mid
-                    low = mid + 1
-                else:
-                    high = mid - 1
-            except:
+            if self.segment_exists(base_url, seg_info, mid):
+                last_valid = mid
+                low = mid + 1
+            else:
                 high = mid - 1
         
         print(f"Binary search found segment count: {last_valid}")
         return last_valid
 
-    def convert_blurl_to_mp4(self, blurl_file, total_segments):
+    def segment_window(self, seg_info, clip):
+        """Map a (start, end) clip in seconds to the segments covering it and the trim left over"""
+        total = seg_info['segment_count']
+        if not clip:
+            return 0, total, None
+        segment_length = seg_info['duration'] / seg_info['timescale']
+        start, end = clip
+        end = min(end, total * segment_length)
+        if start >= end:
+            raise Exception("Clip starts after the end of the song")
+        first = int(start // segment_length)
+        last = min(int(-(-end // segment_length)), total)
+        trim = {
+            'start': start,
+            'end': end,
+            'offset': round(start - first * segment_length, 3),
+            'length': round(end - start, 3)
+        }
+        return first, last, trim
+
+    def resolve_manifest(self, song):
+        """Song metadata, blurl playlist, MPD and estimated segment count; None when the song has no download URL"""
+        with self.tracer.span("metadata"):
+            response = self.http.get(f"https://cdn.qstv.on.epicgames.com/{song['sid']}")
+            response.raise_for_status()
+            data = response.json()
+
+        # Every base URL is a mirror of the same content
+        content_roots = []
+        for key, value in data.items():
+            if isinstance(value, dict) and value.get('baseUrls'):
+                for base in value['baseUrls']:
+                    url_parts = base.rstrip('/').split('/')
+                    if len(url_parts) >= 4:
+                        content_roots.append(f"{url_parts[0]}//{url_parts[2]}/{url_parts[3]}/")
+                if content_roots:
+                    break
+        if not content_roots:
+            return None
+
+        with self.tracer.span("blurl", mirrors=len(content_roots)):
+            blurl_bytes, stats = self.segments.fetch(content_roots, "master.blurl", rounds=2)
+            self.tracer.record(bytes=len(blurl_bytes), requests=stats['requests'], retries=stats['failures'])
+
+        # The playlist and its key envelope are parsed once here and cached with the manifest
+        blurl = self.decompress_blurl(blurl_bytes)
+        media_url = blurl['playlists'][0]['url']
+        key_hex = self.blurl_key(blurl)
+        with self.tracer.span("mpd"):
+            r = self.http.get(media_url)
+            r.raise_for_status()
+            mpd_xml = r.text
+        try:
+            seg_info = self.parse_mpd(mpd_xml)
+        except Exception as e:
+            raise Exception(f"MPD parsing failed: {e}")
+        base_url = '/'.join(media_url.split('/')[:-1]) + '/'
+        # Segments keep the same path on every mirror host
+        segment_path = urlsplit(base_url).path
+        mirrors = [base_url]
+        for root in content_roots:
+            parts = urlsplit(root)
+            mirror = f"{parts.scheme}://{parts.netloc}{segment_path}"
+            if mirror not in mirrors:
+                mirrors.append(mirror)
+
+        # Only the estimate here: prefetches run for every selection, and a song that turns out to be
+        # up to date never needs the real count. fetch_song probes it once the download is certain.
+        segment_count = self.estimate_segment_count(mpd_xml, seg_info['duration'], seg_info['timescale'])
+
+        return {
+            'sid': song['sid'],
+            'key_hex': key_hex,
+            'content_hash': hashlib.sha1(blurl_bytes).hexdigest(),
+            'media_url': media_url,
+            'mpd_xml': mpd_xml,
+            'seg_info': seg_info,
+            'base_url': base_url,
+            'mirrors': mirrors,
+            'segment_count': segment_count,
+            'probed': False
+        }
+
+    def blurl_key(self, blurl):
+        """Decryption key for a parsed blurl playlist, or None for unencrypted audio"""
+        if not blurl.get('ev'):
+            return None
+        nonce, key = self.parse_envelope(blurl['ev'])
+        dec_key = self.get_encryption_key('keys.bin', nonce, key)
+        if not dec_key:
+            raise Exception("Failed to get decryption key")
+        return dec_key.hex()
+
+    def read_partial(self, output_path, progress_path, expected):
+        """Progress of an earlier interrupted download of the same audio and window, or None"""
+        try:
+            with open(progress_path, "r") as f:
+                progress = json.load(f)
+            if all(progress.get(name) == value for name, value in expected.items()) \
+                    and os.path.getsize(output_path) >= progress['size']:
+                return progress
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def convert_blurl_to_mp4(self, manifest, master_path, clip=None, lane=1, control=None):
         try:
             self.update_status("Loading song data...")
             self.update_progress(5)
 
-            blurl = self.decompress_blurl(blurl_file)
-            print("BLURL loaded.")
+            print("Media URL:", manifest['media_url'])
+            key_hex = manifest['key_hex']
+
+            # MPD and segment count were resolved with the manifest
+            seg_info = dict(manifest['seg_info'], segment_count=manifest['segment_count'])
+            base_url = manifest['base_url']
+            first, last, trim = self.segment_window(seg_info, clip)
+            wanted = last - first
+            print(f"Will download {wanted} of {seg_info['segment_count']} segments.")
+
+            self.update_status("Starting download...")
+            self.update_progress(10)
+
+            output_path = master_path + ".part"
+            # Segments written so far; a paused, cancelled-by-exit or crashed download continues from here
+            progress_path = master_path + ".progress"
+            expected = {'content_hash': manifest['content_hash'], 'window': [first, last]}
+            # Every mirror the metadata listed can serve the segments
+            bases = manifest.get('mirrors') or [base_url]
+            control = control or JobControl()
+
+            with self.tracer.span("segments", segments=wanted, mirrors=len(bases), hedged=0) as span:
+                partial = self.read_partial(output_path, progress_path, expected)
+                if partial is not None:
+                    out = open(output_path, 'r+b')
+                    out.truncate(partial['size'])
+                    out.seek(partial['size'])
+                    segments_done = partial['done']
+                    span['resumed'] = segments_done
+                    print(f"Resuming after {segments_done} of {wanted} segments")
+                    self.update_progress(10 + int((segments_done / wanted) * 60))
+                else:
+                    out = open(output_path, 'wb')
+                    out.write(self.fetch_segment(bases, seg_info['init'], span))
+                    segments_done = 0
+
+                with out:
+                    numbers = range(seg_info['start_number'] + first + segments_done, seg_info['start_number'] + last)
+                    # Several segments are in flight at once; they still arrive here in order
+                    arriving = self.segments.fetch_in_order(
+                        bases, [seg_info['media'].replace('$Number$', str(i)) for i in numbers], lane, control.cancelled)
+                    try:
+                        for i in numbers:
+                            control.checkpoint()
+                            try:
+                                out.write(self.count_segment(span, *next(arriving)))
+                            except JobInterrupted:
+                                raise
+                            except Exception as e:
+                                # A gap would be extracted and recorded as a complete song; fail the job instead
+                                span['failed_segment'] = i
+                                raise SegmentFailed(i, e)
+
+                            segments_done = i - seg_info['start_number'] - first + 1
+                            out.flush()
+                            with open(progress_path, "w") as f:
+                                json.dump(dict(expected, done=segments_done, size=out.tell()), f)
+
+                            # Calculate progress: 10% to 70% for downloading segments
+                            download_progress = 10 + int((segments_done / wanted) * 60)
+                            self.update_progress(download_progress)
+                            self.update_status(f"Downloading... {segments_done}/{wanted} chunks")
+                    finally:
+                        # Requests that have not started yet give their slots back to other jobs
+                        arriving.close()
+
+            self.update_status("Processing audio file...")
+            self.update_progress(75)
+
+            # Decryption happens in the same ffmpeg invocation that splits the stems
+            os.replace(output_path, master_path)
+            if os.path.exists(progress_path):
+                os.remove(progress_path)
+
+            return key_hex, trim
+
+        except (JobInterrupted, SegmentFailed):
+            raise
+        except Exception as e:
+            raise Exception(f"BLURL conversion failed: {str(e)}")
+
+    def new_job(self, song, is_queue_download=False):
+        """State carried by one song through the pipeline stages"""
+        job_id = DownloadQueue.key(song)
+        return {
+            'song': song,
+            'job_id': job_id,
+            'queue': is_queue_download,
+            # Queue runs are batch work (lane 1); a song downloaded on its own is interactive (lane 0)
+            'lane': 1 if is_queue_download else 0,
+            'order': self.song_seconds(song) if is_queue_download and self.shortest_first else 0,
+            'status': "failed",
+            'trace': None,
+            'control': JobControl(),
+            'stage': 0,
+            'workdir': self.work_folder(song)
+        }
+
+    def work_folder(self, song):
+        """Each job works in its own folder so songs in different stages never share files"""
+        # Keyed like the queue, so a clip never resumes from another clip's or the full song's segments
+        return os.path.join("downloads", self.sanitize_folder_name(DownloadQueue.key(song)))
+
+    def prune_work_folders(self, max_age=7 * 86400):
+        """Drop work folders of interrupted downloads that were never resumed"""
+        if not os.path.isdir("downloads"):
+            return
+        cutoff = time.time() - max_age
+        for name in os.listdir("downloads"):
+            path = os.path.join("downloads", name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    @contextmanager
+    def job_stage(self, job, stage):
+        """Run a stage of job on the calling thread with its progress and trace context"""
+        import requests
+        job['stage'] = stage
+        parked = False
+        self.job_context.job_id = job['job_id']
+        self.job_context.job = job
+        if job['trace'] is None:
+            self.tracer.begin_job(job['job_id'], sid=job['song']['sid'], title=job['song']['title'])
+        else:
+            self.tracer.resume_job(job['trace'])
+        job['continue'] = False
+        try:
+            yield
+        except JobCancelled:
+            print(f"Cancelled: {job['song']['title']}")
+            job['status'] = "cancelled"
+            job['continue'] = False
+        except JobPaused:
+            # Out of the pipeline until resumed; completed work stays in the job's folder
+            self.update_status("Paused")
+            job['continue'] = False
+            parked = True
+            self.job_parked_signal(job)
+        except SegmentFailed as e:
+            job['failed_segment'] = e.index
+            self.show_error(f"Download failed: {str(e)}")
+            job['continue'] = False
+        except requests.exceptions.RequestException as e:
+            self.show_error(f"Download failed: {str(e)}")
+            job['continue'] = False
+        except Exception as e:
+            self.show_error(f"Unexpected error: {str(e)}")
+            job['continue'] = False
+        finally:
+            job['trace'] = self.tracer.suspend_job()
+            self.job_context.job_id = 'setup'
+            self.job_context.job = None
+            if not job['continue'] and not parked:
+                self.finish_job(job)
+
+    def checkpoint_before_stage(self, job, stage):
+        """Honour a pause or cancel that arrived while the job waited for this stage; True to go ahead"""
+        job['stage'] = stage
+        try:
+            job['control'].checkpoint()
+            return True
+        except JobCancelled:
+            job['status'] = "cancelled"
+            self.finish_job(job)
+        except JobPaused:
+            self.job_parked_signal(job)
+        return False
+
+    def pause_job(self, job):
+        job['control'].pause()
+
+    def resume_job(self, job):
+        """Lift a pause; a job that already parked goes back into the pipeline at the stage it left"""
+        if job['control'].resume():
+            # submit blocks while the stage's queue is full; never on the UI thread
+            threading.Thread(target=self.pipeline.submit, args=(job, job['stage']), daemon=True).start()
+
+    def cancel_job(self, job):
+        """Cancel a job; a running one stops at its next checkpoint, a parked one is finished here"""
+        if job['control'].cancel():
+            job['status'] = "cancelled"
+            threading.Thread(target=self.finish_job, args=(job,), daemon=True).start()
+
+    def finish_job(self, job):
+        """Close the job's trace, progress and work folder and report how it ended"""
+        self.tracer.resume_job(job['trace'])
+        self.tracer.end_job(job['status'])
+        self.progress_channel.finish(job['job_id'])
+        if job['status'] != "failed":
+            # A failed download keeps its .part and .progress files so a retry continues from them
+            shutil.rmtree(job['workdir'], ignore_errors=True)
+        if job['queue']:
+            key = DownloadQueue.key(job['song'])
+            if job['status'] == "failed":
+                error = job.get('error') or {'stage': self.STAGE_NAMES[job['stage']], 'cause': "Unknown error"}
+                self.failure_ledger.record(key, job['song']['title'], error['stage'], error['cause'])
+            elif job['status'] in ("done", "skipped"):
+                self.failure_ledger.resolve(key)
+            self.next_song_signal(job['song'], job['status'])
+        else:
+            self.download_complete(job['song'], job['status'])
+
+    def fetch_stage(self, job):
+        """Resolve the manifest and download the song's segments; returns True to hand it to extraction"""
+        if not self.checkpoint_before_stage(job, 0):
+            return False
+        # How many songs download at once follows the concurrency controller, up to fetch_workers
+        self.transfer.acquire_song(self.fetch_workers, job['lane'])
+        try:
+            return self.fetch_song(job)
+        finally:
+            self.transfer.release_song(job['lane'])
+
+    def fetch_song(self, job):
+        song = job['song']
+        if job['queue']:
+            self.download_queue_thread.put({'type': 'job_started', 'key': DownloadQueue.key(song), 'title': song['title']})
+        with self.job_stage(job, 0):
+            if not self.ffmpeg_ready:
+                self.update_status("Hang tight, setting up tools...")
+                # Wait for FFmpeg to be ready
+                while not self.ffmpeg_ready:
+                    time.sleep(0.5)
+
+            if not song['sid']:
+                self.show_error("No song ID available")
+                return False
+
+            # Kept between runs: a partial download of this song is continued, not repeated
+            os.makedirs(job['workdir'], exist_ok=True)
+            self.update_status("Getting song info...")
+            self.update_progress(0)
+
+            # Usually already resolved in the background when the song was selected or queued
+            manifest = self.prefetcher.get(song)
+            if manifest is None:
+                self.show_error("Could not find valid download URL in the response")
+                return False
+            self.update_progress(5)
+
+            # The playlist identifies the exact audio; unchanged songs need no further download
+            job['content_hash'] = manifest['content_hash']
+            job['library_key'] = self.library_key(song)
+            profiles = [self.profile_key(profile) for profile in self.output_profiles()]
+            if self.skip_existing and self.library.is_current(job['library_key'], profiles, job['content_hash']):
+                print(f"Already up to date, skipping: {song['title']}")
+                self.update_status("Already extracted, skipped")
+                self.update_progress(100)
+                job['status'] = "skipped"
+                if not job['queue']:
+                    self.show_success(f"Stems for {song['title']} are already up to date.")
+                return False
+
+            job['control'].checkpoint()
+            # A clip only needs segments inside the advertised duration, a full song needs the real count
+            if not song.get('clip') and not manifest['probed']:
+                with self.tracer.span("probe"):
+                    manifest['segment_count'] = self.find_actual_segment_count(
+                        manifest['base_url'], manifest['seg_info'], manifest['mpd_xml'])
+                manifest['probed'] = True
+
+            job['master_path'] = os.path.join(job['workdir'], "master_audio.mp4")
+            job['key_hex'], job['trim'] = self.convert_blurl_to_mp4(
+                manifest, job['master_path'], song.get('clip'), job['lane'], job['control'])
+            job['continue'] = True
+        return job['continue']
+
+    def extract_stage(self, job):
+        """Split the downloaded master into stems and record them in the library"""
+        song = job['song']
+        if not self.checkpoint_before_stage(job, 1):
+            return False
+        with self.job_stage(job, 1):
+            self.update_status("Creating audio stems...")
+            self.update_progress(80)
+            result = self.extract_audio_stems(song['title'], song['artist'], job['key_hex'], job['trim'],
+                                              job['master_path'], job['control'])
+            if result is None:
+                # extract_audio_stems already reported the error
+                return False
+            stem_folder, written = result
+            if job.get('failed_segment') is not None:
+                # Never mark a master with a missing segment as current in the library
+                return False
+            for profile, paths in written.items():
+                self.library.record(job['library_key'], profile, job['content_hash'], song['title'], song['artist'],
+                                    stem_folder, paths)
+
+            self.update_status("Download completed! 🎉")
+            self.update_progress(100)
+            job['status'] = "done"
+
+            if not job['queue']:
+                self.show_success(f"Successfully downloaded and extracted stems for: {song['title']}")
+        return False
+
+    @staticmethod
+    def song_seconds(song):
+        """Audio length a job will fetch, for shortest-first ordering; unknown lengths go last"""
+        clip = song.get('clip')
+        if clip and clip[1] != float("inf"):
+            return clip[1] - clip[0]
+        duration = song.get('duration')
+        if isinstance(duration, int) or (isinstance(duration, str) and duration.isdigit()):
+            return int(duration)
+        return float("inf")
+
+    def set_bandwidth_limit(self, mbits):
+        """Cap all segment transfers together at mbits Mbit/s; 0 removes the cap"""
+        self.bandwidth_limit = mbits
+        self.segments.bandwidth = int(mbits * 125000)
+
+    def submit_to_pipeline(self, song, interactive=False):
+        """Queue a song on the staged pipeline, where it overlaps with the songs around it"""
+        if self.pipeline is None:
+            self.pipeline = StagedPipeline([
+                ("fetch", self.fetch_stage, self.fetch_workers, 0),
+                # Downloaded masters wait here for the encoder; a full queue pauses further downloads
+                ("extract", self.extract_stage, self.extract_workers, self.extract_workers + 1)
+            ], on_idle=self.report_pipeline, section=self.profile_section)
+        job = self.new_job(song, not interactive)
+        self.pipeline.submit(job)
+        return job
+
+    def report_pipeline(self, stats):
+        """Log how busy each stage was over the run that just drained"""
+        self.tracer.write({'event': 'pipeline', 'stages': stats, 'transfer': self.transfer.snapshot()})
+        summary = " · ".join(f"{name} {s['workers']}× {s['utilization'] * 100:.0f}% busy ({s['jobs']} jobs)"
+                             for name, s in stats.items())
+        print(f"Pipeline: {summary}")
+        print(self.transfer.describe())
+        if self.profiler:
+            try:
+                path = self.profiler.write_report(stats)
+            except OSError as e:
+                print(f"Could not write the profile report: {e}")
+            else:
+                if path:
+                    print(f"Profile written to {path}")
+
+    def profile_section(self, name):
+        """Profiler section for a unit of work, or a no-op while profiling is off"""
+        profiler = self.profiler
+        return profiler.section(name) if profiler else nullcontext()
+
+    def load_settings(self):
+        if os.path.exists(self.settings_file):
+            with open(self.settings_file, "r") as f:
+                settings = json.load(f)
+                return {
+                    "extract_folder": settings.get("extract_folder", os.getcwd()),
+                    "dark_mode": settings.get("dark_mode", True),
+                    "sorting_method": settings.get("sorting_method", "Last Added"),
+                    "sort_ascending": settings.get("sort_ascending", True),
+                    "auto_open_folder": settings.get("auto_open_folder", False),
+                    "file_format": settings.get("file_format", "wav"),
+                    "extracting_method": settings.get("extracting_method", "Stereo"),
+                    "file_naming": settings.get("file_naming", "Only Stem Type"),
+                    "stems": settings.get("stems", list(self.STEMS)),
+                    "extra_formats": settings.get("extra_formats", []),
+                    "silent_stems": settings.get("silent_stems", "Keep"),
+                    "silence_threshold_db": settings.get("silence_threshold_db", -60.0),
+                    "skip_existing": settings.get("skip_existing", True),
+                    "fetch_workers": settings.get("fetch_workers", 4),
+                    "extract_workers": settings.get("extract_workers", 1),
+                    "shortest_first": settings.get("shortest_first", False),
+                    "bandwidth_limit": settings.get("bandwidth_limit", 0),
+                    "probe_timeout": settings.get("probe_timeout", 0),
+                    "probe_attempts": settings.get("probe_attempts", 3),
+                    "trace_enabled": settings.get("trace_enabled", False),
+                    "profiling_enabled": settings.get("profiling_enabled", False),
+                    "show_trace_summary": settings.get("show_trace_summary", False),
+                    "ui_watchdog": settings.get("ui_watchdog", False)
+                }
+        return {
+            "extract_folder": os.getcwd(),
+            "dark_mode": True,
+            "sorting_method": "Last Added",
+            "sort_ascending": True,
+            "auto_open_folder": False,
+            "file_format": "wav",
+            "extracting_method": "Stereo",
+            "file_naming": "Only Stem Type",
+            "stems": list(self.STEMS),
+            "extra_formats": [],
+            "silent_stems": "Keep",
+            "silence_threshold_db": -60.0,
+            "skip_existing": True,
+            "fetch_workers": 4,
+            "extract_workers": 1,
+            "shortest_first": False,
+            "bandwidth_limit": 0,
+            "probe_timeout": 0,
+            "probe_attempts": 3,
+            "trace_enabled": False,
+            "profiling_enabled": False,
+            "show_trace_summary": False,
+            "ui_watchdog": False
+        }
+
+    def stream_catalog(self, url, on_rows=None, chunk_size=1 << 16):
+        """Download and parse the catalog in one pass; on_rows receives each batch of rows as it is parsed"""
+        import codecs
+        import requests
+        songs = SongCatalog()
+        parser = CatalogStream()
+        text = codecs.getincrementaldecoder("utf-8")()
+        try:
+            with self.http.get(url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size):
+                    rows = parser.feed(text.decode(chunk))
+                    songs.extend(rows)
+                    if rows and on_rows:
+                        on_rows(rows)
+            songs.extend(parser.feed(text.decode(b"", final=True)))
+            parser.close()
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching data: {e}")
+        except ValueError as e:
+            print(f"Error parsing catalog: {e}")
+        return songs.finish(), parser.schema
+
+    def fetch_and_extract_songs(self, on_rows=None):
+        url = "https://fortnitecontent-website-prod07.ol.epicgames.com/content/api/pages/fortnite-game/spark-tracks"
+        with self.tracer.span("catalog") as span:
+            songs, span['schema'] = self.stream_catalog(url, on_rows)
+            span['tracks'] = len(songs)
+        print(f"Songs fetched: {len(songs)}")
+        return songs
+
+    def parse_clip_time(self, text):
+        """Parse '75', '1:15' or '1:15.5' into seconds; empty text means no limit"""
+        text = text.strip()
+        if not text:
+            return None
+        seconds = 0.0
+        for part in text.split(":"):
+            seconds = seconds * 60 + float(part)
+        if seconds < 0:
+            raise ValueError(text)
+        return seconds
+
+    def format_clip_time(self, seconds):
+        """Filesystem-safe label such as 1m05s or 1m05.5s"""
+        minutes = int(seconds // 60)
+        rest = seconds - minutes * 60
+        rest_text = f"{rest:04.1f}".rstrip("0").rstrip(".") if rest % 1 else f"{int(rest):02d}"
+        return f"{minutes}m{rest_text}s"
+
+    def sanitize_folder_name(self, name):
+        return re.sub(r'[<>:"/\\|?*]', '', name)
+
+    def generate_filename(self, stem_name, song_title, artist_name, file_extension):
+        """Generate filename based on user's naming preference"""
+        naming_method = self.file_naming
+        
+        # Sanitize all components
+        safe_stem = self.sanitize_folder_name(stem_name)
+        safe_title = self.sanitize_folder_name(song_title)
+        safe_artist = self.sanitize_folder_name(artist_name)
+        
+        if naming_method == "Only Stem Type":
+            return f"{safe_stem}.{file_extension}"
+        elif naming_method == "Song Name - Stem Type":
+            return f"{safe_title} - {safe_stem}.{file_extension}"
+        elif naming_method == "Artist Name - Song Name - Stem Type":
+            return f"{safe_artist} - {safe_title} - {safe_stem}.{file_extension}"
+        else:
+            # Fallback to default
+            return f"{safe_stem}.{file_extension}"
+
+    @classmethod
+    def parse_output_profile(cls, text):
+        """Parse 'flac' or 'mp3@192k' into (format, encoder options)"""
+        file_format, _, bitrate = text.strip().lower().partition("@")
+        if file_format not in cls.OUTPUT_CODECS:
+            raise ValueError(f"Unknown output format: {text.strip()}")
+        options = list(cls.OUTPUT_CODECS[file_format])
+        if bitrate:
+            if file_format != "mp3" or not re.fullmatch(r"\d+k", bitrate):
+                raise ValueError(f"Bitrates look like mp3@192k: {text.strip()}")
+            options = ["-b:a", bitrate]
+        return file_format, options
+
+    def output_profiles(self):
+        """The main format plus every extra profile as (format, encoder options, subfolder)"""
+        profiles = [(*self.parse_output_profile(self.file_format), None)]
+        for text in self.extra_formats:
+            try:
+                file_format, options = self.parse_output_profile(text)
+            except ValueError as e:
+                print(f"Ignoring output profile: {e}")
+                continue
+            if any(p[0] == file_format and p[1] == options for p in profiles):
+                continue
+            profiles.append((file_format, options, text.strip().lower().replace("@", " ")))
+        return profiles
+
+    def stem_branches(self, extracting_method, stems):
+        """(pan filter, pad label, output name, source channels) for every requested output"""
+        selected = [(stem, index * 2) for index, stem in enumerate(self.STEMS) if stem in stems]
+        if not selected:
+            raise Exception("No stems selected for extraction")
+
+        if extracting_method == "Single File":
+            # Mix the selected stems down to stereo
+            left = "+".join(f"c{channel}" for _, channel in selected)
+            right = "+".join(f"c{channel + 1}" for _, channel in selected)
+            channels = [c for _, channel in selected for c in (channel, channel + 1)]
+            return [(f"pan=stereo|c0<{left}|c1<{right}", "out", "master", channels)]
+        if extracting_method == "Mono":
+            branches = []
+            for stem, channel in selected:
+                branches.append((f"pan=mono|c0=c{channel}", f"{stem.lower()}_left", f"{stem}_Left", [channel]))
+                branches.append((f"pan=mono|c0=c{channel + 1}", f"{stem.lower()}_right", f"{stem}_Right", [channel + 1]))
+            return branches
+        return [(f"pan=stereo|c0=c{channel}|c1=c{channel + 1}", stem.lower(), stem, [channel, channel + 1])
+                for stem, channel in selected]
+
+    def analyze_channel_levels(self, input_options, abort=None):
+        """Per-channel (peak dB, RMS dB) of the decoded master, measured by ffmpeg's astats in a decode-only pass"""
+        record = self.ffmpeg.run([*input_options, "-af", "astats=measure_overall=none:measure_perchannel=Peak_level+RMS_level",
+                                  "-f", "null", "-"], label="levels", loglevel="info", abort=abort)
+        return self.channel_levels(record['stderr'])
+
+    @staticmethod
+    def channel_levels(stderr):
+        """Parse astats' per-channel report; channels are numbered from 0 like the master's"""
+        levels = {}
+        channel = None
+        for line in stderr.splitlines():
+            match = re.search(r"\[Parsed_astats_\d+ @ [^\]]*\] (Channel|Peak level dB|RMS level dB): (\S+)", line)
+            if not match:
+                continue
+            field, value = match.groups()
+            if field == "Channel":
+                channel = int(value) - 1
+                levels[channel] = [float("-inf"), float("-inf")]
+            elif channel is not None:
+                levels[channel][0 if field == "Peak level dB" else 1] = float(value)
+        return levels
+
+    def plan_silent_outputs(self, branches, levels):
+        """Mark outputs whose source channels all peak below the silence threshold"""
+        actions = {}
+        for _, _, stem_name, channels in branches:
+            peaks = [levels.get(channel, (float("inf"),))[0] for channel in channels]
+            silent = max(peaks) < self.silence_threshold_db
+            actions[stem_name] = self.silent_stems.lower() if silent else "written"
+        return actions
+
+    def write_stem_manifest(self, stem_folder, song_title, artist_name, branches, levels, actions):
+        """Record the measured levels and what was written for each output in stems.json"""
+        def db(value):
+            return round(value, 2) if value != float("-inf") else None
+
+        manifest = {
+            "song": song_title,
+            "artist": artist_name,
+            "method": self.extracting_method,
+            "silence_threshold_db": self.silence_threshold_db,
+            "outputs": {
+                stem_name: {
+                    "channels": channels,
+                    "peak_db": [db(levels[c][0]) if c in levels else None for c in channels],
+                    "rms_db": [db(levels[c][1]) if c in levels else None for c in channels],
+                    "action": actions[stem_name]
+                }
+                for _, _, stem_name, channels in branches
+            }
+        }
+        with open(os.path.join(stem_folder, "stems.json"), "w") as f:
+            json.dump(manifest, f, indent=4)
+
+    def build_stem_outputs(self, branches, stem_folder, song_title, artist_name, profiles):
+        """Filter graph and output arguments that decode only the requested stems and encode every profile"""
+        # Each requested output picks its channels straight from one decode of the master
+        if len(branches) == 1:
+            filter_complex = f"[0:a]{branches[0][0]}[{branches[0][1]}]"
+        else:
+            filter_complex = f"[0:a]asplit={len(branches)}" + "".join(f"[s{i}]" for i in range(len(branches)))
+            filter_complex += "".join(f";[s{i}]{pan}[{label}]" for i, (pan, label, _, _) in enumerate(branches))
+
+        # Further profiles reuse the same decoded branch instead of decoding again
+        if len(profiles) > 1:
+            filter_complex += "".join(f";[{label}]asplit={len(profiles)}" + "".join(f"[{label}_{p}]" for p in range(len(profiles)))
+                                      for _, label, _, _ in branches)
+
+        outputs = []
+        for p, profile in enumerate(profiles):
+            for _, label, stem_name, _ in branches:
+                pad = f"{label}_{p}" if len(profiles) > 1 else label
+                outputs += ["-map", f"[{pad}]", *profile[1],
+                            self.output_path(stem_folder, profile, stem_name, song_title, artist_name)]
+        return ["-filter_complex", filter_complex, *outputs]
+
+    def output_path(self, stem_folder, profile, stem_name, song_title, artist_name):
+        file_format, _, subfolder = profile
+        folder = os.path.join(stem_folder, subfolder) if subfolder else stem_folder
+        return os.path.join(folder, self.generate_filename(stem_name, song_title, artist_name, file_format))
+
+    @staticmethod
+    def profile_key(profile):
+        """Canonical name of an output profile, e.g. 'flac' or 'mp3@320k'"""
+        file_format, options, _ = profile
+        return f"{file_format}@{options[1]}" if options else file_format
+
+    def library_key(self, song):
+        """Everything besides the source audio that decides what an extraction writes"""
+        clip = song.get('clip')
+        return {
+            'sid': song['sid'],
+            'method': self.extracting_method,
+            'naming': self.file_naming,
+            'stems': ",".join(self.selected_stems),
+            'clip': f"{clip[0]:g}-{clip[1]:g}" if clip else "",
+            # Which stems get written depends on both silence settings, unless silent stems are kept anyway
+            'silent': f"{self.silent_stems.lower()}@{self.silence_threshold_db:g}"
+                      if self.silent_stems != "Keep" and self.extracting_method != "Single File" else "keep"
+        }
+
+    def extract_audio_stems(self, song_title, artist_name, key_hex=None, trim=None, master_path="master_audio.mp4",
+                            control=None):
+        """Split the master into stems; returns (stem folder, written paths per profile) or None on failure"""
+        control = control or JobControl()
+        written = {}
+        try:
+            if not os.path.exists(master_path):
+                self.show_error(f"{os.path.basename(master_path)} not found")
+                return None
 
-            media_url = blurl['playlists'][0]['url']
-            print("Media URL:", media_url)
+            os.makedirs(self.extract_folder, exist_ok=True)
+            sanitized_title = self.sanitize_folder_name(song_title)
+            stem_folder = os.path.join(self.extract_folder, f"{sanitized_title} - stems")
+            if trim:
+                stem_folder += f" ({self.format_clip_time(trim['start'])}-{self.format_clip_time(trim['end'])})"
+            os.makedirs(stem_folder, exist_ok=True)
 
-            if blurl.get('ev'):
-                nonce, key = self.parse_envelope(blurl['ev'])
-                dec_key = self.get_encryption_key('keys.bin', nonce, key)
-                if not dec_key:
-                    print("Failed to get decryption key.")
-                    return
-                key_hex = dec_key.hex()
-                print("Decryption key:", key_hex)
+            extracting_method = self.extracting_method
+            profiles = self.output_profiles()
+            for _, _, subfolder in profiles:
+                if subfolder:
+                    os.makedirs(os.path.join(stem_folder, subfolder), exist_ok=True)
+
+            # The downloaded track is still encrypted; ffmpeg decrypts while decoding
+            input_options = ["-i", master_path]
+            if trim:
+                # The download starts at a segment boundary; seek to the exact clip start
+                input_options = ["-ss", str(trim['offset']), "-t", str(trim['length']), *input_options]
+            if key_hex:
+                input_options = ["-decryption_key", key_hex, *input_options]
+
+            branches = self.stem_branches(extracting_method, self.selected_stems)
+            # A cheap decode-only pass finds empty stems before anything is encoded
+            if self.silent_stems != "Keep" and extracting_method != "Single File":
+                control.checkpoint()
+                with self.tracer.span("analyze"):
+                    levels = self.analyze_channel_levels(input_options, control.cancelled)
+                actions = self.plan_silent_outputs(branches, levels)
+                self.write_stem_manifest(stem_folder, song_title, artist_name, branches, levels, actions)
+                silent = [name for name, action in actions.items() if action != "written"]
+                if silent:
+                    print(f"Silent outputs ({self.silent_stems.lower()}): {', '.join(silent)}")
+                # Skipped stems leave the output map; placeholders are cut to one sample in the same encode
+                branches = [(pan + ",atrim=end_sample=1" if actions[name] == "placeholder" else pan, label, name, channels)
+                            for pan, label, name, channels in branches if actions[name] != "skip"]
+
+            written = {self.profile_key(profile): [self.output_path(stem_folder, profile, name, song_title, artist_name)
+                                                   for _, _, name, _ in branches]
+                       for profile in profiles}
+
+            if branches:
+                ffmpeg_command = ["-y", *input_options, *self.build_stem_outputs(
+                    branches, stem_folder, song_title, artist_name, profiles)]
+
+                # Last chance to pause before the encode; a pause during it takes effect once it finishes
+                control.checkpoint()
+                with self.tracer.span("ffmpeg", method=extracting_method, format=",".join(p[0] for p in profiles), decrypt=bool(key_hex),
+                                      stems=len(branches)):
+                    self.ffmpeg.run(ffmpeg_command, label="stems", abort=control.cancelled)
+
+            if branches:
+                print(f"Audio extracted successfully into folder: {stem_folder}")
             else:
-                key_hex = None
+                print(f"Every selected stem is silent; nothing written to {stem_folder}")
+
+            self.update_progress(95)
+            self.update_status("Cleaning up...")
+
+            with self.tracer.span("cleanup"):
+                os.remove(master_path)
+
+            if self.auto_open_folder:
+                system = platform.system()
+                if system == "Windows":
+                    subprocess.Popen(f'explorer "{os.path.normpath(stem_folder)}"')
+                elif system == "Darwin":
+                    subprocess.Popen(["open", stem_folder])
+                else:
+                    subprocess.Popen(["xdg-open", stem_folder])
+
+            return stem_folder, written
+
+        except JobCancelled:
+            # The encode was stopped part way; do not leave truncated stems behind
+            for paths in written.values():
+                for path in paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+            raise
+        except JobPaused:
+            raise
+        except subprocess.CalledProcessError as e:
+            self.show_error(f"FFmpeg extraction failed: {str(e)}")
+        except Exception as e:
+            self.show_error(f"Unexpected error during extraction: {str(e)}")
+        return None
+
+class StallWatchdog:
+    """Measures Tk event-loop latency with a heartbeat and logs every stall with the stack of the blocking callback.
+
+    The heartbeat is an after() timer; how late it fires is the latency any other event would have seen.
+    A monitor thread watches for an overdue beat and, once it passes THRESHOLD, captures the main
+    thread's stack while the offending callback is still running.
+    """
+
+    INTERVAL = 0.1  # heartbeat period, seconds
+    THRESHOLD = 0.2  # a beat this late is logged as a stall
+    BUCKETS = (0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)  # latency histogram upper bounds
+    STACK_DEPTH = 12
+
+    def __init__(self, root, tracer, on_update=None):
+        self.root = root
+        self.tracer = tracer
+        self.on_update = on_update  # receives the indicator text about once a second
+        self.main_thread = threading.get_ident()
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.beats = 0
+        self.worst = 0.0
+        self.stalls = {}  # callback -> [count, total seconds, longest]
+        self.recent = deque(maxlen=int(10 / self.INTERVAL))  # the last 10 s, for the indicator
+        self.stack = None  # captured by the monitor while the pending beat is overdue
+        self.stopped = threading.Event()
+        self.due = time.perf_counter() + self.INTERVAL
+        self.root.after(int(self.INTERVAL * 1000), self.beat)
+        threading.Thread(target=self.monitor, name="stall-watchdog", daemon=True).start()
+
+    def beat(self):
+        if self.stopped.is_set():
+            return
+        now = time.perf_counter()
+        with self.lock:
+            latency = max(now - self.due, 0.0)
+            stack, self.stack = self.stack, None
+            self.due = now + self.INTERVAL
+            self.beats += 1
+            self.counts[bisect.bisect_left(self.BUCKETS, latency)] += 1
+            self.worst = max(self.worst, latency)
+        self.recent.append(latency)
+        if latency >= self.THRESHOLD:
+            self.log_stall(latency, stack)
+        if self.on_update and self.beats % int(1 / self.INTERVAL) == 0:
+            self.on_update(self.describe())
+        self.root.after(int(self.INTERVAL * 1000), self.beat)
+
+    def monitor(self):
+        while not self.stopped.wait(self.THRESHOLD / 4):
+            with self.lock:
+                due = self.due
+                if time.perf_counter() - due < self.THRESHOLD or self.stack is not None:
+                    continue
+            frame = sys._current_frames().get(self.main_thread)
+            stack = traceback.extract_stack(frame) if frame is not None else []
+            del frame
+            with self.lock:
+                if self.due == due:
+                    self.stack = stack
+
+    def log_stall(self, latency, stack):
+        """Print and trace one stall, attributed to the outermost callback of ours on the stack"""
+        ours = [entry for entry in stack or [] if entry.filename == __file__ and entry.name != "<module>"]
+        callback = ours[0].name if ours else stack[-1].name if stack else "unknown"
+        lines = traceback.format_list(stack[-self.STACK_DEPTH:]) if stack else []
+        totals = self.stalls.setdefault(callback, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += latency
+        totals[2] = max(totals[2], latency)
+        # One line on the console; the stack goes to the trace only
+        print(f"UI stall: {latency * 1000:.0f} ms in {callback} (stack in {self.tracer.trace_path})")
+        self.tracer.write({'event': 'ui_stall', 'ms': round(latency * 1000), 'callback': callback, 'stack': lines})
+
+    def percentile(self, fraction):
+        """Histogram bucket bound below which the given fraction of beats landed"""
+        with self.lock:
+            counts, total = list(self.counts), self.beats
+        running = 0
+        for bound, count in zip(self.BUCKETS + (float("inf"),), counts):
+            running += count
+            if total and running >= fraction * total:
+                return bound
+        return 0.0
+
+    def describe(self):
+        """Indicator text: typical and worst latency over the last 10 seconds"""
+        recent = sorted(self.recent)
+        if not recent:
+            return ""
+        typical = recent[len(recent) // 2]
+        return f"UI latency: {typical * 1000:.0f} ms (worst {recent[-1] * 1000:.0f} ms in the last 10 s)"
+
+    def summary(self):
+        """Whole-session record: latency percentiles, worst beat and stalls grouped by callback"""
+        def bound(fraction):
+            value = self.percentile(fraction)
+            return None if value == float("inf") else round(value * 1000)
+        return {
+            'event': 'ui_latency',
+            'beats': self.beats,
+            'p50_ms': bound(0.5),
+            'p95_ms': bound(0.95),
+            'p99_ms': bound(0.99),
+            'worst_ms': round(self.worst * 1000),
+            'stalls': {callback: {'count': count, 'total_ms': round(total * 1000), 'longest_ms': round(longest * 1000)}
+                       for callback, (count, total, longest) in sorted(self.stalls.items(), key=lambda item: -item[1][1])}
+        }
+
+    def stop(self):
+        """Stop measuring and write the session summary"""
+        self.stopped.set()
+        record = self.summary()
+        self.tracer.write(record)
+        stalls = sum(entry['count'] for entry in record['stalls'].values())
+        print(f"UI latency: p50 <= {record['p50_ms']} ms, p95 <= {record['p95_ms']} ms, "
+              f"worst {record['worst_ms']} ms, {stalls} stall(s) over {self.THRESHOLD * 1000:.0f} ms")
+        for callback, entry in record['stalls'].items():
+            print(f"  {callback}: {entry['count']}×, {entry['total_ms']} ms total, longest {entry['longest_ms']} ms")
+        return record
+
+class MainLoopWaker:
+    """Runs a callback on the Tk main loop when worker threads ask, instead of polling on a timer.
+
+    Workers post a virtual event with event_generate; tkinter marshals calls from other threads
+    to the thread running the main loop, which makes this safe. Wakeups requested before the
+    callback has run are coalesced into one.
+    """
+
+    def __init__(self, root, sequence, callback):
+        self.root = root
+        self.sequence = sequence
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.pending = False
+        root.bind(sequence, lambda event: self.fire())
+
+    def wake(self):
+        with self.lock:
+            if self.pending:
+                return
+            self.pending = True
+        try:
+            self.root.event_generate(self.sequence, when="tail")
+        except (tk.TclError, RuntimeError):
+            # The window is gone, or the main loop has not started; the next wake tries again
+            with self.lock:
+                self.pending = False
+
+    def fire(self):
+        with self.lock:
+            self.pending = False
+        self.callback()
+
+class FortniteTracksGUI(ExtractionPipeline):
+    def __init__(self, root, profile=False, watchdog=False):
+        self.root = root
+        super().__init__("settings.json", profile=profile)
+        if self.profiler:
+            # Before any widget exists, so every command and binding is covered
+            self.profiler.profile_tk_callbacks()
+        self.downloading = False  # a queue run is in progress
+        self.interactive_jobs = set()  # keys of songs downloaded on their own, which overtake the queue
+        
+        # Add song queue for downloads
+        # Survives restarts; rows are redrawn individually as their state changes, and state changes
+        # are written to disk at most twice a second
+        self.song_queue = DownloadQueue("queue.json", on_dirty=lambda: self.root.after(500, self.song_queue.flush))
+        self.song_queue.load()
+        self.submitted_jobs = {}  # queue key -> pipeline job of the current run
+        
+        # Initialize preview system
+        self.preview_system = SmartPreviewSystem()
+        self.preview_system.parent_app = self
+
+        # Register cleanup to delete WAV files when app closes
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        settings = self.settings
+        self.dark_mode = settings.get("dark_mode", True)
+        self.sorting_method = settings.get("sorting_method", "Last Added")
+        self.sort_ascending = settings.get("sort_ascending", True)
+        self.file_format_var = tk.StringVar(value=self.file_format)
+        self.extracting_method_var = tk.StringVar(value=self.extracting_method)
+        self.file_naming_var = tk.StringVar(value=self.file_naming)
+        self.silent_stems_var = tk.StringVar(value=self.silent_stems)
+        self.show_trace_summary = settings.get("show_trace_summary", False)
+        self.ui_watchdog = settings.get("ui_watchdog", False)
+        self.cached_logo = None
+
+        self.root.title("Fortnite Festival Extractor")
+        self.root.geometry("900x600")
+        
+        if getattr(sys, 'frozen', False):
+            application_path = sys._MEIPASS
+        else:
+            application_path = os.path.dirname(os.path.abspath(__file__))
+        
+        try:
+            icon_path = os.path.join(application_path, "icon.png")
+            if os.path.exists(icon_path):
+                self.root.iconphoto(False, tk.PhotoImage(file=icon_path))
+        except Exception:
+            pass
+
+        self.style = ttk.Style()
+        self.style.theme_use("clam")
+
+        main_frame = ttk.Frame(self.root, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Left side - Song list with search
+        left_frame = ttk.Frame(main_frame)
+        left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 15))
+
+        search_frame = ttk.Frame(left_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Search Song:").pack(side=tk.LEFT, padx=(0, 5))
+        self.search_entry = ttk.Entry(search_frame, width=50)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.search_entry.bind("<KeyRelease>", self.search_songs)
+
+        list_frame = ttk.Frame(left_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        self.song_listbox = tk.Listbox(list_frame, width=60, height=25, bg="#2E2E2E", fg="#FFFFFF", font=("Arial", 12))
+        self.song_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.song_listbox.bind("<<ListboxSelect>>", self.on_song_select)
+
+        scrollbar = Scrollbar(list_frame, orient=tk.VERTICAL, command=self.song_listbox.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.song_listbox.config(yscrollcommand=scrollbar.set)
+
+        # Right side - Tabs
+        right_frame = ttk.Frame(main_frame)
+        right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+
+        # Create notebook for tabs
+        self.notebook = ttk.Notebook(right_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+
+        # Song Info tab
+        self.song_info_frame = ttk.Frame(self.notebook, padding=10)
+        self.notebook.add(self.song_info_frame, text="Song Info")
+
+        # Queue tab
+        self.queue_frame = ttk.Frame(self.notebook, padding=(10, 5, 10, 10))  # top, right, bottom, left
+        self.notebook.add(self.queue_frame, text="Queue")
+
+        # Progress bar (shared, but only visible in queue tab initially)
+        self.progress = ttk.Progressbar(self.queue_frame, orient="horizontal", length=400, mode="determinate")
+        self.progress.pack(pady=2)  # Reduced from 10 to 2
+        self.progress["maximum"] = 100
+
+        self.status_label = ttk.Label(self.queue_frame, text="Getting things ready...", font=("Arial", 12))
+        self.status_label.pack(pady=2)  # Reduced from 5 to 2
+
+        # Live concurrency chosen by the transfer controller
+        self.transfer_label = ttk.Label(self.queue_frame, text="", font=("Arial", 9))
+        self.transfer_label.pack(pady=(0, 2))
+
+        # Event-loop responsiveness, shown while the stall watchdog runs
+        self.latency_label = ttk.Label(self.queue_frame, text="", font=("Arial", 9))
+
+        # Timing summary of the last finished song (optional)
+        self.trace_label = ttk.Label(self.queue_frame, text="", font=("Arial", 9), wraplength=400, justify="center")
+        if self.show_trace_summary:
+            self.trace_label.pack(pady=(0, 2))
+
+        # Queue listbox
+        queue_list_frame = ttk.Frame(self.queue_frame)
+        queue_list_frame.pack(fill=tk.X, expand=False, pady=(5, 2))
+        
+        ttk.Label(queue_list_frame, text="Download Queue:", font=("Arial", 12, "bold")).pack(anchor="w", pady=(0, 5))
+        
+        self.queue_listbox = tk.Listbox(queue_list_frame, height=20, bg="#2E2E2E", fg="#FFFFFF", font=("Arial", 11))
+        self.queue_listbox.pack(fill=tk.BOTH, expand=True)
+
+        # Failures of the current and earlier runs; shown only when there are any, never as dialogs
+        self.failures_frame = ttk.Frame(self.queue_frame)
+        ttk.Label(self.failures_frame, text="Failed:", font=("Arial", 10, "bold")).pack(anchor="w")
+        self.failure_listbox = tk.Listbox(self.failures_frame, height=4, bg="#2E2E2E", fg="#FF8080", font=("Arial", 9))
+        self.failure_listbox.pack(fill=tk.X)
+        self.queue_listbox.bind("<<ListboxSelect>>", self.on_queue_select)
+        self.update_queue_display()
+
+        # Queue buttons frame - Triangle layout
+        queue_buttons_frame = ttk.Frame(self.queue_frame)
+        queue_buttons_frame.pack(fill=tk.X, pady=(5, 5))
+
+        # Top row - Download All button (centered)
+        top_button_frame = ttk.Frame(queue_buttons_frame)
+        top_button_frame.pack(pady=(0, 3))
+
+        self.download_all_button = ttk.Button(top_button_frame, text="Download All", command=self.download_all_queue)
+        self.download_all_button.pack(side=tk.LEFT)
+
+        self.pause_button = ttk.Button(top_button_frame, text="Pause", command=self.pause_selected)
+        self.pause_button.pack(side=tk.LEFT)
+
+        self.resume_button = ttk.Button(top_button_frame, text="Resume", command=self.resume_selected)
+        self.resume_button.pack(side=tk.LEFT)
+
+        self.cancel_button = ttk.Button(top_button_frame, text="Cancel", command=self.cancel_selected)
+        self.cancel_button.pack(side=tk.LEFT)
+
+        # Bottom row - Clear Queue and Remove Selected buttons (side by side, centered)
+        bottom_button_frame = ttk.Frame(queue_buttons_frame)
+        bottom_button_frame.pack(pady=(0, 0))
+
+        self.clear_queue_button = ttk.Button(bottom_button_frame, text="Clear Queue", command=self.clear_queue)
+        self.clear_queue_button.pack(side=tk.LEFT)
+
+        self.remove_selected_button = ttk.Button(bottom_button_frame, text="Remove Selected", command=self.remove_selected_from_queue)
+        self.remove_selected_button.pack(side=tk.LEFT)
+
+        self.retry_failed_button = ttk.Button(bottom_button_frame, text="Retry Failed", command=self.retry_failed)
+        self.retry_failed_button.pack(side=tk.LEFT)
+
+        # Settings button
+        self.settings_button = ttk.Button(self.root, text="Settings", command=self.open_settings_window)
+        self.settings_button.place(relx=1.0, rely=1.0, anchor="se", x=-10, y=-10)
+
+        self.apply_theme()
+        
+        # Initialize FFmpeg first
+        self.setup_ffmpeg()
+        
+        # Catalog is fetched in the background so the window paints immediately
+        self.songs = SongCatalog().finish()
+        self.catalog_preview = None  # rows shown while the catalog is still streaming in
+        self.filtered_rows = []  # catalog rows in the order the list shows them
+        self.load_songs_async()
+
+        # Worker messages and progress changes wake the main loop; nothing polls while idle
+        self.last_frame = 0.0
+        self.frame_scheduled = None
+        self.message_waker = MainLoopWaker(self.root, "<<WorkerMessage>>", self.check_download_queue)
+        self.progress_waker = MainLoopWaker(self.root, "<<ProgressChanged>>", self.render_progress)
+        self.download_queue_thread.on_put = self.message_waker.wake
+        self.progress_channel.on_change = self.progress_waker.wake
+        # Anything posted before the wakers existed
+        self.root.after_idle(self.check_download_queue)
+        self.root.after_idle(self.render_progress)
+
+        # The watchdog's heartbeat wakes the loop ten times a second, so it only runs when asked for
+        self.watchdog = None
+        if self.ui_watchdog or watchdog:
+            self.start_watchdog()
+
+    def get_cached_logo(self):
+        """Load and scale the About logo the first time it is shown"""
+        if self.cached_logo is None:
+            try:
+                from PIL import Image, ImageTk
+                if getattr(sys, 'frozen', False):
+                    logo_path = os.path.join(sys._MEIPASS, "logo.png")
+                else:
+                    logo_path = "logo.png"
+                if os.path.exists(logo_path):
+                    image = Image.open(logo_path)
+                    image = image.resize((200, 70), Image.LANCZOS)
+                    self.cached_logo = ImageTk.PhotoImage(image)
+            except Exception:
+                self.cached_logo = None
+        return self.cached_logo
+
+    def load_songs_async(self):
+        """Fetch the catalog on a worker thread and hand it to the UI loop"""
+        def worker():
+            pending = []
+            flushed = time.monotonic()
+
+            def on_rows(rows):
+                # Batch the partial results so a fast parse does not flood the UI loop
+                nonlocal flushed
+                pending.extend(rows)
+                if time.monotonic() - flushed >= 0.25:
+                    self.download_queue_thread.put({'type': 'catalog_rows', 'rows': pending[:]})
+                    pending.clear()
+                    flushed = time.monotonic()
+
+            songs = self.fetch_and_extract_songs(on_rows)
+            self.download_queue_thread.put({'type': 'catalog', 'songs': songs})
+        threading.Thread(target=worker, daemon=True).start()
+
+    def is_epic_games_song(self, artist):
+        """Check if song is made by Epic Games"""
+        # Clean the artist name and check for exact match
+        clean_artist = re.sub(r'[^\w\s]', '', artist.strip().lower())
+        clean_artist = re.sub(r'\s+', ' ', clean_artist).strip()
+        
+        # Only block previews for songs where the artist is literally "Epic Games"
+        epic_variants = [
+            "epic games",
+            "epicgames"
+        ]
+        
+        return clean_artist in epic_variants
+
+    def delete_all_wav_files(self):
+        """Delete all WAV files with 'temp' in the name when program closes"""
+        try:
+            import glob
+            
+            # Stop any playing audio first
+            if hasattr(self, 'preview_system'):
+                self.preview_system.stop()
+            
+            # Wait for pygame to release files
+            time.sleep(1)
+            
+            # Find and delete only WAV files with 'temp' in their name
+            wav_files = glob.glob("*temp*.wav") + glob.glob("temp_preview_*.mp3")
+            deleted_count = 0
+            
+            for wav_file in wav_files:
+                try:
+                    if os.path.exists(wav_file):
+                        os.remove(wav_file)
+                        deleted_count += 1
+                        print(f"Deleted: {wav_file}")
+                except Exception as e:
+                    print(f"Could not delete {wav_file}: {e}")
+            
+            if deleted_count > 0:
+                print(f"Deleted {deleted_count} temporary WAV files")
+            
+        except Exception as e:
+            print(f"Error deleting temporary WAV files: {e}")
+
+    def on_closing(self):
+        """Handle app closing - delete all WAV files"""
+        print("Closing application and deleting WAV files...")
+        
+        # Delete all WAV files
+        self.delete_all_wav_files()
+
+        self.stop_watchdog()
+        self.song_queue.flush()
+
+        if self.profiler:
+            path = self.profiler.write_report()
+            if path:
+                print(f"Profile written to {path}")
+        
+        # Close the application
+        self.root.destroy()
+
+    def play_song_preview(self, song):
+        """Play 30-second preview of the song"""
+        if hasattr(self, 'preview_button'):
+            self.preview_button.config(state="disabled")
+        try:
+            if hasattr(self, 'preview_status'):
+                self.preview_status.config(text="Searching for preview...")
+            
+            # Search for preview in a background thread
+            def search_and_play():
+                preview_url = self.preview_system.search_preview_ultimate(song['artist'], song['title'])
+                
+                if preview_url:
+                    # Update UI in main thread
+                    self.root.after(0, lambda: self.start_preview_playback(preview_url))
+                else:
+                    self.root.after(0, lambda: self.preview_not_found())
+            
+            threading.Thread(target=search_and_play, daemon=True).start()
+            
+        except Exception as e:
+            if hasattr(self, 'preview_status'):
+                self.preview_status.config(text="Preview error")
+            if hasattr(self, 'preview_button'):
+                self.preview_button.config(text="▶ Play Preview", state="normal")
+            print(f"Preview error: {e}")
+
+    def start_preview_playback(self, preview_url):
+        """Start playing the preview"""
+        try:
+            self.preview_system.play_preview(preview_url)
+            if hasattr(self, 'preview_status'):
+                self.preview_status.config(text="Playing 30s preview...")
+            if hasattr(self, 'preview_button'):
+                self.preview_button.config(text="⏹ Stop Preview", state="normal")
+            
+            # Cancel any existing auto-stop timer
+            if hasattr(self, 'auto_stop_timer'):
+                try:
+                    self.auto_stop_timer.cancel()
+                except:
+                    pass
+            
+            # Auto-stop after 30 seconds
+            def auto_stop_check():
+                self.stop_preview()
+
+            self.auto_stop_timer = threading.Timer(30.0, auto_stop_check)
+            self.auto_stop_timer.daemon = True
+            self.auto_stop_timer.start()
+            
+        except Exception as e:
+            if hasattr(self, 'preview_status'):
+                self.preview_status.config(text="Playback failed")
+            if hasattr(self, 'preview_button'):
+                self.preview_button.config(text="▶ Play Preview", state="normal")
+            print(f"Playback error: {e}")
+
+    def stop_preview(self):
+        """Stop preview playback"""
+        # Cancel auto-stop timer
+        if hasattr(self, 'auto_stop_timer'):
+            try:
+                self.auto_stop_timer.cancel()
+            except:
+                pass
+        
+        self.preview_system.stop()
+        if hasattr(self, 'preview_status'):
+            self.preview_status.config(text="")
+        if hasattr(self, 'preview_button'):
+            self.preview_button.config(text="▶ Play Preview", state="normal")
+
+    def toggle_preview(self, song):
+        """Toggle preview playback"""
+        if self.preview_system.is_playing_status():
+            # Currently playing, so stop
+            self.stop_preview()
+        else:
+            # Not playing, so start
+            self.play_song_preview(song)
+
+    def preview_not_found(self):
+        """Handle when no preview is found"""
+        if hasattr(self, 'preview_status'):
+            self.preview_status.config(text="No preview available")
+        if hasattr(self, 'preview_button'):
+            self.preview_button.config(text="▶ Play Preview", state="normal")
+
+    def check_download_queue(self):
+        """Check for messages from download thread"""
+        try:
+            while True:
+                message = self.download_queue_thread.get_nowait()
+                if message['type'] == 'catalog':
+                    self.catalog_preview = None
+                    self.songs = message['songs']
+                    self.search_songs()
+                elif message['type'] == 'catalog_rows':
+                    # Same append order as the finished catalog, so rows keep their numbers when it replaces this
+                    if self.catalog_preview is None:
+                        self.catalog_preview = SongCatalog()
+                    self.catalog_preview.extend(message['rows'])
+                    self.songs = self.catalog_preview.finish()
+                    self.search_songs()
+                elif message['type'] == 'trace_summary':
+                    self.trace_label.config(text=message['text'])
+                elif message['type'] == 'error':
+                    messagebox.showerror("Error", message['text'])
+                elif message['type'] == 'success':
+                    messagebox.showinfo("Success", message['text'])
+                elif message['type'] == 'done':
+                    self.interactive_jobs.discard(message['key'])
+                elif message['type'] == 'job_started':
+                    index = self.song_queue.set_state(message['key'], "running")
+                    if index is not None:
+                        self.refresh_queue_row(index)
+                        following = self.song_queue.next_pending(after=message['key'])
+                        if following is not None:
+                            # Resolve the next song while this one transfers
+                            self.prefetcher.prefetch(following['song'])
+                elif message['type'] == 'next_song':
+                    state = message['status'] if message['status'] in ("done", "skipped", "cancelled") else "failed"
+                    self.submitted_jobs.pop(message['key'], None)
+                    index = self.song_queue.set_state(message['key'], state)
+                    if index is not None:
+                        self.refresh_queue_row(index)
+                    self.refresh_failures()
+                    self.check_run_finished()
+                elif message['type'] == 'job_parked':
+                    self.check_run_finished()
+        except queue.Empty:
+            pass
+
+    def render_progress(self):
+        """Draw the latest coalesced progress frame, at most ten frames a second"""
+        if self.frame_scheduled is not None:
+            return
+        wait = self.last_frame + 0.1 - time.monotonic()
+        if wait > 0:
+            # Changes arriving until then are drawn together in one frame
+            self.frame_scheduled = self.root.after(int(wait * 1000) + 1, self.draw_progress)
+        else:
+            self.draw_progress()
+
+    def draw_progress(self):
+        self.frame_scheduled = None
+        self.last_frame = time.monotonic()
+        pending = self.song_queue.count("pending") if self.downloading else 0
+        frame = self.progress_channel.snapshot(pending_jobs=pending)
+        if frame is not None:
+            self.progress["value"] = frame['progress']
+            self.status_label.config(text=frame['status'])
+        if self.downloading or self.interactive_jobs:
+            self.transfer_label.config(text=self.transfer.describe())
+
+    def clipped_song(self, song, start_text, end_text):
+        """song limited to the clip range if one was entered, or None after telling the user what is wrong"""
+        try:
+            start = self.parse_clip_time(start_text)
+            end = self.parse_clip_time(end_text)
+        except ValueError:
+            messagebox.showerror("Invalid Clip", "Clip times must look like 75, 1:15 or 1:15.5")
+            return None
+        if start is None and end is None:
+            return song
+        start = start or 0.0
+        end = end if end is not None else float("inf")
+        if end <= start:
+            messagebox.showerror("Invalid Clip", "The clip end must be after its start.")
+            return None
+        return dict(song, clip=(start, end))
 
-            r = requests.get(media_url)
-            r.raise_for_status()
-            mpd_xml = r.text
+    def add_clip_to_queue(self, song, start_text, end_text):
+        """Add song to the queue, limited to the clip range if one was entered"""
+        song = self.clipped_song(song, start_text, end_text)
+        if song is not None:
+            self.add_to_queue(song)
 
-            try:
-                seg_info = self.parse_mpd(mpd_xml)
-            except Exception as e:
-                print("MPD parsing failed:", e)
-                return
+    def download_clip_now(self, song, start_text, end_text):
+        """Extract song (or its clip) right away, ahead of the queue"""
+        song = self.clipped_song(song, start_text, end_text)
+        if song is not None:
+            self.download_song(song)
 
-            base_url = '/'.join(media_url.split('/')[:-1]) + '/'
-            
-            # Find actual segment count
-            actual_count = self.find_actual_segment_count(base_url, seg_info, mpd_xml)
-            # Verify the count is accurate
-            seg_info['segment_count'] = actual_count
-            print(f"Will download {seg_info['segment_count']} segments.")
+    def add_to_queue(self, song):
+        """Add song to download queue"""
+        if not self.song_queue.add(song):
+            messagebox.showinfo("Already in Queue", f"{song['title']} is already in the download queue.")
+            return
 
-            self.update_status("Starting download...")
-            self.update_progress(10)
+        self.prefetcher.prefetch(song)
+        self.queue_listbox.insert(tk.END, self.queue_row_text(len(self.song_queue) - 1))
+        self.update_song_info_display()  # Refresh to update button state
 
-            os.makedirs('downloads', exist_ok=True)
+    def check_easter_egg(self, query):
+        """Check for easter egg and handle it"""
+        if query == "letmedownloadallthesongs":
+            result = messagebox.askyesno("Easter Egg Found!", 
+                                    "Are you sure you want to add all of the songs into your queue list?")
+            if result:
+                # Add all songs to queue (not just filtered ones)
+                first_new = len(self.song_queue)
+                added_count = self.song_queue.add_many(self.songs)
+                self.queue_listbox.insert(tk.END, *[self.queue_row_text(i) for i in range(first_new, len(self.song_queue))])
+                self.update_song_info_display()
+                messagebox.showinfo("Songs Added", f"Added {added_count} songs to the queue!")
+            return True
+        return False
 
-            init_path = os.path.join('downloads', 'init.mp4')
-            self.download_file(base_url + seg_info['init'], init_path)
-            output_path = os.path.join('downloads', 'track.mp4')
-            
-            with open(output_path, 'wb') as out:
-                with open(init_path, 'rb') as f:
-                    out.write(f.read())
-                os.remove(init_path)
-
-                for i in range(seg_info['start_number'], seg_info['start_number'] + seg_info['segment_count']):
-                    seg_url = base_url + seg_info['media'].replace('$Number$', str(i))
-                    seg_path = os.path.join('downloads', f'segment_{i}.m4s')
-                    try:
-                        self.download_file(seg_url, seg_path)
-                        with open(seg_path, 'rb') as segf:
-                            out.write(segf.read())
-                        os.remove(seg_path)
-                        print(f"Downloaded and appended segment {i}")
-                        
-                        # Calculate progress: 10% to 70% for downloading segments
-                        segments_done = i - seg_info['start_number'] + 1
-                        download_progress = 10 + int((segments_done / seg_info['segment_count']) * 60)
-                        self.update_progress(download_progress)
-                        self.update_status(f"Downloading... {segments_done}/{seg_info['segment_count']} chunks")
-                        
-                    except Exception as e:
-                        print(f"Failed to download segment {i}: {e}")
-                        break
+    def remove_selected_from_queue(self):
+        """Remove selected song from queue"""
+        selection = self.queue_listbox.curselection()
+        if selection:
+            index = selection[0]
+            removed_song = self.song_queue.remove(index)['song']
+            self.cancel_submitted(removed_song)
+            # Rows after the removed one shift up and are renumbered
+            self.queue_listbox.delete(index, tk.END)
+            self.queue_listbox.insert(tk.END, *[self.queue_row_text(i) for i in range(index, len(self.song_queue))])
+            self.refresh_failures()
+            self.update_song_info_display()  # Refresh to update button state
+            messagebox.showinfo("Removed", f"Removed {removed_song['title']} from queue.")
 
-            self.update_status("Processing audio file...")
-            self.update_progress(75)
+    def clear_queue(self):
+        """Clear all songs from queue"""
+        if self.song_queue:
+            if messagebox.askyesno("Clear Queue", "Are you sure you want to clear the entire queue?"):
+                for item in self.song_queue:
+                    self.cancel_submitted(item['song'])
+                self.song_queue.clear()
+                self.update_queue_display()
+                self.update_song_info_display()  # Refresh to update button state
 
-            if key_hex:
-                creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-                subprocess.run([
-                    self.ffmpeg_path, '-y', '-decryption_key', key_hex,
-                    '-i', output_path, '-c', 'copy', 'master_audio.mp4'
-                ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=creation_flags)
+    def queue_row_text(self, index):
+        item = self.song_queue.item_at(index)
+        song = item['song']
+        display_text = f"{index + 1}. {song['artist']} - {song['title']}"
+        if song.get('clip'):
+            start, end = song['clip']
+            end_text = "end" if end == float("inf") else self.format_clip_time(end)
+            display_text += f" [{self.format_clip_time(start)}-{end_text}]"
+        if item['state'] in DownloadQueue.LABELS:
+            display_text += f" ({DownloadQueue.LABELS[item['state']]})"
+        return display_text
+
+    def refresh_queue_row(self, index):
+        """Redraw a single queue row, keeping it selected if it was"""
+        selected = index in self.queue_listbox.curselection()
+        self.queue_listbox.delete(index)
+        self.queue_listbox.insert(index, self.queue_row_text(index))
+        if selected:
+            self.queue_listbox.selection_set(index)
+
+    def cancel_submitted(self, song):
+        """Stop a song that left the queue, wherever it is in the pipeline"""
+        job = self.submitted_jobs.get(self.song_queue.key(song))
+        if job is not None:
+            self.cancel_job(job)
+
+    def pause_selected(self):
+        """Pause the selected song; it stops at its next checkpoint and keeps what it downloaded"""
+        for index in self.queue_listbox.curselection():
+            item = self.song_queue.item_at(index)
+            if item['state'] not in ("pending", "running"):
+                continue
+            key = self.song_queue.key(item['song'])
+            job = self.submitted_jobs.get(key)
+            if job is not None:
+                self.pause_job(job)
+            self.song_queue.set_state(key, "paused")
+            self.refresh_queue_row(index)
+
+    def resume_selected(self):
+        """Continue the selected paused song, starting a queue run if none is active"""
+        for index in self.queue_listbox.curselection():
+            item = self.song_queue.item_at(index)
+            if item['state'] != "paused":
+                continue
+            key = self.song_queue.key(item['song'])
+            job = self.submitted_jobs.get(key)
+            if job is not None:
+                self.resume_job(job)
+                # A job that never started waits for job_started to show as running
+                state = "running" if job['trace'] is not None else "pending"
             else:
-                os.rename(output_path, 'master_audio.mp4')
+                self.submitted_jobs[key] = self.submit_to_pipeline(item['song'])
+                state = "pending"
+            self.downloading = True
+            self.song_queue.set_state(key, state)
+            self.refresh_queue_row(index)
+
+    def cancel_selected(self):
+        """Cancel the selected song: its transfers and ffmpeg stop and its partial files are removed"""
+        for index in self.queue_listbox.curselection():
+            item = self.song_queue.item_at(index)
+            if item['state'] not in ("pending", "running", "paused"):
+                continue
+            key = self.song_queue.key(item['song'])
+            job = self.submitted_jobs.get(key)
+            if job is not None:
+                self.cancel_job(job)
+            else:
+                shutil.rmtree(self.work_folder(item['song']), ignore_errors=True)
+            self.song_queue.set_state(key, "cancelled")
+            self.refresh_queue_row(index)
+
+    def refresh_failures(self):
+        """Show the failure ledger under the queue, or hide it when nothing failed"""
+        entries = [entry for entry in self.failure_ledger if self.song_queue.index_of(entry['key']) is not None]
+        self.failure_listbox.delete(0, tk.END)
+        self.failure_listbox.insert(tk.END, *[FailureLedger.describe(entry) for entry in entries])
+        if entries and not self.failures_frame.winfo_ismapped():
+            self.queue_listbox.configure(height=15)
+            self.failures_frame.pack(fill=tk.X, pady=(0, 2), after=self.queue_listbox.master)
+        elif not entries and self.failures_frame.winfo_ismapped():
+            self.failures_frame.pack_forget()
+            self.queue_listbox.configure(height=20)
+
+    def retry_failed(self):
+        """Put every failed song back in line, joining the run in progress or starting one"""
+        keys = [self.song_queue.key(item['song']) for item in self.song_queue if item['state'] == "failed"]
+        if not keys:
+            return
+        self.downloading = True
+        for key in keys:
+            index = self.song_queue.set_state(key, "pending")
+            self.refresh_queue_row(index)
+            self.submitted_jobs[key] = self.submit_to_pipeline(self.song_queue.item_at(index)['song'])
 
-            shutil.rmtree('downloads', ignore_errors=True)
-            print("Done! Output: master_audio.mp4")
+    def check_run_finished(self):
+        """A queue run is over once every submitted song has finished or parked"""
+        if self.downloading and all(job['control'].parked for job in self.submitted_jobs.values()):
+            self.queue_download_complete()
 
-        except Exception as e:
-            raise Exception(f"BLURL conversion failed: {str(e)}")
+    def update_queue_display(self):
+        """Rebuild the whole queue listbox"""
+        self.queue_listbox.delete(0, tk.END)
+        if len(self.song_queue):
+            self.queue_listbox.insert(tk.END, *[self.queue_row_text(i) for i in range(len(self.song_queue))])
+        self.refresh_failures()
 
-    def download_song_thread(self, song, is_queue_download=False):
-        """Background thread function for downloading"""
-        try:
-            if not self.ffmpeg_ready:
-                self.update_status("Hang tight, setting up tools...")
-                # Wait for FFmpeg to be ready
-                while not self.ffmpeg_ready:
-                    import time
-                    time.sleep(0.5)
+    def on_queue_select(self, event=None):
+        """Handle queue selection - switch to song info tab and show selected song"""
+        selection = self.queue_listbox.curselection()
+        if selection:
+            index = selection[0]
+            if index < len(self.song_queue):
+                selected_song = self.song_queue.item_at(index)['song']
                 
-            if not song['sid']:
-                self.show_error("No song ID available")
-                if is_queue_download:
-                    self.next_song_signal()
-                return
-            
-            self.delete_temporary_files()
-            api_url = f"https://cdn.qstv.on.epicgames.com/{song['sid']}"
-            print(f"Fetching from API URL: {api_url}")
-            
-            self.update_status("Getting song info...")
-            self.update_progress(0)
-            
-            response = requests.get(api_url)
-            response.raise_for_status()
-            data = response.json()
-            
-            for key, value in data.items():
-                if isinstance(value, dict) and 'baseUrls' in value:
-                    base_urls = value['baseUrls']
-                    if base_urls and len(base_urls) > 0:
-                        base_url = base_urls[0]
-                        url_parts = base_url.rstrip('/').split('/')
-                        if len(url_parts) < 4:
-                            continue
-                            
-                        domain = f"{url_parts[0]}//{url_parts[2]}"
-                        unique_code = url_parts[3]
-                        download_url = f"{domain}/{unique_code}/master.blurl"
-                        
-                        self.update_status("Downloading song data...")
-                        self.update_progress(2)
-                        
-                        with requests.get(download_url, stream=True) as r:
-                            r.raise_for_status()
-                            total_size = int(r.headers.get('content-length', 0))
-                            downloaded_size = 0
-                            chunk_size = 8192
-                            
-                            with open("master.blurl", "wb") as file:
-                                for chunk in r.iter_content(chunk_size=chunk_size):
-                                    file.write(chunk)
-                                    downloaded_size += len(chunk)
-                                    if total_size > 0:
-                                        # BLURL download is 2% to 5%
-                                        progress = 2 + int((downloaded_size / total_size) * 3)
-                                        self.update_progress(progress)
-                        
-                        # Get segment count first for accurate progress
-                        blurl = self.decompress_blurl("master.blurl")
-                        media_url = blurl['playlists'][0]['url']
-                        r = requests.get(media_url)
-                        mpd_xml = r.text
-                        seg_info = self.parse_mpd(mpd_xml)
-                        base_url = '/'.join(media_url.split('/')[:-1]) + '/'
-                        actual_count = self.find_actual_segment_count(base_url, seg_info, mpd_xml)
-                        
-                        self.convert_blurl_to_mp4("master.blurl", actual_count)
-                        
-                        self.update_status("Creating audio stems...")
-                        self.update_progress(80)
-                        self.extract_audio_stems(song['title'], song['artist'])
-                        
-                        self.update_status("Download completed! 🎉")
-                        self.update_progress(100)
-                        
-                        if is_queue_download:
-                            self.next_song_signal()
-                        else:
-                            self.show_success(f"Successfully downloaded and extracted stems for: {song['title']}")
-                            self.download_complete()
-                        return
+                # Switch to Song Info tab
+                self.notebook.select(0)  # Select first tab (Song Info)
                 
-            error_msg = "Could not find valid download URL in the response"
-            self.show_error(error_msg)
-            if is_queue_download:
-                self.next_song_signal()
-            else:
-                self.download_complete()
-            
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Download failed: {str(e)}"
-            self.show_error(error_msg)
-            if is_queue_download:
-                self.next_song_signal()
-            else:
-                self.download_complete()
-        except Exception as e:
-            error_msg = f"Unexpected error: {str(e)}"
-            self.show_error(error_msg)
-            if is_queue_download:
-                self.next_song_signal()
-            else:
-                self.download_complete()
+                # Display the song info
+                self.display_song_info(selected_song)
 
-    def download_song(self, song):
-        """Start download in background thread for single song"""
+    def download_all_queue(self):
+        """Start downloading all songs in queue"""
+        if not (self.song_queue.count("pending") or self.song_queue.count("failed") or self.song_queue.count("cancelled")):
+            messagebox.showwarning("Empty Queue", "No songs in queue to download.")
+            return
+            
         if self.downloading:
             messagebox.showwarning("Download in Progress", "A download is already in progress. Please wait for it to complete.")
             return
         
         if not self.ffmpeg_ready:
-            messagebox.showwarning("FFmpeg Not Ready", "Still setting up tools. Please wait a moment and try again.")
+            messagebox.showwarning("FFmpeg is Not Ready", "Still setting up tools. Please wait a moment and try again.")
             return
         
         self.downloading = True
-        download_thread = threading.Thread(target=self.download_song_thread, args=(song, False), daemon=True)
-        download_thread.start()
+        # Songs that failed or were cancelled last time get another try
+        for index, item in enumerate(self.song_queue):
+            if item['state'] in ("failed", "cancelled"):
+                self.song_queue.set_state(self.song_queue.key(item['song']), "pending")
+                self.refresh_queue_row(index)
+        # Every pending song goes into the staged pipeline at once; its stages overlap songs
+        for item in self.song_queue:
+            if item['state'] == "pending":
+                self.submitted_jobs[self.song_queue.key(item['song'])] = self.submit_to_pipeline(item['song'])
+
+    def queue_download_complete(self):
+        """Handle completion of entire queue download"""
+        self.downloading = False
+        failed = self.song_queue.count("failed")
+        paused = self.song_queue.count("paused")
+        # Finished songs leave the queue; failed and paused ones stay so they can be retried or resumed
+        self.song_queue.remove_where({"done", "skipped"})
+        self.update_queue_display()
+        self.update_song_info_display()
+        if failed and paused:
+            self.show_success(f"Queue download finished. {failed} song(s) failed and {paused} are paused; they are still in the queue.")
+        elif paused:
+            self.show_success(f"Queue download finished. {paused} paused song(s) are still in the queue.")
+        elif failed:
+            self.show_success(f"Queue download finished. {failed} song(s) failed and are still in the queue.")
+        else:
+            self.show_success("Queue download completed! All songs have been extracted.")
+
+    def download_song(self, song):
+        """Download a single song now, ahead of any queue run in progress"""
+        if DownloadQueue.key(song) in self.interactive_jobs:
+            messagebox.showwarning("Download in Progress", "This song is already downloading. Please wait for it to complete.")
+            return
+        
+        if not self.ffmpeg_ready:
+            messagebox.showwarning("FFmpeg Not Ready", "Still setting up tools. Please wait a moment and try again.")
+            return
+        
+        self.interactive_jobs.add(DownloadQueue.key(song))
+        self.submit_to_pipeline(song, interactive=True)
 
     def open_settings_window(self):
         if hasattr(self, "settings_window") and self.settings_window.winfo_exists():
@@ -1377,7 +4405,7 @@ class FortniteTracksGUI:
 
         self.settings_window = tk.Toplevel(self.root)
         self.settings_window.title("Settings")
-        self.settings_window.geometry("400x300")
+        self.settings_window.geometry("420x550")
         self.settings_window.attributes('-topmost', True)
         self.settings_window.resizable(False, False)
         if os.name == 'nt':
@@ -1428,6 +4456,51 @@ class FortniteTracksGUI:
         auto_open_checkbox = ttk.Checkbutton(auto_open_frame, variable=self.auto_open_var, command=self.toggle_auto_open)
         auto_open_checkbox.pack(side="left", padx=5)
 
+        skip_existing_frame = ttk.Frame(system_frame)
+        skip_existing_frame.pack(anchor="w", fill="x", padx=10, pady=5)
+        ttk.Label(skip_existing_frame, text="Skip songs that are already extracted and unchanged").pack(side="left", padx=5)
+        self.skip_existing_var = tk.BooleanVar(value=self.skip_existing)
+        skip_existing_checkbox = ttk.Checkbutton(skip_existing_frame, variable=self.skip_existing_var, command=self.toggle_skip_existing)
+        skip_existing_checkbox.pack(side="left", padx=5)
+
+        shortest_first_frame = ttk.Frame(system_frame)
+        shortest_first_frame.pack(anchor="w", fill="x", padx=10, pady=5)
+        ttk.Label(shortest_first_frame, text="Download shortest queued songs first").pack(side="left", padx=5)
+        self.shortest_first_var = tk.BooleanVar(value=self.shortest_first)
+        shortest_first_checkbox = ttk.Checkbutton(shortest_first_frame, variable=self.shortest_first_var, command=self.toggle_shortest_first)
+        shortest_first_checkbox.pack(side="left", padx=5)
+
+        bandwidth_frame = ttk.Frame(system_frame)
+        bandwidth_frame.pack(anchor="w", fill="x", padx=10, pady=5)
+        ttk.Label(bandwidth_frame, text="Bandwidth limit:").pack(side="left", padx=5)
+        self.bandwidth_var = tk.StringVar(value=f"{self.bandwidth_limit:g}")
+        bandwidth_entry = ttk.Entry(bandwidth_frame, textvariable=self.bandwidth_var, width=6)
+        bandwidth_entry.pack(side="left", padx=5)
+        bandwidth_entry.bind("<Return>", lambda e: self.update_bandwidth_limit())
+        bandwidth_entry.bind("<FocusOut>", lambda e: self.update_bandwidth_limit())
+        ttk.Label(bandwidth_frame, text="Mbit/s (0 = no limit)").pack(side="left")
+
+        trace_summary_frame = ttk.Frame(system_frame)
+        trace_summary_frame.pack(anchor="w", fill="x", padx=10, pady=5)
+        ttk.Label(trace_summary_frame, text="Show timing summary in Queue tab").pack(side="left", padx=5)
+        self.trace_summary_var = tk.BooleanVar(value=self.show_trace_summary)
+        trace_summary_checkbox = ttk.Checkbutton(trace_summary_frame, variable=self.trace_summary_var, command=self.toggle_trace_summary)
+        trace_summary_checkbox.pack(side="left", padx=5)
+
+        profiling_frame = ttk.Frame(system_frame)
+        profiling_frame.pack(anchor="w", fill="x", padx=10, pady=5)
+        ttk.Label(profiling_frame, text="Profile runs (reports in profiles folder)").pack(side="left", padx=5)
+        self.profiling_var = tk.BooleanVar(value=self.profiling_enabled)
+        profiling_checkbox = ttk.Checkbutton(profiling_frame, variable=self.profiling_var, command=self.toggle_profiling)
+        profiling_checkbox.pack(side="left", padx=5)
+
+        watchdog_frame = ttk.Frame(system_frame)
+        watchdog_frame.pack(anchor="w", fill="x", padx=10, pady=5)
+        ttk.Label(watchdog_frame, text="Measure UI responsiveness").pack(side="left", padx=5)
+        self.watchdog_var = tk.BooleanVar(value=self.ui_watchdog)
+        watchdog_checkbox = ttk.Checkbutton(watchdog_frame, variable=self.watchdog_var, command=self.toggle_watchdog)
+        watchdog_checkbox.pack(side="left", padx=5)
+
         # File naming frame in System tab
         naming_frame = ttk.Frame(system_frame)
         naming_frame.pack(anchor="w", pady=5, fill="x")
@@ -1448,6 +4521,16 @@ class FortniteTracksGUI:
         format_dropdown.pack(side="left", padx=5)
         format_dropdown.bind("<<ComboboxSelected>>", lambda e: self.save_settings())
 
+        extra_formats_frame = ttk.Frame(audio_frame)
+        extra_formats_frame.pack(anchor="w", pady=5, fill="x")
+        ttk.Label(extra_formats_frame, text="Also Save As:").pack(side="left", padx=5)
+        self.extra_formats_var = tk.StringVar(value=", ".join(self.extra_formats))
+        extra_formats_entry = ttk.Entry(extra_formats_frame, textvariable=self.extra_formats_var, width=24)
+        extra_formats_entry.pack(side="left", padx=5)
+        extra_formats_entry.bind("<Return>", lambda e: self.update_extra_formats())
+        extra_formats_entry.bind("<FocusOut>", lambda e: self.update_extra_formats())
+        ttk.Label(extra_formats_frame, text="e.g. flac, mp3@192k").pack(side="left")
+
         extracting_method_frame = ttk.Frame(audio_frame)
         extracting_method_frame.pack(anchor="w", pady=5, fill="x")
         ttk.Label(extracting_method_frame, text="Extracting Method:").pack(side="left", padx=5)
@@ -1456,10 +4539,27 @@ class FortniteTracksGUI:
         extracting_dropdown.pack(side="left", padx=5)
         extracting_dropdown.bind("<<ComboboxSelected>>", lambda e: self.save_settings())
 
+        stems_frame = ttk.Frame(audio_frame)
+        stems_frame.pack(anchor="w", pady=5, fill="x")
+        ttk.Label(stems_frame, text="Stems:").pack(side="left", padx=5)
+        self.stem_vars = {}
+        for stem in self.STEMS:
+            self.stem_vars[stem] = tk.BooleanVar(value=stem in self.selected_stems)
+            ttk.Checkbutton(stems_frame, text=stem, variable=self.stem_vars[stem],
+                            command=lambda stem=stem: self.toggle_stem(stem)).pack(side="left", padx=2)
+
+        silent_stems_frame = ttk.Frame(audio_frame)
+        silent_stems_frame.pack(anchor="w", pady=5, fill="x")
+        ttk.Label(silent_stems_frame, text="Silent Stems:").pack(side="left", padx=5)
+        silent_stems_dropdown = ttk.Combobox(silent_stems_frame, textvariable=self.silent_stems_var,
+                                             values=["Keep", "Skip", "Placeholder"], state="readonly", width=12)
+        silent_stems_dropdown.pack(side="left", padx=5)
+        silent_stems_dropdown.bind("<<ComboboxSelected>>", lambda e: self.save_settings())
+
         about_frame = ttk.Frame(notebook, padding=10)
         notebook.add(about_frame, text='About & Help')
 
-        if self.cached_logo:
+        if self.get_cached_logo():
             logo_label = ttk.Label(about_frame, image=self.cached_logo)
             logo_label.pack(pady=(5, 10))
         else:
@@ -1485,6 +4585,95 @@ class FortniteTracksGUI:
         self.auto_open_folder = self.auto_open_var.get()
         self.save_settings()
 
+    def toggle_skip_existing(self):
+        self.skip_existing = self.skip_existing_var.get()
+        self.save_settings()
+
+    def toggle_shortest_first(self):
+        self.shortest_first = self.shortest_first_var.get()
+        self.save_settings()
+
+    def update_bandwidth_limit(self):
+        try:
+            mbits = float(self.bandwidth_var.get() or 0)
+            if mbits < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("Bandwidth Limit", "Enter a number of Mbit/s, or 0 for no limit.", parent=self.settings_window)
+            self.bandwidth_var.set(f"{self.bandwidth_limit:g}")
+            return
+        self.set_bandwidth_limit(mbits)
+        self.save_settings()
+
+    def toggle_stem(self, stem):
+        selected = [name for name in self.STEMS if self.stem_vars[name].get()]
+        if not selected:
+            self.stem_vars[stem].set(True)
+            messagebox.showwarning("Stems", "At least one stem has to be selected.", parent=self.settings_window)
+            return
+        self.selected_stems = selected
+        self.save_settings()
+
+    def update_extra_formats(self):
+        texts = [text.strip() for text in self.extra_formats_var.get().split(",") if text.strip()]
+        try:
+            for text in texts:
+                self.parse_output_profile(text)
+        except ValueError as e:
+            messagebox.showwarning("Output Formats", str(e), parent=self.settings_window)
+            self.extra_formats_var.set(", ".join(self.extra_formats))
+            return
+        self.extra_formats = texts
+        self.save_settings()
+
+    def toggle_trace_summary(self):
+        self.show_trace_summary = self.trace_summary_var.get()
+        if self.show_trace_summary:
+            self.trace_label.pack(pady=(0, 2), after=self.status_label)
+            self.trace_label.config(text=self.tracer.summary_text())
+        else:
+            self.trace_label.pack_forget()
+        self.save_settings()
+
+    def toggle_profiling(self):
+        self.profiling_enabled = self.profiling_var.get()
+        if self.profiling_enabled and self.profiler is None:
+            self.profiler = RunProfiler()
+            self.profiler.profile_tk_callbacks()
+        elif not self.profiling_enabled and self.profiler is not None:
+            path = self.profiler.write_report()
+            if path:
+                print(f"Profile written to {path}")
+            self.profiler.close()
+            self.profiler = None
+        self.save_settings()
+
+    def toggle_watchdog(self):
+        self.ui_watchdog = self.watchdog_var.get()
+        if self.ui_watchdog:
+            self.start_watchdog()
+        else:
+            self.stop_watchdog()
+        self.save_settings()
+
+    def start_watchdog(self):
+        if self.watchdog is not None:
+            return
+        # Stall stacks go to the trace; with tracing off they get a file of their own
+        tracer = self.tracer
+        if not tracer.trace_path:
+            tracer = PipelineTracer(os.path.join(self.data_folder(), "ui-stalls.jsonl"))
+        self.watchdog = StallWatchdog(self.root, tracer, on_update=lambda text: self.latency_label.config(text=text))
+        self.latency_label.pack(pady=(0, 2), after=self.transfer_label)
+
+    def stop_watchdog(self):
+        """Stop the watchdog and write its session summary"""
+        if self.watchdog is None:
+            return
+        self.watchdog.stop()
+        self.watchdog = None
+        self.latency_label.pack_forget()
+
     def update_sorting_method(self):
         self.sorting_method = self.sorting_var.get()
         self.save_settings()
@@ -1516,6 +4705,7 @@ class FortniteTracksGUI:
         self.status_label.configure(style="StatusLabel.TLabel")
         self.song_listbox.configure(bg=listbox_bg, fg=listbox_fg)
         self.queue_listbox.configure(bg=listbox_bg, fg=listbox_fg)
+        self.failure_listbox.configure(bg=listbox_bg)
         self.style.configure("TFrame", background=bg_color)
         self.style.configure("TLabel", background=bg_color, foreground=fg_color)
         self.style.configure("TButton", background=button_bg, foreground=fg_color)
@@ -1533,6 +4723,7 @@ class FortniteTracksGUI:
         self.file_format = self.file_format_var.get()
         self.extracting_method = self.extracting_method_var.get()
         self.file_naming = self.file_naming_var.get()
+        self.silent_stems = self.silent_stems_var.get()
         settings = {
             "extract_folder": self.extract_folder,
             "dark_mode": self.dark_mode,
@@ -1541,36 +4732,26 @@ class FortniteTracksGUI:
             "auto_open_folder": self.auto_open_folder,
             "file_format": self.file_format,
             "extracting_method": self.extracting_method,
-            "file_naming": self.file_naming
+            "file_naming": self.file_naming,
+            "stems": self.selected_stems,
+            "extra_formats": self.extra_formats,
+            "silent_stems": self.silent_stems,
+            "silence_threshold_db": self.silence_threshold_db,
+            "skip_existing": self.skip_existing,
+            "fetch_workers": self.fetch_workers,
+            "extract_workers": self.extract_workers,
+            "shortest_first": self.shortest_first,
+            "bandwidth_limit": self.bandwidth_limit,
+            "probe_timeout": self.probe_timeout,
+            "probe_attempts": self.probe_attempts,
+            "trace_enabled": self.trace_enabled,
+            "profiling_enabled": self.profiling_enabled,
+            "show_trace_summary": self.show_trace_summary,
+            "ui_watchdog": self.ui_watchdog
         }
         with open(self.settings_file, "w") as f:
             json.dump(settings, f, indent=4)
 
-    def load_settings(self):
-        if os.path.exists(self.settings_file):
-            with open(self.settings_file, "r") as f:
-                settings = json.load(f)
-                return {
-                    "extract_folder": settings.get("extract_folder", os.getcwd()),
-                    "dark_mode": settings.get("dark_mode", True),
-                    "sorting_method": settings.get("sorting_method", "Last Added"),
-                    "sort_ascending": settings.get("sort_ascending", True),
-                    "auto_open_folder": settings.get("auto_open_folder", False),
-                    "file_format": settings.get("file_format", "wav"),
-                    "extracting_method": settings.get("extracting_method", "Stereo"),
-                    "file_naming": settings.get("file_naming", "Only Stem Type")
-                }
-        return {
-            "extract_folder": os.getcwd(),
-            "dark_mode": True,
-            "sorting_method": "Last Added",
-            "sort_ascending": True,
-            "auto_open_folder": False,
-            "file_format": "wav",
-            "extracting_method": "Stereo",
-            "file_naming": "Only Stem Type"
-        }
-
     @staticmethod
     def get_resource_path(relative_path):
         if getattr(sys, 'frozen', False):
@@ -1584,74 +4765,17 @@ class FortniteTracksGUI:
         if self.check_easter_egg(query):
             self.search_entry.delete(0, tk.END)  # Clear the search box
             # Reset to show all songs after easter egg
-            self.filtered_songs = self.songs.copy()
-            self.display_songs(self.filtered_songs)
+            self.display_songs(self.songs.search(""))
             return
         
         # Normal search functionality
-        if query:
-            self.filtered_songs = [song for song in self.songs if query in song['title'].lower() or query in song['artist'].lower()]
-        else:
-            self.filtered_songs = self.songs.copy()
-        self.display_songs(self.filtered_songs)
-
-    def fetch_json_data(self, url):
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data: {e}")
-            return None
-
-    def extract_songs(self, data):
-        songs = []
-        if not data:
-            return songs
-        
-        for key, value in data.items():
-            if isinstance(value, dict) and 'track' in value:
-                track = value['track']
-                qi = track.get('qi', '{}')
-                try:
-                    qi = json.loads(qi) if isinstance(qi, str) else qi
-                except json.JSONDecodeError:
-                    qi = {}
-                sid = qi.get('sid', '')
-                songs.append({
-                    'title': track.get('tt', 'Unknown Title'),
-                    'artist': track.get('an', 'Unknown Artist'),
-                    'cover_art_url': track.get('au', ''),
-                    'release_year': track.get('ry', 'Unknown Year'),
-                    'duration': track.get('dn', 'Unknown Duration'),
-                    'bpm': track.get('mt', 'Unknown BPM'),
-                    'sid': sid
-                })
-        return songs
+        self.display_songs(self.songs.search(query))
 
-    def fetch_and_extract_songs(self):
-        url = "https://fortnitecontent-website-prod07.ol.epicgames.com/content/api/pages/fortnite-game/spark-tracks"
-        data = self.fetch_json_data(url)
-        songs = self.extract_songs(data) if data else []
-        print(f"Songs fetched: {len(songs)}")
-        return songs
-
-    def display_songs(self, songs):
-        sorted_songs = songs.copy()
-        
-        if self.sorting_method == "A-Z by Artist":
-            sorted_songs = sorted(sorted_songs, key=lambda s: s["artist"].lower(), reverse=not self.sort_ascending)
-        elif self.sorting_method == "A-Z by Song Name":
-            sorted_songs = sorted(sorted_songs, key=lambda s: s["title"].lower(), reverse=not self.sort_ascending)
-        elif self.sorting_method == "Last Added":
-            sorted_songs = songs.copy()
-            if self.sort_ascending != True:
-                sorted_songs.reverse()
-            
-        self.filtered_songs = sorted_songs
+    def display_songs(self, rows):
+        self.filtered_rows = self.songs.ordered(rows, self.sorting_method, self.sort_ascending)
         self.song_listbox.delete(0, tk.END)
-        for song in sorted_songs:
-            self.song_listbox.insert(tk.END, f"{song['artist']} - {song['title']}")
+        if self.filtered_rows:
+            self.song_listbox.insert(tk.END, *map(self.songs.label, self.filtered_rows))
         self.song_listbox.update_idletasks()
 
     def seconds_to_minutes_seconds(self, seconds):
@@ -1661,16 +4785,13 @@ class FortniteTracksGUI:
 
     def is_song_in_queue(self, song):
         """Check if song is already in queue"""
-        for queued_song in self.song_queue:
-            if queued_song['sid'] == song['sid']:
-                return True
-        return False
+        return song in self.song_queue
 
     def on_song_select(self, event=None):
         selection = self.song_listbox.curselection()
         if not selection:
             return
-        selected_song = self.filtered_songs[selection[0]]
+        selected_song = self.songs[self.filtered_rows[selection[0]]]
         
         # Check if Queue tab is currently selected
         current_tab = self.notebook.select()
@@ -1681,6 +4802,7 @@ class FortniteTracksGUI:
             self.notebook.select(0)  # Select Song Info tab (index 0)
         
         self.display_song_info(selected_song)
+        self.prefetcher.prefetch(selected_song)
 
     def display_song_info(self, song):
         """Display song information in the Song Info tab"""
@@ -1700,7 +4822,8 @@ class FortniteTracksGUI:
         
         if song['cover_art_url']:
             try:
-                response = requests.get(song['cover_art_url'])
+                from PIL import Image, ImageTk
+                response = self.http.get(song['cover_art_url'])
                 image = Image.open(BytesIO(response.content))
                 image = image.resize((200, 200), Image.LANCZOS)
                 photo = ImageTk.PhotoImage(image)
@@ -1730,9 +4853,26 @@ class FortniteTracksGUI:
             # Add to queue button
             if self.is_song_in_queue(song):
                 add_button = ttk.Button(self.song_info_frame, text="Already in Queue", state="disabled")
+                add_button.pack(pady=10)
             else:
-                add_button = ttk.Button(self.song_info_frame, text="Add to Queue", command=lambda: self.add_to_queue(song))
-            add_button.pack(pady=10)
+                # Optional clip range, only the segments covering it get downloaded
+                clip_frame = ttk.Frame(self.song_info_frame)
+                clip_frame.pack(pady=(10, 0))
+                ttk.Label(clip_frame, text="Clip from").pack(side="left")
+                clip_start_entry = ttk.Entry(clip_frame, width=7)
+                clip_start_entry.pack(side="left", padx=3)
+                ttk.Label(clip_frame, text="to").pack(side="left")
+                clip_end_entry = ttk.Entry(clip_frame, width=7)
+                clip_end_entry.pack(side="left", padx=3)
+                ttk.Label(clip_frame, text="(optional, m:ss)", font=("Arial", 9), foreground="gray").pack(side="left")
+
+                add_button = ttk.Button(self.song_info_frame, text="Add to Queue",
+                                        command=lambda: self.add_clip_to_queue(song, clip_start_entry.get(), clip_end_entry.get()))
+                add_button.pack(pady=(10, 0))
+                # Skips the queue: the song takes the pipeline's express lane even during a queue run
+                now_button = ttk.Button(self.song_info_frame, text="Download Now",
+                                        command=lambda: self.download_clip_now(song, clip_start_entry.get(), clip_end_entry.get()))
+                now_button.pack(pady=(5, 10))
         
         # Only show preview button if FFmpeg is ready
         if self.ffmpeg_ready:
@@ -1756,7 +4896,7 @@ class FortniteTracksGUI:
         """Update the song info display to refresh button state"""
         selection = self.song_listbox.curselection()
         if selection:
-            selected_song = self.filtered_songs[selection[0]]
+            selected_song = self.songs[self.filtered_rows[selection[0]]]
             self.display_song_info(selected_song)
 
     def show_ffmpeg_loading_message(self):
@@ -1771,147 +4911,254 @@ class FortniteTracksGUI:
         ttk.Label(loading_frame, text="This only happens on first run.", 
                 font=("Arial", 9), foreground="gray").pack()
 
-    def sanitize_folder_name(self, name):
-        return re.sub(r'[<>:"/\\|?*]', '', name)
-
-    def generate_filename(self, stem_name, song_title, artist_name, file_extension):
-        """Generate filename based on user's naming preference"""
-        naming_method = self.file_naming_var.get()
-        
-        # Sanitize all components
-        safe_stem = self.sanitize_folder_name(stem_name)
-        safe_title = self.sanitize_folder_name(song_title)
-        safe_artist = self.sanitize_folder_name(artist_name)
-        
-        if naming_method == "Only Stem Type":
-            return f"{safe_stem}.{file_extension}"
-        elif naming_method == "Song Name - Stem Type":
-            return f"{safe_title} - {safe_stem}.{file_extension}"
-        elif naming_method == "Artist Name - Song Name - Stem Type":
-            return f"{safe_artist} - {safe_title} - {safe_stem}.{file_extension}"
-        else:
-            # Fallback to default
-            return f"{safe_stem}.{file_extension}"
 
-    def delete_temporary_files(self):
-        if os.path.exists("master.blurl"):
-            os.remove("master.blurl")
-        if os.path.exists("master_audio.mp4"):
-            os.remove("master_audio.mp4")
+class HeadlessExtractor(ExtractionPipeline):
+    """Runs extractions from the command line without opening a window"""
+
+    def __init__(self, args):
+        super().__init__(profile=args.profile)
+        if args.output:
+            self.extract_folder = args.output
+        if args.format:
+            # The first profile is the main format, the rest go into their own subfolders
+            profiles = [text.strip() for text in args.format.split(",") if text.strip()]
+            self.file_format = profiles[0]
+            self.extra_formats = profiles[1:]
+        if args.method:
+            self.extracting_method = args.method
+        if args.naming:
+            self.file_naming = args.naming
+        if args.stems:
+            wanted = {stem.strip().lower() for stem in args.stems.split(",")}
+            self.selected_stems = [stem for stem in self.STEMS if stem.lower() in wanted]
+        if args.silent_stems:
+            self.silent_stems = args.silent_stems
+        if args.force:
+            self.skip_existing = False
+        if args.shortest_first:
+            self.shortest_first = True
+        if args.max_bandwidth is not None:
+            self.set_bandwidth_limit(args.max_bandwidth)
+        self.auto_open_folder = False
+        self.failures = 0
+        self.total = 0
+        self.finished = 0
+        self.started = 0
+        self.pending = 0
+
+    def report_progress(self):
+        """Print the coalesced progress frame about once a second"""
+        last_status = None
+        last_tuning = None
+        while True:
+            frame = self.progress_channel.snapshot(pending_jobs=self.pending)
+            if frame and frame['status'] != last_status:
+                print(f"[{frame['progress']:3.0f}%] {frame['status']}")
+                last_status = frame['status']
+            snap = self.transfer.snapshot()
+            tuning = (snap['limit'], snap['state'], snap['songs'])
+            if tuning != last_tuning:
+                print(self.transfer.describe())
+                last_tuning = tuning
+            time.sleep(1)
 
-    def extract_audio_stems(self, song_title, artist_name):
-        try:
-            if not os.path.exists("master_audio.mp4"):
-                self.show_error("master_audio.mp4 not found")
+    def drain_messages(self):
+        """Print errors and results the pipeline queued for the UI"""
+        while True:
+            try:
+                message = self.download_queue_thread.get_nowait()
+            except queue.Empty:
                 return
+            if message['type'] == 'error':
+                print(f"Error: {message['text']}", file=sys.stderr)
+            elif message['type'] == 'success':
+                print(message['text'])
+            elif message['type'] == 'job_started':
+                self.started += 1
+                print(f"({self.started}/{self.total}) {message['title']}")
+            elif message['type'] == 'done':
+                # A --first song, run in the express lane; its errors arrived as 'error' messages
+                self.finished += 1
+                if message['status'] == "failed":
+                    self.failures += 1
+            elif message['type'] == 'next_song':
+                self.finished += 1
+                if message['status'] == "failed":
+                    self.failures += 1
+                    entry = self.failure_ledger.get(message['key'])
+                    if entry is not None:
+                        print(f"Failed: {FailureLedger.describe(entry)}", file=sys.stderr)
+
+    def songs_by_sid(self, songs, sids):
+        selected = []
+        for sid in sids:
+            row = songs.row_of(sid)
+            if row is not None:
+                selected.append(songs[row])
+            else:
+                print(f"Unknown song id: {sid}", file=sys.stderr)
+        return selected
+
+    def select_songs(self, args):
+        """The songs to extract, --first songs ahead of the rest"""
+        songs = self.fetch_and_extract_songs()
+        first = self.songs_by_sid(songs, args.first or [])
+        if args.all:
+            selected = list(songs)
+        elif args.missing:
+            # Answered from the library index; the output folders are never walked
+            profile = self.profile_key((*self.parse_output_profile(args.missing), None))
+            done = self.library.extracted_sids(profile)
+            selected = [song for song in songs if song['sid'] and song['sid'] not in done]
+        else:
+            selected = self.songs_by_sid(songs, args.sid or [])
+            if args.search:
+                selected += [songs[row] for row in songs.search(args.search.lower()) if songs[row] not in selected]
+        return first + [song for song in selected if song not in first]
+
+    def run(self, args):
+        clip = None
+        if args.start or args.end:
+            try:
+                start = self.parse_clip_time(args.start or "") or 0.0
+                end = self.parse_clip_time(args.end or "")
+            except ValueError:
+                print("Clip times must look like 75, 1:15 or 1:15.5", file=sys.stderr)
+                return 2
+            clip = (start, end if end is not None else float("inf"))
+
+        self.setup_ffmpeg_worker()
+        if not self.ffmpeg_ready:
+            self.drain_messages()
+            return 1
+
+        songs = self.select_songs(args)
+        if not songs:
+            print("No matching songs found", file=sys.stderr)
+            return 1
+
+        threading.Thread(target=self.report_progress, daemon=True).start()
+        express = set(args.first or [])
+        self.total = sum(song['sid'] not in express for song in songs)
+        # Songs overlap: one downloads while the previous one is being encoded.
+        # --first songs go in as interactive jobs, so the express workers take them before any batch song.
+        jobs = [self.submit_to_pipeline(dict(song, clip=clip) if clip else song, interactive=song['sid'] in express)
+                for song in songs]
+        interrupted = False
+        while self.finished < len(songs):
+            try:
+                time.sleep(0.2)
+                self.drain_messages()
+                self.pending = self.total - self.started
+            except KeyboardInterrupt:
+                if interrupted:
+                    raise
+                # Stop transfers and ffmpeg cleanly; a second Ctrl+C exits at once
+                print("Cancelling...", file=sys.stderr)
+                interrupted = True
+                for job in jobs:
+                    self.cancel_job(job)
+        if interrupted:
+            return 130
+        # The run's pipeline summary (and profile report) is written once the last job leaves its stage
+        self.pipeline.idle.wait()
+
+        print(f"Finished: {len(songs) - self.failures} succeeded, {self.failures} failed")
+        for entry in self.failure_ledger:
+            print(f"  {FailureLedger.describe(entry)}")
+        return 1 if self.failures else 0
+
+
+class BenchmarkGUI(FortniteTracksGUI):
+    """The real window without its background work, so the benchmark neither downloads FFmpeg
+    nor fetches the catalog, and no worker thread imports the deferred modules behind its back"""
 
-            os.makedirs(self.extract_folder, exist_ok=True)
-            sanitized_title = self.sanitize_folder_name(song_title)
-            stem_folder = os.path.join(self.extract_folder, f"{sanitized_title} - stems")
-            os.makedirs(stem_folder, exist_ok=True)
-
-            selected_format = self.file_format_var.get()
-            extracting_method = self.extracting_method_var.get()
-
-            extra_options = []
-            if selected_format == "mp3":
-                extra_options = ["-b:a", "320k"]
-
-            creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-
-            if extracting_method == "Stereo":
-                # Use filter_complex for modern FFmpeg versions (7.x+)
-                filter_complex = "[0:a]channelsplit=channel_layout=5.1.4[FL][FR][FC][LFE][BL][BR][SL][SR][TFL][TFR];" \
-                               "[FL][FR]amerge=inputs=2[drums];" \
-                               "[FC][LFE]amerge=inputs=2[bass];" \
-                               "[BL][BR]amerge=inputs=2[lead];" \
-                               "[SL][SR]amerge=inputs=2[vocals];" \
-                               "[TFL][TFR]amerge=inputs=2[other]"
-                
-                # Generate filenames based on user preference
-                drums_filename = self.generate_filename("Drums", song_title, artist_name, selected_format)
-                bass_filename = self.generate_filename("Bass", song_title, artist_name, selected_format)
-                lead_filename = self.generate_filename("Lead", song_title, artist_name, selected_format)
-                vocals_filename = self.generate_filename("Vocals", song_title, artist_name, selected_format)
-                other_filename = self.generate_filename("Other", song_title, artist_name, selected_format)
-                
-                ffmpeg_command = [
-                    self.ffmpeg_path, "-y", "-i", "master_audio.mp4",
-                    "-filter_complex", filter_complex,
-                    "-map", "[drums]", *extra_options, os.path.join(stem_folder, drums_filename),
-                    "-map", "[bass]", *extra_options, os.path.join(stem_folder, bass_filename),
-                    "-map", "[lead]", *extra_options, os.path.join(stem_folder, lead_filename),
-                    "-map", "[vocals]", *extra_options, os.path.join(stem_folder, vocals_filename),
-                    "-map", "[other]", *extra_options, os.path.join(stem_folder, other_filename)
-                ]
-                
-            elif extracting_method == "Mono":
-                # Extract individual channels for mono
-                filter_complex = "[0:a]channelsplit=channel_layout=5.1.4[FL][FR][FC][LFE][BL][BR][SL][SR][TFL][TFR]"
-                
-                # Generate filenames for mono channels
-                drums_left_filename = self.generate_filename("Drums_Left", song_title, artist_name, selected_format)
-                drums_right_filename = self.generate_filename("Drums_Right", song_title, artist_name, selected_format)
-                bass_left_filename = self.generate_filename("Bass_Left", song_title, artist_name, selected_format)
-                bass_right_filename = self.generate_filename("Bass_Right", song_title, artist_name, selected_format)
-                lead_left_filename = self.generate_filename("Lead_Left", song_title, artist_name, selected_format)
-                lead_right_filename = self.generate_filename("Lead_Right", song_title, artist_name, selected_format)
-                vocals_left_filename = self.generate_filename("Vocals_Left", song_title, artist_name, selected_format)
-                vocals_right_filename = self.generate_filename("Vocals_Right", song_title, artist_name, selected_format)
-                other_left_filename = self.generate_filename("Other_Left", song_title, artist_name, selected_format)
-                other_right_filename = self.generate_filename("Other_Right", song_title, artist_name, selected_format)
-                
-                ffmpeg_command = [
-                    self.ffmpeg_path, "-y", "-i", "master_audio.mp4",
-                    "-filter_complex", filter_complex,
-                    "-map", "[FL]", *extra_options, os.path.join(stem_folder, drums_left_filename),
-                    "-map", "[FR]", *extra_options, os.path.join(stem_folder, drums_right_filename),
-                    "-map", "[FC]", *extra_options, os.path.join(stem_folder, bass_left_filename),
-                    "-map", "[LFE]", *extra_options, os.path.join(stem_folder, bass_right_filename),
-                    "-map", "[BL]", *extra_options, os.path.join(stem_folder, lead_left_filename),
-                    "-map", "[BR]", *extra_options, os.path.join(stem_folder, lead_right_filename),
-                    "-map", "[SL]", *extra_options, os.path.join(stem_folder, vocals_left_filename),
-                    "-map", "[SR]", *extra_options, os.path.join(stem_folder, vocals_right_filename),
-                    "-map", "[TFL]", *extra_options, os.path.join(stem_folder, other_left_filename),
-                    "-map", "[TFR]", *extra_options, os.path.join(stem_folder, other_right_filename)
-                ]
-                
-            elif extracting_method == "Single File":
-                # Mix all channels to stereo
-                master_filename = self.generate_filename("master", song_title, artist_name, selected_format)
-                ffmpeg_command = [
-                    self.ffmpeg_path, "-y", "-i", "master_audio.mp4",
-                    "-filter_complex", "[0:a]pan=stereo|c0<c0+c2+c4+c6+c8|c1<c1+c3+c5+c7+c9[out]",
-                    "-map", "[out]", "-ac", "2", *extra_options, 
-                    os.path.join(stem_folder, master_filename)
-                ]
-
-            subprocess.run(ffmpeg_command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=creation_flags)
-            print(f"Audio extracted successfully into folder: {stem_folder}")
-
-            self.update_progress(95)
-            self.update_status("Cleaning up...")
+    def setup_ffmpeg(self):
+        pass
 
-            os.remove("master_audio.mp4")
-            os.remove("master.blurl")
-            print("Temporary files deleted.")
+    def load_songs_async(self):
+        pass
 
-            if self.auto_open_folder:
-                system = platform.system()
-                if system == "Windows":
-                    subprocess.Popen(f'explorer "{os.path.normpath(stem_folder)}"')
-                elif system == "Darwin":
-                    subprocess.Popen(["open", stem_folder])
-                else:
-                    subprocess.Popen(["xdg-open", stem_folder])
 
-        except subprocess.CalledProcessError as e:
-            self.show_error(f"FFmpeg extraction failed: {str(e)}")
-        except Exception as e:
-            self.show_error(f"Unexpected error during extraction: {str(e)}")
+def run_startup_benchmark():
+    """Measure import time, time to first window paint and the cost of lazy subsystems"""
+    root = tk.Tk()
+    BenchmarkGUI(root)
+    root.update()
+    first_paint = time.perf_counter()
+
+    print(f"Module import:      {(IMPORT_DONE - STARTUP_T0) * 1000:8.1f} ms")
+    print(f"First window paint: {(first_paint - STARTUP_T0) * 1000:8.1f} ms")
+    print("Deferred subsystems (first-use cost):")
+    for module in ["requests", "PIL.ImageTk", "Crypto.Cipher.AES", "pygame", "xml.etree.ElementTree", "zipfile", "tarfile"]:
+        if module in sys.modules:
+            # Timing it now would report ~0 ms; say so rather than print a meaningless number
+            print(f"  {module:<24} already loaded during startup")
+            continue
+        start = time.perf_counter()
+        try:
+            __import__(module)
+            print(f"  {module:<24}{(time.perf_counter() - start) * 1000:8.1f} ms")
+        except ImportError as e:
+            print(f"  {module:<24} not available ({e})")
+    root.destroy()
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = FortniteTracksGUI(root)
-    root.mainloop()
+    import argparse
+    parser = argparse.ArgumentParser(description="Fortnite Festival Extractor")
+    parser.add_argument("--startup-benchmark", action="store_true", help="measure startup time and exit")
+    parser.add_argument("--profile", action="store_true", help="write a cProfile/tracemalloc report for each run to profiles/")
+    parser.add_argument("--watchdog", action="store_true", help="log UI stalls and show the event-loop latency")
+    headless = parser.add_argument_group("headless extraction")
+    headless.add_argument("--headless", action="store_true", help="extract without opening the window")
+    headless.add_argument("--sid", action="append", help="song id to extract (repeatable)")
+    headless.add_argument("--first", action="append", metavar="SID",
+                          help="song id to extract right away, ahead of the rest of the batch (repeatable)")
+    headless.add_argument("--search", help="extract every song whose title or artist contains this text")
+    headless.add_argument("--all", action="store_true", help="extract the whole catalog")
+    headless.add_argument("--missing", metavar="PROFILE", help="songs with no extraction in this profile yet, e.g. flac; "
+                                                               "lists them unless --headless is given")
+    headless.add_argument("--force", action="store_true", help="extract again even if the library index is up to date")
+    headless.add_argument("--output", help="folder to save stems in (default: settings)")
+    headless.add_argument("--format", help="comma separated output profiles, e.g. flac,mp3@192k")
+    headless.add_argument("--method", choices=["Stereo", "Mono", "Single File"])
+    headless.add_argument("--naming", choices=["Only Stem Type", "Song Name - Stem Type", "Artist Name - Song Name - Stem Type"])
+    headless.add_argument("--stems", help="comma separated stems to extract, e.g. Vocals,Drums")
+    headless.add_argument("--silent-stems", choices=["Keep", "Skip", "Placeholder"],
+                          help="what to write for stems that are silent in this song")
+    headless.add_argument("--shortest-first", action="store_true", help="extract the shortest songs first")
+    headless.add_argument("--max-bandwidth", type=float, metavar="MBPS", help="cap downloads at this many Mbit/s (0 = no cap)")
+    headless.add_argument("--start", help="clip start, e.g. 1:05")
+    headless.add_argument("--end", help="clip end, e.g. 1:25")
+    args = parser.parse_args()
+
+    if args.stems and not {s.strip().lower() for s in args.stems.split(",")} & {s.lower() for s in ExtractionPipeline.STEMS}:
+        parser.error(f"--stems must name at least one of: {', '.join(ExtractionPipeline.STEMS)}")
+
+    if args.format:
+        try:
+            for profile in filter(str.strip, args.format.split(",")):
+                ExtractionPipeline.parse_output_profile(profile)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.missing:
+        try:
+            ExtractionPipeline.parse_output_profile(args.missing)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.startup_benchmark:
+        run_startup_benchmark()
+    elif args.missing and not args.headless:
+        for song in HeadlessExtractor(args).select_songs(args):
+            print(f"{song['sid']}\t{song['artist']} - {song['title']}")
+    elif args.headless:
+        if not (args.sid or args.first or args.search or args.all or args.missing):
+            parser.error("--headless needs --sid, --first, --search, --all or --missing")
+        sys.exit(HeadlessExtractor(args).run(args))
+    else:
+        root = tk.Tk()
+        app = FortniteTracksGUI(root, profile=args.profile, watchdog=args.watchdog)
+        root.mainloop()
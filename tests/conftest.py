@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# FFR.py lives at the repository root and is not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """An ExtractionPipeline working in a temporary folder, with tools marked ready and nothing submitted yet"""
+    import FFR
+    monkeypatch.chdir(tmp_path)
+    pipeline = FFR.ExtractionPipeline(str(tmp_path / "settings.json"))
+    pipeline.ffmpeg_ready = True
+    pipeline.extract_folder = str(tmp_path / "out")
+    return pipeline
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from FFR import CatalogStream
+
+
+def spark_entry(title, artist, sid, **extra):
+    return {"track": {"tt": title, "an": artist, "qi": json.dumps({"sid": sid}), **extra}}
+
+
+SPARK_PAYLOAD = json.dumps({
+    "_title": "spark-tracks",
+    "lastModified": "2024-01-01T00:00:00Z",
+    "songA": spark_entry("Believer", "Imagine Dragons", "sid-a", ry=2017, mt=125),
+    "songB": spark_entry("Blinding Lights", "The Weeknd", "sid-b", dn=200),
+    "_activeDate": 1700000000,
+})
+
+BSONGS_PAYLOAD = json.dumps({
+    "version": 3,
+    "bSongs": [
+        {"tt": "Everlong", "an": "Foo Fighters", "sid": "sid-c"},
+        {"tt": "Ride", "an": "Twenty One Pilots", "sid": "sid-d"},
+        "not a track",
+    ],
+})
+
+
+def parse(payload, chunk_size):
+    stream = CatalogStream()
+    rows = []
+    for start in range(0, len(payload), chunk_size):
+        rows += stream.feed(payload[start:start + chunk_size])
+    stream.close()
+    return stream, rows
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_spark_tracks_payload(chunk_size):
+    stream, rows = parse(SPARK_PAYLOAD, chunk_size)
+    assert stream.schema == "spark-tracks"
+    assert rows == [
+        ("Believer", "Imagine Dragons", "", 2017, "Unknown Duration", 125, "sid-a"),
+        ("Blinding Lights", "The Weeknd", "", "Unknown Year", 200, "Unknown BPM", "sid-b"),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+def test_bsongs_payload(chunk_size):
+    stream, rows = parse(BSONGS_PAYLOAD, chunk_size)
+    assert stream.schema == "bSongs"
+    assert [(row[0], row[1], row[6]) for row in rows] == [
+        ("Everlong", "Foo Fighters", "sid-c"),
+        ("Ride", "Twenty One Pilots", "sid-d"),
+    ]
+
+
+def test_number_split_across_chunks_is_not_cut_short():
+    stream = CatalogStream()
+    assert stream.feed('{"count": 12') == []
+    assert stream.feed('34, "bSongs": [{"tt": "T", "an": "A", "sid": "s"}]}') == [
+        ("T", "A", "", "Unknown Year", "Unknown Duration", "Unknown BPM", "s")]
+    stream.close()
+
+
+def test_rows_are_returned_as_soon_as_their_entry_is_complete():
+    stream = CatalogStream()
+    first, rest = BSONGS_PAYLOAD.split('{"tt": "Ride"')
+    assert [row[0] for row in stream.feed(first)] == ["Everlong"]
+    assert [row[0] for row in stream.feed('{"tt": "Ride"' + rest)] == ["Ride"]
+
+
+def test_truncated_payload_fails_on_close():
+    stream = CatalogStream()
+    stream.feed(SPARK_PAYLOAD[:len(SPARK_PAYLOAD) // 2])
+    with pytest.raises(ValueError):
+        stream.close()
+
+
+def test_non_object_payload_is_rejected():
+    with pytest.raises(ValueError):
+        CatalogStream().feed("[1, 2]")
@@ -0,0 +1,59 @@
+import pytest
+
+from FFR import DownloadQueue, ExtractionPipeline
+
+SONG = {"sid": "sid-a", "title": "Believer", "artist": "Imagine Dragons"}
+SEG_INFO = {"segment_count": 50, "duration": 192000, "timescale": 48000}  # 4 s segments
+
+
+@pytest.fixture
+def pipeline():
+    # The clip helpers need no settings; a full pipeline would start its worker threads
+    return ExtractionPipeline.__new__(ExtractionPipeline)
+
+
+def test_each_clip_is_its_own_queue_entry(tmp_path):
+    queue = DownloadQueue(str(tmp_path / "queue.json"))
+    assert queue.add(SONG)
+    assert queue.add(dict(SONG, clip=(10.0, 20.0)))
+    assert queue.add(dict(SONG, clip=(10.0, float("inf"))))
+    assert not queue.add(dict(SONG, clip=(10.0, 20.0)))
+    assert len(queue) == 3
+
+
+def test_clips_work_in_separate_folders(pipeline):
+    folders = {pipeline.work_folder(SONG),
+               pipeline.work_folder(dict(SONG, clip=(10.0, 20.0))),
+               pipeline.work_folder(dict(SONG, clip=(10.5, 20.0)))}
+    assert len(folders) == 3
+
+
+def test_clip_maps_to_covering_segments(pipeline):
+    first, last, trim = pipeline.segment_window(SEG_INFO, (10.0, 21.0))
+    assert (first, last) == (2, 6)
+    assert trim == {'start': 10.0, 'end': 21.0, 'offset': 2.0, 'length': 11.0}
+
+
+def test_open_ended_clip_stops_at_the_last_segment(pipeline):
+    first, last, trim = pipeline.segment_window(SEG_INFO, (190.0, float("inf")))
+    assert (first, last) == (47, 50)
+    assert trim['end'] == 200.0
+
+
+def test_full_song_needs_every_segment(pipeline):
+    assert pipeline.segment_window(SEG_INFO, None) == (0, 50, None)
+
+
+def test_clip_past_the_end_is_rejected(pipeline):
+    with pytest.raises(Exception, match="after the end"):
+        pipeline.segment_window(SEG_INFO, (300.0, 310.0))
+
+
+@pytest.mark.parametrize("text, seconds", [("75", 75.0), ("1:15", 75.0), ("1:15.5", 75.5), (" ", None)])
+def test_clip_times(pipeline, text, seconds):
+    assert pipeline.parse_clip_time(text) == seconds
+
+
+def test_bad_clip_time(pipeline):
+    with pytest.raises(ValueError):
+        pipeline.parse_clip_time("1:xx")
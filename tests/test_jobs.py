@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+
+import pytest
+
+from FFR import JobCancelled, JobControl, JobPaused
+
+
+def test_pause_parks_at_the_next_checkpoint():
+    control = JobControl()
+    control.checkpoint()
+    control.pause()
+    with pytest.raises(JobPaused):
+        control.checkpoint()
+    assert control.resume()
+    control.checkpoint()
+    # Nothing parked, so nothing to submit again
+    assert not control.resume()
+
+
+def test_resume_before_the_checkpoint_needs_no_resubmit():
+    control = JobControl()
+    control.pause()
+    assert not control.resume()
+    control.checkpoint()
+
+
+def test_cancel_wins_over_pause():
+    control = JobControl()
+    control.pause()
+    assert not control.cancel()
+    assert control.cancelled.is_set()
+    with pytest.raises(JobCancelled):
+        control.checkpoint()
+    control.pause()
+    with pytest.raises(JobCancelled):
+        control.checkpoint()
+
+
+def test_cancelling_a_parked_job_hands_it_to_the_caller():
+    control = JobControl()
+    control.pause()
+    with pytest.raises(JobPaused):
+        control.checkpoint()
+    assert control.cancel()
+    assert not control.resume()
+
+
+MANIFEST = {
+    'media_url': "http://cdn/master.mpd",
+    'key_hex': "00",
+    'seg_info': {'init': "init.mp4", 'media': "seg_$Number$.m4s", 'start_number': 1},
+    'segment_count': 6,
+    'base_url': "http://cdn/",
+    'content_hash': "abc",
+}
+
+STATS = {'requests': 1, 'failures': 0, 'hedged': 0}
+
+
+class Segments:
+    """Stands in for the SegmentFetcher; pauses the job once pause_after segments have arrived"""
+
+    def __init__(self, control, pause_after=None):
+        self.control = control
+        self.pause_after = pause_after
+        self.requested = []
+
+    def fetch(self, bases, path):
+        return path.encode(), STATS
+
+    def fetch_in_order(self, bases, paths, lane=1, abort=None):
+        self.requested.append(paths)
+        for count, path in enumerate(paths, 1):
+            if count == self.pause_after:
+                self.control.pause()
+            yield path.encode(), STATS
+
+
+def test_resumed_download_continues_after_its_last_segment(pipeline, tmp_path):
+    master = str(tmp_path / "master.mp4")
+    control = JobControl()
+    pipeline.segments = Segments(control, pause_after=3)
+    with pytest.raises(JobPaused):
+        pipeline.convert_blurl_to_mp4(MANIFEST, master, control=control)
+    assert os.path.exists(master + ".progress")
+
+    assert control.resume()
+    pipeline.segments.pause_after = None
+    pipeline.progress_channel.park("setup")
+    pipeline.convert_blurl_to_mp4(MANIFEST, master, control=control)
+    assert pipeline.segments.requested[1] == ["seg_4.m4s", "seg_5.m4s", "seg_6.m4s"]
+    with open(master, "rb") as f:
+        assert f.read() == b"init.mp4" + b"".join(f"seg_{n}.m4s".encode() for n in range(1, 7))
+    assert not os.path.exists(master + ".progress")
+
+
+def test_paused_job_leaves_the_progress_frame(pipeline):
+    job = pipeline.new_job({'sid': "a", 'title': "A"}, True)
+    with pipeline.job_stage(job, 0):
+        pipeline.update_progress(40)
+        raise JobPaused()
+    assert pipeline.progress_channel.active_count() == 0
+    messages = []
+    while True:
+        try:
+            messages.append(pipeline.download_queue_thread.get_nowait()['type'])
+        except queue.Empty:
+            break
+    # Parked, not finished: the queue keeps the song and its work folder stays
+    assert "job_parked" in messages and "next_song" not in messages
+
+
+def test_resume_does_not_wait_for_room_in_the_stage(pipeline):
+    job = pipeline.new_job({'sid': "a", 'title': "A"}, True)
+    job['stage'] = 1
+    room = threading.Event()
+    submitted = []
+
+    class FullPipeline:
+        def submit(self, job, first_stage=0):
+            room.wait(5)
+            submitted.append(first_stage)
+
+    pipeline.pipeline = FullPipeline()
+    job['control'].pause()
+    with pytest.raises(JobPaused):
+        job['control'].checkpoint()
+    pipeline.resume_job(job)
+    assert submitted == []
+    room.set()
+    for _ in range(100):
+        if submitted:
+            break
+        threading.Event().wait(0.01)
+    assert submitted == [1]
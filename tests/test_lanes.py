@@ -0,0 +1,103 @@
+import threading
+import time
+
+from FFR import LaneQueue, StagedPipeline
+
+
+def put_later(queue, job):
+    """Put job from another thread; returns the thread so the test can see whether put blocked"""
+    thread = threading.Thread(target=queue.put, args=(job,), daemon=True)
+    thread.start()
+    thread.join(0.2)
+    return thread
+
+
+def test_interactive_jobs_go_first():
+    queue = LaneQueue()
+    queue.put({'n': 1, 'lane': 1})
+    queue.put({'n': 2, 'lane': 1, 'order': -1})
+    queue.put({'n': 3, 'lane': 0})
+    queue.put({'n': 4, 'lane': 1})
+    # Lane first, then the order (e.g. shortest first), then arrival
+    assert [queue.get()['n'] for _ in range(4)] == [3, 2, 1, 4]
+
+
+def test_capacity_only_holds_back_batch_jobs():
+    queue = LaneQueue(capacity=1)
+    queue.put({'n': 1, 'lane': 1})
+    blocked = put_later(queue, {'n': 2, 'lane': 1})
+    assert blocked.is_alive()
+    assert not put_later(queue, {'n': 3, 'lane': 0}).is_alive()
+    assert queue.qsize() == 2
+
+    assert queue.get()['n'] == 3
+    # Taking the interactive job frees no batch room
+    blocked.join(0.2)
+    assert blocked.is_alive()
+    assert queue.get()['n'] == 1
+    blocked.join(1)
+    assert not blocked.is_alive()
+    assert queue.get()['n'] == 2
+
+
+def test_express_get_ignores_batch_jobs():
+    queue = LaneQueue()
+    queue.put({'n': 1, 'lane': 1})
+    taken = []
+    express = threading.Thread(target=lambda: taken.append(queue.get(max_lane=0)), daemon=True)
+    express.start()
+    express.join(0.2)
+    assert not taken
+    queue.put({'n': 2, 'lane': 0})
+    express.join(1)
+    assert taken[0]['n'] == 2
+    assert queue.get()['n'] == 1
+
+
+def test_interactive_job_overtakes_a_busy_batch():
+    release = threading.Event()
+    handled = []
+
+    def fetch(job):
+        handled.append(job['n'])
+        if job['lane']:
+            release.wait(5)
+
+    pipeline = StagedPipeline([("fetch", fetch, 1, 0)])
+    for n in range(4):
+        pipeline.submit({'n': n, 'lane': 1})
+    time.sleep(0.1)
+    pipeline.submit({'n': "now", 'lane': 0})
+    deadline = time.monotonic() + 2
+    while "now" not in handled and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The batch worker is still stuck on its first song; the express worker took the interactive one
+    assert handled == [0, "now"]
+    release.set()
+    assert pipeline.idle.wait(5)
+    assert handled == [0, "now", 1, 2, 3]
+
+
+def test_song_downloaded_now_skips_the_queue_run(pipeline):
+    release = threading.Event()
+    fetched = []
+
+    def fetch_stage(job):
+        fetched.append(job['song']['sid'])
+        if job['queue']:
+            release.wait(5)
+
+    pipeline.fetch_stage = fetch_stage
+    pipeline.fetch_workers = 1
+    for sid in "abc":
+        pipeline.submit_to_pipeline({'sid': sid, 'title': sid})
+    time.sleep(0.1)
+    job = pipeline.submit_to_pipeline({'sid': "now", 'title': "now"}, interactive=True)
+    assert job['lane'] == 0 and not job['queue']
+    deadline = time.monotonic() + 2
+    while "now" not in fetched and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fetched == ["a", "now"]
+    release.set()
+    assert pipeline.pipeline.idle.wait(5)
+    assert fetched == ["a", "now", "b", "c"]
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from FFR import LibraryIndex
+
+KEY = {"sid": "sid-a", "method": "Stereo", "naming": "Only Stem Type", "stems": "Drums,Bass", "clip": "", "silent": "keep"}
+
+
+@pytest.fixture
+def library(tmp_path):
+    return LibraryIndex(str(tmp_path / "library.sqlite"))
+
+
+@pytest.fixture
+def output(tmp_path):
+    path = tmp_path / "Believer - Drums.wav"
+    path.write_bytes(b"RIFF")
+    return str(path)
+
+
+def test_current_after_record(library, output, tmp_path):
+    library.record(KEY, "wav", "hash-1", "Believer", "Imagine Dragons", str(tmp_path), [output])
+    assert library.is_current(KEY, ["wav"], "hash-1")
+
+
+def test_not_current_when_source_changed(library, output, tmp_path):
+    library.record(KEY, "wav", "hash-1", "Believer", "Imagine Dragons", str(tmp_path), [output])
+    assert not library.is_current(KEY, ["wav"], "hash-2")
+
+
+def test_not_current_when_a_profile_is_missing(library, output, tmp_path):
+    library.record(KEY, "wav", "hash-1", "Believer", "Imagine Dragons", str(tmp_path), [output])
+    assert not library.is_current(KEY, ["wav", "mp3"], "hash-1")
+
+
+def test_not_current_when_an_output_was_deleted(library, output, tmp_path):
+    library.record(KEY, "wav", "hash-1", "Believer", "Imagine Dragons", str(tmp_path), [output])
+    (tmp_path / "Believer - Drums.wav").unlink()
+    assert not library.is_current(KEY, ["wav"], "hash-1")
+
+
+def test_not_current_for_other_settings(library, output, tmp_path):
+    library.record(KEY, "wav", "hash-1", "Believer", "Imagine Dragons", str(tmp_path), [output])
+    assert not library.is_current(dict(KEY, clip="10-20"), ["wav"], "hash-1")
+    assert not library.is_current(dict(KEY, method="Single File"), ["wav"], "hash-1")
+    assert not library.is_current(dict(KEY, silent="skip@-60"), ["wav"], "hash-1")
+
+
+def test_extracted_sids_per_profile(library, output, tmp_path):
+    library.record(KEY, "wav", "hash-1", "Believer", "Imagine Dragons", str(tmp_path), [output])
+    library.record(dict(KEY, clip="10-20"), "wav", "hash-1", "Believer", "Imagine Dragons", str(tmp_path), [output])
+    library.record(dict(KEY, sid="sid-b"), "mp3", "hash-3", "Ride", "Twenty One Pilots", str(tmp_path), [output])
+    assert library.extracted_sids("wav") == {"sid-a"}
+    assert library.extracted_sids("mp3") == {"sid-b"}
+    assert library.extracted_sids("flac") == set()
+
+
+def test_index_from_an_older_schema_is_rebuilt(tmp_path, output):
+    path = str(tmp_path / "library.sqlite")
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE extractions (sid TEXT, profile TEXT)")
+    old.execute("INSERT INTO extractions VALUES ('sid-a', 'wav')")
+    old.commit()
+    old.close()
+    library = LibraryIndex(path)
+    assert library.extracted_sids("wav") == set()
+    library.record(KEY, "wav", "hash-1", "Believer", "Imagine Dragons", str(tmp_path), [output])
+    assert library.is_current(KEY, ["wav"], "hash-1")
@@ -0,0 +1,101 @@
+import threading
+import time
+
+from FFR import StagedPipeline
+
+
+def gated(handler):
+    """handler that waits until run() has submitted every job, so they all belong to one run"""
+    def wrapper(job):
+        job['gate'].wait(5)
+        return handler(job)
+    return wrapper
+
+
+def run(pipeline, jobs, first_stage=0):
+    gate = threading.Event()
+    for job in jobs:
+        job['gate'] = gate
+        pipeline.submit(job, first_stage)
+    gate.set()
+    assert pipeline.idle.wait(5)
+
+
+def test_jobs_pass_through_every_stage_in_order():
+    seen = []
+    lock = threading.Lock()
+
+    def stage(name):
+        def handler(job):
+            with lock:
+                seen.append((job['n'], name))
+            return True
+        return handler
+
+    reports = []
+    pipeline = StagedPipeline([("fetch", gated(stage("fetch")), 2, 0), ("extract", stage("extract"), 1, 2)],
+                              on_idle=reports.append)
+    run(pipeline, [{'n': n} for n in range(5)])
+    for n in range(5):
+        assert seen.index((n, "fetch")) < seen.index((n, "extract"))
+    assert len(seen) == 10
+    # One report per drained run, with every job counted at every stage
+    assert len(reports) == 1
+    assert reports[0]["fetch"]['jobs'] == 5 and reports[0]["extract"]['jobs'] == 5
+    assert reports[0]["fetch"]['workers'] == 2
+
+
+def test_handler_can_stop_a_job():
+    extracted = []
+    pipeline = StagedPipeline([("fetch", lambda job: job['n'] % 2 == 0, 1, 0),
+                               ("extract", lambda job: extracted.append(job['n']), 1, 0)])
+    run(pipeline, [{'n': n} for n in range(4)])
+    assert sorted(extracted) == [0, 2]
+
+
+def test_failing_handler_still_finishes_the_job():
+    def handler(job):
+        raise RuntimeError("boom")
+
+    pipeline = StagedPipeline([("fetch", handler, 1, 0)])
+    run(pipeline, [{}, {}])
+    assert pipeline.outstanding == 0
+
+
+def test_resumed_job_starts_at_its_stage():
+    seen = []
+    pipeline = StagedPipeline([("fetch", lambda job: seen.append("fetch") or True, 1, 0),
+                               ("extract", lambda job: seen.append("extract"), 1, 0)])
+    run(pipeline, [{}], first_stage=1)
+    assert seen == ["extract"]
+
+
+def test_full_stage_holds_back_the_one_before_it():
+    release = threading.Event()
+    fetched = []
+
+    def fetch(job):
+        fetched.append(job['n'])
+        return True
+
+    def extract(job):
+        release.wait(5)
+
+    pipeline = StagedPipeline([("fetch", fetch, 1, 0), ("extract", extract, 1, 1)])
+    for n in range(6):
+        pipeline.submit({'n': n})
+    time.sleep(0.3)
+    # One job extracting, one waiting in the extract queue, one fetched job blocked handing over
+    assert len(fetched) == 3
+    assert pipeline.stats()["extract"]['queued'] == 1
+    release.set()
+    assert pipeline.idle.wait(5)
+    assert len(fetched) == 6
+
+
+def test_each_run_is_measured_on_its_own():
+    reports = []
+    pipeline = StagedPipeline([("fetch", gated(lambda job: None), 1, 0)], on_idle=reports.append)
+    run(pipeline, [{}, {}])
+    run(pipeline, [{}])
+    assert [report["fetch"]['jobs'] for report in reports] == [2, 1]
@@ -0,0 +1,192 @@
+import threading
+
+import pytest
+
+import FFR
+from FFR import ManifestPrefetcher
+
+
+def song(sid):
+    return {"sid": sid, "title": f"Song {sid}", "artist": "Artist"}
+
+
+class Resolver:
+    """Counts resolutions per sid; a sid in `gates` blocks until its event is set"""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+        self.gates = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, song):
+        with self.lock:
+            self.calls.append(song['sid'])
+        if song['sid'] in self.gates:
+            self.gates[song['sid']].wait(5)
+        if song['sid'] in self.fail:
+            raise IOError(f"no manifest for {song['sid']}")
+        return {'sid': song['sid']}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(FFR.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_prefetched_manifest_is_reused():
+    resolve = Resolver()
+    prefetcher = ManifestPrefetcher(resolve)
+    prefetcher.prefetch(song("a"))
+    prefetcher.prefetch(song("a"))
+    assert prefetcher.get(song("a")) == {'sid': "a"}
+    assert prefetcher.get(song("a")) == {'sid': "a"}
+    assert resolve.calls == ["a"]
+
+
+def test_get_without_prefetch_resolves_and_caches():
+    resolve = Resolver()
+    prefetcher = ManifestPrefetcher(resolve)
+    assert prefetcher.get(song("a")) == {'sid': "a"}
+    prefetcher.prefetch(song("a"))
+    prefetcher.get(song("a"))
+    assert resolve.calls == ["a"]
+
+
+def test_entries_expire_after_the_ttl(clock):
+    resolve = Resolver()
+    prefetcher = ManifestPrefetcher(resolve)
+    prefetcher.get(song("a"))
+    clock[0] += ManifestPrefetcher.TTL - 1
+    prefetcher.get(song("a"))
+    clock[0] += 1
+    prefetcher.get(song("a"))
+    assert resolve.calls == ["a", "a"]
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    monkeypatch.setattr(ManifestPrefetcher, "MAX_ENTRIES", 2)
+    resolve = Resolver()
+    prefetcher = ManifestPrefetcher(resolve)
+    prefetcher.get(song("a"))
+    prefetcher.get(song("b"))
+    prefetcher.get(song("a"))  # b is now the least recently used
+    prefetcher.get(song("c"))
+    assert list(prefetcher.entries) == ["a", "c"]
+    prefetcher.get(song("b"))
+    assert resolve.calls == ["a", "b", "c", "b"]
+
+
+def test_failed_prefetch_is_resolved_again_by_the_job():
+    resolve = Resolver(fail={"a"})
+    prefetcher = ManifestPrefetcher(resolve)
+    prefetcher.prefetch(song("a"))
+    # The job's own attempt raises on the job's thread, where the error is reported
+    with pytest.raises(IOError):
+        prefetcher.get(song("a"))
+    assert resolve.calls == ["a", "a"]
+
+
+def test_stale_selections_are_dropped_while_skimming(monkeypatch):
+    monkeypatch.setattr(ManifestPrefetcher, "MAX_PENDING", 2)
+    resolve = Resolver()
+    gate = resolve.gates["busy"] = threading.Event()
+    prefetcher = ManifestPrefetcher(resolve, max_workers=1)
+    prefetcher.prefetch(song("busy"))
+    while resolve.calls != ["busy"]:
+        pass
+    for sid in "abcd":
+        prefetcher.prefetch(song(sid))
+    gate.set()
+    prefetcher.executor.shutdown(wait=True)
+    # Only the newest selections are still resolved; the running one finishes
+    assert resolve.calls == ["busy", "c", "d"]
+    assert set(prefetcher.entries) == {"busy", "c", "d"}
+
+
+def test_probe_runs_only_after_the_up_to_date_check(pipeline, tmp_path):
+    manifest = {'sid': "a", 'content_hash': "hash-1", 'base_url': "http://cdn/", 'seg_info': {}, 'mpd_xml': "",
+                'segment_count': 10, 'probed': False}
+    probes = []
+    pipeline.prefetcher.get = lambda song: manifest
+    pipeline.find_actual_segment_count = lambda *args: probes.append(args) or 12
+    pipeline.convert_blurl_to_mp4 = lambda manifest, *args: (None, None)
+
+    # Up to date: no probe, nothing downloaded
+    output = tmp_path / "Drums.wav"
+    output.write_bytes(b"RIFF")
+    key = pipeline.library_key(song("a"))
+    for profile in pipeline.output_profiles():
+        pipeline.library.record(key, pipeline.profile_key(profile), "hash-1", "Song a", "Artist", str(tmp_path), [str(output)])
+    job = pipeline.new_job(song("a"), is_queue_download=True)
+    assert not pipeline.fetch_song(job)
+    assert job['status'] == "skipped"
+    assert probes == []
+
+    # Changed upstream: probed once, and the cached manifest keeps the real count
+    manifest['content_hash'] = "hash-2"
+    assert pipeline.fetch_song(pipeline.new_job(song("a"), is_queue_download=True))
+    assert pipeline.fetch_song(pipeline.new_job(song("a"), is_queue_download=True))
+    assert len(probes) == 1
+    assert manifest['segment_count'] == 12
+
+
+def test_clips_are_never_probed(pipeline):
+    manifest = {'sid': "a", 'content_hash': "hash-1", 'segment_count': 10, 'probed': False}
+    pipeline.prefetcher.get = lambda song: manifest
+    pipeline.find_actual_segment_count = lambda *args: pytest.fail("clip was probed")
+    pipeline.convert_blurl_to_mp4 = lambda manifest, *args: (None, None)
+    assert pipeline.fetch_song(pipeline.new_job(dict(song("a"), clip=(10.0, 20.0))))
+
+
+MPD = """<?xml version="1.0"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" mediaPresentationDuration="PT200.0S">
+  <Period><AdaptationSet contentType="audio"><Representation id="1">
+    <SegmentTemplate initialization="init_$RepresentationID$.mp4" media="seg_$RepresentationID$_$Number$.m4s"
+                     startNumber="1" duration="192000" timescale="48000"/>
+  </Representation></AdaptationSet></Period>
+</MPD>"""
+
+
+class FakeResponse:
+    def __init__(self, text="", data=None):
+        self.text = text
+        self.data = data
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeHTTP:
+    """Metadata and MPD answers for resolve_manifest; any HEAD (a segment probe) is recorded"""
+
+    def __init__(self):
+        self.heads = []
+
+    def get(self, url, **kwargs):
+        if url.endswith(".mpd"):
+            return FakeResponse(MPD)
+        return FakeResponse(data={"track": {"baseUrls": ["https://cdn-a.example/audio/x/", "https://cdn-b.example/audio/x/"]}})
+
+    def head(self, url, **kwargs):
+        self.heads.append(url)
+        return FakeResponse()
+
+
+def test_resolving_a_manifest_sends_no_probes(pipeline, monkeypatch):
+    import json
+    import zlib
+    http = pipeline._http = FakeHTTP()
+    blurl = b"\0" * 8 + zlib.compress(json.dumps({"playlists": [{"url": "https://cdn-a.example/audio/x/song/master.mpd"}]}).encode())
+    monkeypatch.setattr(pipeline.segments, "fetch", lambda roots, path, rounds=1: (blurl, {'requests': 1, 'failures': 0}))
+    manifest = pipeline.resolve_manifest(song("a"))
+    assert http.heads == []
+    assert manifest['segment_count'] == 50
+    assert not manifest['probed']
+    assert manifest['mirrors'] == ["https://cdn-a.example/audio/x/song/", "https://cdn-b.example/audio/x/song/"]
@@ -0,0 +1,82 @@
+import pytest
+
+import FFR
+from FFR import ProgressAggregator
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(FFR.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_changes_between_frames_wake_the_ui_once():
+    calls = []
+    channel = ProgressAggregator(on_change=lambda: calls.append(1))
+    channel.update("a", progress=10, status="Downloading")
+    channel.update("a", progress=20)
+    channel.update("b", status="Starting")
+    assert calls == [1]
+    channel.snapshot()
+    channel.update("a", progress=30)
+    assert calls == [1, 1]
+
+
+def test_nothing_to_draw_when_idle():
+    channel = ProgressAggregator()
+    assert channel.snapshot() is None
+    channel.update("a", progress=100, status="Done")
+    channel.finish("a")
+    assert channel.snapshot() == {'progress': 100, 'status': "Done"}
+    assert channel.snapshot() is None
+
+
+def test_frame_averages_active_jobs_and_names_the_latest():
+    channel = ProgressAggregator()
+    channel.update("a", progress=20, status="Downloading A")
+    assert channel.snapshot() == {'progress': 20, 'status': "Downloading A"}
+    channel.update("b", progress=60, status="Encoding B")
+    assert channel.snapshot() == {'progress': 40, 'status': "2 songs in progress — Encoding B"}
+    channel.finish("a")
+    assert channel.active_count() == 1
+    assert channel.snapshot()['progress'] == 60
+
+
+def test_throughput_and_eta_count_pending_jobs(clock):
+    channel = ProgressAggregator()
+    channel.update("a", progress=0, status="Downloading")
+    channel.snapshot()
+    clock[0] += 10
+    channel.update("a", progress=50)
+    channel.add_bytes(10_000)
+    # 5 points/s with 50 points left on this job and 100 for the pending one
+    status = channel.snapshot(pending_jobs=1)['status']
+    assert status.startswith("Downloading · ")
+    assert "/s" in status
+    assert status.endswith("ETA 0:30")
+
+
+def test_progress_going_back_does_not_count_as_work(clock):
+    channel = ProgressAggregator()
+    channel.update("a", progress=50, status="Downloading")
+    channel.update("a", progress=0)
+    channel.update("a", progress=10)
+    assert channel.points == 60
+
+
+def test_paused_job_leaves_the_frame_and_keeps_its_progress():
+    channel = ProgressAggregator()
+    channel.update("a", progress=40, status="Downloading A")
+    channel.update("b", progress=20, status="Downloading B")
+    channel.park("a")
+    assert channel.active_count() == 1
+    assert channel.snapshot() == {'progress': 20, 'status': "Downloading B"}
+    points = channel.points
+    # Climbing back to where it paused is not new work
+    for progress in (5, 10, 40):
+        channel.update("a", progress=progress)
+    assert channel.points == points
+    channel.update("a", progress=50)
+    assert channel.points == points + 10
+    assert channel.active_count() == 2
@@ -0,0 +1,133 @@
+import hashlib
+import io
+import os
+import tarfile
+import threading
+import zipfile
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from FFR import DigestReader, FFmpegProvisioner
+
+BINARY = os.urandom(512 * 1024)
+
+
+@pytest.fixture
+def served(tmp_path):
+    """A local HTTP server over a folder; yields (folder, base URL)"""
+    folder = tmp_path / "srv"
+    folder.mkdir()
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(folder), **kwargs)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield folder, f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def provisioner(tmp_path, monkeypatch):
+    import requests
+    statuses = []
+    provisioner = FFmpegProvisioner(requests.Session(), on_status=statuses.append)
+    provisioner.binary_name = "ffmpeg"
+    provisioner.statuses = statuses
+    monkeypatch.setattr(provisioner, "cache_dir", lambda url: str(tmp_path / "cache"))
+    # Every host publishes a checksum unless a test says otherwise
+    monkeypatch.setattr(FFmpegProvisioner, "PUBLISHED_DIGESTS", {"127.0.0.1": (".sha256", "sha256")})
+    return provisioner
+
+
+def write_tar(path):
+    with tarfile.open(path, "w:xz") as tar:
+        for name, data in (("ffmpeg-7.0/README", b"readme"), ("ffmpeg-7.0/ffmpeg", BINARY)):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+def write_zip(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("ffmpeg-7.0/bin/ffmpeg", BINARY)
+        archive.writestr("ffmpeg-7.0/LICENSE", b"license")
+
+
+def publish(path, algorithm="sha256", digest=None):
+    digest = digest or hashlib.new(algorithm, path.read_bytes()).hexdigest()
+    (path.parent / f"{path.name}.{algorithm}").write_text(f"{digest}  {path.name}\n")
+
+
+def test_digest_reader_hashes_everything_including_the_unread_rest():
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    reader = DigestReader(io.BytesIO(data), "md5")
+    buffered = io.BufferedReader(reader, buffer_size=64 * 1024)
+    assert buffered.read(1000) == data[:1000]
+    reader.drain()
+    assert reader.digest.hexdigest() == hashlib.md5(data).hexdigest()
+
+
+@pytest.mark.parametrize("name, write", [("ffmpeg.tar.xz", write_tar), ("ffmpeg.zip", write_zip)])
+def test_install_checks_the_published_checksum(served, provisioner, name, write):
+    folder, base = served
+    write(folder / name)
+    publish(folder / name)
+    target = provisioner.install(base + name)
+    with open(target, "rb") as f:
+        assert f.read() == BINARY
+    assert provisioner.cached_binary(base + name) == target
+    assert provisioner.statuses[-1] == "Setting up audio processor..."
+
+
+def test_md5_checksums_are_understood(served, provisioner, monkeypatch):
+    folder, base = served
+    monkeypatch.setattr(FFmpegProvisioner, "PUBLISHED_DIGESTS", {"127.0.0.1": (".md5", "md5")})
+    write_tar(folder / "ffmpeg.tar.xz")
+    publish(folder / "ffmpeg.tar.xz", "md5")
+    with open(provisioner.install(base + "ffmpeg.tar.xz"), "rb") as f:
+        assert f.read() == BINARY
+
+
+@pytest.mark.parametrize("name, write", [("ffmpeg.tar.xz", write_tar), ("ffmpeg.zip", write_zip)])
+def test_checksum_mismatch_installs_nothing(served, provisioner, tmp_path, name, write):
+    folder, base = served
+    write(folder / name)
+    publish(folder / name, digest="0" * 64)
+    with pytest.raises(Exception, match="does not match"):
+        provisioner.install(base + name)
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def test_broken_archive_leaves_no_partial_binary(served, provisioner, tmp_path):
+    folder, base = served
+    write_tar(folder / "ffmpeg.tar.xz")
+    data = (folder / "ffmpeg.tar.xz").read_bytes()
+    # Cut off inside the binary, after it has started to be written
+    (folder / "ffmpeg.tar.xz").write_bytes(data[:len(data) * 3 // 4])
+    publish(folder / "ffmpeg.tar.xz")
+    with pytest.raises(Exception):
+        provisioner.install(base + "ffmpeg.tar.xz")
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def test_missing_checksum_file_fails(served, provisioner):
+    folder, base = served
+    write_zip(folder / "ffmpeg.zip")
+    with pytest.raises(Exception):
+        provisioner.install(base + "ffmpeg.zip")
+
+
+def test_hosts_without_checksums_are_reported_unverified(served, provisioner, monkeypatch):
+    folder, base = served
+    monkeypatch.setattr(FFmpegProvisioner, "PUBLISHED_DIGESTS", {})
+    write_zip(folder / "ffmpeg.zip")
+    with open(provisioner.install(base + "ffmpeg.zip"), "rb") as f:
+        assert f.read() == BINARY
+    assert "not verified" in provisioner.statuses[-1]
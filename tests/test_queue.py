@@ -0,0 +1,67 @@
+import json
+
+from FFR import DownloadQueue
+
+
+def song(sid, **extra):
+    return {"sid": sid, "title": f"Song {sid}", "artist": "Artist", **extra}
+
+
+def test_reload_restarts_interrupted_downloads(tmp_path):
+    path = str(tmp_path / "queue.json")
+    queue = DownloadQueue(path)
+    queue.add_many([song("a"), song("b"), song("c"), song("d"), song("e", clip=[10, 20])])
+    for sid, state in (("a", "running"), ("b", "paused"), ("c", "done"), ("d", "failed")):
+        queue.set_state(sid, state)
+
+    reloaded = DownloadQueue(path)
+    reloaded.load()
+    assert [item["song"]["sid"] for item in reloaded] == ["a", "b", "c", "d", "e"]
+    assert [item["state"] for item in reloaded] == ["pending", "pending", "done", "failed", "pending"]
+    assert reloaded.item_at(4)["song"]["clip"] == (10, 20)
+    assert reloaded.next_pending()["song"]["sid"] == "a"
+    assert reloaded.next_pending(after="b")["song"]["sid"] == "e"
+
+
+def test_duplicates_are_not_queued(tmp_path):
+    queue = DownloadQueue(str(tmp_path / "queue.json"))
+    assert queue.add(song("a"))
+    assert not queue.add(song("a"))
+    assert queue.add_many([song("a"), song("b")]) == 1
+    assert len(queue) == 2
+
+
+def test_state_changes_are_saved_in_batches(tmp_path):
+    path = tmp_path / "queue.json"
+    calls = []
+    queue = DownloadQueue(str(path), on_dirty=lambda: calls.append(1))
+    queue.add_many([song("a"), song("b")])
+    queue.set_state("a", "running")
+    queue.set_state("a", "done")
+    queue.set_state("b", "running")
+    assert calls == [1]
+    assert [entry["state"] for entry in json.loads(path.read_text())] == ["pending", "pending"]
+
+    queue.flush()
+    assert [entry["state"] for entry in json.loads(path.read_text())] == ["done", "running"]
+    queue.set_state("b", "done")
+    assert calls == [1, 1]
+
+
+def test_remove_keeps_positions_in_step(tmp_path):
+    queue = DownloadQueue(str(tmp_path / "queue.json"))
+    queue.add_many([song("a"), song("b"), song("c")])
+    queue.remove(0)
+    assert queue.index_of("c") == 1
+    queue.set_state("b", "done")
+    queue.remove_where({"done"})
+    assert queue.index_of("c") == 0
+    assert queue.set_state("b", "running") is None
+
+
+def test_unreadable_queue_file_is_ignored(tmp_path):
+    path = tmp_path / "queue.json"
+    path.write_text("{not json")
+    queue = DownloadQueue(str(path))
+    queue.load()
+    assert len(queue) == 0
@@ -0,0 +1,158 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from FFR import AdaptiveConcurrency, JobCancelled, SegmentFetcher
+
+
+class Mirror:
+    """A local CDN mirror; `delays` and `statuses` are per path, `truncate` cuts bodies short"""
+
+    def __init__(self):
+        self.delays = {}
+        self.statuses = {}
+        self.truncate = False
+        self.hits = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        mirror = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with mirror.lock:
+                    mirror.hits.append(self.path)
+                    mirror.active += 1
+                    mirror.peak = max(mirror.peak, mirror.active)
+                try:
+                    time.sleep(mirror.delays.get(self.path, 0))
+                    status = mirror.statuses.get(self.path, 200)
+                    body = self.path.encode() * 100
+                    self.send_response(status)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    if status == 200:
+                        self.wfile.write(body[:len(body) // 2] if mirror.truncate else body)
+                finally:
+                    with mirror.lock:
+                        mirror.active -= 1
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_port}/audio/"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def mirrors():
+    import requests
+    session = requests.Session()
+    a, b = Mirror(), Mirror()
+    yield a, b, session
+    a.close()
+    b.close()
+    session.close()
+
+
+def body(path):
+    return f"/audio/{path}".encode() * 100
+
+
+def fetcher(session, controller=None):
+    fetcher = SegmentFetcher(lambda: session, controller or AdaptiveConcurrency())
+    fetcher.DEFAULT_HEDGE_DELAY = 0.2
+    return fetcher
+
+
+def test_fails_over_to_the_next_mirror(mirrors):
+    a, b, session = mirrors
+    a.statuses["/audio/seg_1.m4s"] = 503
+    segments = fetcher(session)
+    data, stats = segments.fetch([a.base, b.base], "seg_1.m4s")
+    assert bytes(data) == body("seg_1.m4s")
+    assert stats['failures'] == 1 and stats['requests'] == 2
+    # The failing mirror cools down and is tried last from now on
+    assert segments.ranked([a.base, b.base]) == [b.base, a.base]
+
+
+def test_slow_mirror_is_hedged(mirrors):
+    a, b, session = mirrors
+    a.delays["/audio/seg_1.m4s"] = 2.0
+    segments = fetcher(session)
+    start = time.monotonic()
+    data, stats = segments.fetch([a.base, b.base], "seg_1.m4s")
+    assert bytes(data) == body("seg_1.m4s")
+    assert time.monotonic() - start < 1.5
+    assert stats['hedged'] == 1 and stats['failures'] == 0
+
+
+def test_short_body_counts_as_a_failure(mirrors):
+    a, b, session = mirrors
+    a.truncate = True
+    data, stats = fetcher(session).fetch([a.base, b.base], "seg_1.m4s")
+    assert bytes(data) == body("seg_1.m4s")
+    assert stats['failures'] == 1
+
+
+def test_gives_up_after_every_round(mirrors):
+    a, b, session = mirrors
+    a.statuses["/audio/seg_1.m4s"] = b.statuses["/audio/seg_1.m4s"] = 404
+    controller = AdaptiveConcurrency()
+    with pytest.raises(Exception):
+        fetcher(session, controller).fetch([a.base, b.base], "seg_1.m4s", rounds=2)
+    assert len(a.hits) + len(b.hits) == 4
+    # A file missing on a mirror is not congestion
+    assert controller.window['errors'] == 0 and controller.window['throttled'] == 0
+
+
+def test_throttling_is_reported_to_the_controller(mirrors):
+    a, b, session = mirrors
+    a.statuses["/audio/seg_1.m4s"] = 429
+    controller = AdaptiveConcurrency()
+    fetcher(session, controller).fetch([a.base, b.base], "seg_1.m4s")
+    assert controller.window['throttled'] == 1 and controller.window['ok'] == 1
+
+
+def test_abort_stops_a_fetch(mirrors):
+    a, b, session = mirrors
+    a.delays["/audio/seg_1.m4s"] = b.delays["/audio/seg_1.m4s"] = 2.0
+    abort = threading.Event()
+    threading.Timer(0.1, abort.set).start()
+    with pytest.raises(JobCancelled):
+        fetcher(session).fetch([a.base, b.base], "seg_1.m4s", abort=abort)
+
+
+def test_segments_arrive_in_order_within_the_window(mirrors):
+    a, _, session = mirrors
+    paths = [f"seg_{n}.m4s" for n in range(1, 21)]
+    for n in range(1, 21):
+        # Later segments answer first
+        a.delays[f"/audio/seg_{n}.m4s"] = 0.05 * ((20 - n) % 5)
+    controller = AdaptiveConcurrency(initial=6)
+    segments = fetcher(session, controller)
+    segments.DEFAULT_HEDGE_DELAY = 5.0  # no hedges, so the mirror sees only admitted requests
+    results = list(segments.fetch_in_order([a.base], paths))
+    assert [bytes(data) for data, _ in results] == [body(path) for path in paths]
+    assert a.peak <= 6
+    assert controller.in_flight == 0
+
+
+def test_leaving_early_releases_every_slot(mirrors):
+    a, _, session = mirrors
+    paths = [f"seg_{n}.m4s" for n in range(1, 21)]
+    controller = AdaptiveConcurrency(initial=4)
+    stream = fetcher(session, controller).fetch_in_order([a.base], paths)
+    next(stream)
+    stream.close()
+    deadline = time.monotonic() + 5
+    while controller.in_flight and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert controller.in_flight == 0
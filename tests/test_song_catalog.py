@@ -0,0 +1,42 @@
+import pytest
+
+from FFR import SongCatalog
+
+
+@pytest.fixture
+def catalog():
+    catalog = SongCatalog()
+    catalog.extend([
+        ("Believer", "Imagine Dragons", "", 2017, 204, 125, "sid-a"),
+        ("Everlong", "Foo Fighters", "", 1997, 250, 158, "sid-c"),
+        ("Radioactive", "Imagine Dragons", "", 2012, 186, 136, "sid-e"),
+        ("abba medley", "ABBA", "", 1979, 300, 120, "sid-f"),
+    ])
+    return catalog.finish()
+
+
+def test_search_matches_title_or_artist_once_per_row(catalog):
+    assert catalog.search("dragons") == [0, 2]
+    assert catalog.search("abba") == [3]
+    assert catalog.search("ever") == [0, 1]
+    assert catalog.search("foo") == [1]
+    assert catalog.search("zzz") == []
+    assert catalog.search("") == [0, 1, 2, 3]
+
+
+def test_ordered_uses_case_insensitive_ranks(catalog):
+    rows = catalog.search("")
+    assert catalog.ordered(rows, "A-Z by Artist") == [3, 1, 0, 2]
+    assert catalog.ordered(rows, "A-Z by Song Name") == [3, 0, 1, 2]
+    assert catalog.ordered(rows, "A-Z by Song Name", ascending=False) == [2, 1, 0, 3]
+    assert catalog.ordered([2, 0], "A-Z by Song Name") == [0, 2]
+    assert catalog.ordered([2, 0], "Default") == [2, 0]
+
+
+def test_rows_and_sid_index(catalog):
+    assert catalog.row_of("sid-c") == 1
+    assert catalog.row_of("missing") is None
+    assert catalog[1]["title"] == "Everlong"
+    assert catalog.label(0) == "Imagine Dragons - Believer"
+    # Repeated artist strings share one object
+    assert catalog.columns["artist"][0] is catalog.columns["artist"][2]
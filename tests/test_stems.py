@@ -0,0 +1,82 @@
+import pytest
+
+from FFR import ExtractionPipeline
+
+# Stereo branches as stem_branches builds them: (pan filter, pad label, output name, master channels)
+BRANCHES = [
+    ("pan=stereo|c0=c0|c1=c1", "drums", "Drums", [0, 1]),
+    ("pan=stereo|c0=c2|c1=c3", "bass", "Bass", [2, 3]),
+    ("pan=stereo|c0=c4|c1=c5", "lead", "Lead", [4, 5]),
+]
+
+# astats report of a decode-only pass over a master whose bass is (almost) silent and lead unmeasured
+STDERR = """\
+[Parsed_astats_0 @ 0x1] Channel: 1
+[Parsed_astats_0 @ 0x1] Peak level dB: -3.5
+[Parsed_astats_0 @ 0x1] RMS level dB: -18.25
+[Parsed_astats_0 @ 0x1] Channel: 2
+[Parsed_astats_0 @ 0x1] Peak level dB: -4.0
+[Parsed_astats_0 @ 0x1] RMS level dB: -19.0
+[Parsed_astats_0 @ 0x1] Channel: 3
+[Parsed_astats_0 @ 0x1] Peak level dB: -inf
+[Parsed_astats_0 @ 0x1] RMS level dB: -inf
+[Parsed_astats_0 @ 0x1] Channel: 4
+[Parsed_astats_0 @ 0x1] Peak level dB: -75.0
+[Parsed_astats_0 @ 0x1] RMS level dB: -90.0
+[out#0/null @ 0x2] video:0KiB audio:0KiB subtitle:0KiB
+size=N/A time=00:03:20.00 bitrate=N/A speed= 250x
+"""
+
+
+def pipeline(silent_stems="Skip", threshold=-60.0, method="Stereo"):
+    # Only the settings these methods read; a full pipeline would start its worker threads
+    pipeline = ExtractionPipeline.__new__(ExtractionPipeline)
+    pipeline.silent_stems = silent_stems
+    pipeline.silence_threshold_db = threshold
+    pipeline.extracting_method = method
+    pipeline.file_naming = "Only Stem Type"
+    pipeline.selected_stems = list(ExtractionPipeline.STEMS)
+    return pipeline
+
+
+def test_channel_levels_are_numbered_like_the_master():
+    levels = ExtractionPipeline.channel_levels(STDERR)
+    assert levels == {0: [-3.5, -18.25], 1: [-4.0, -19.0], 2: [float("-inf"), float("-inf")], 3: [-75.0, -90.0]}
+
+
+@pytest.mark.parametrize("setting, action", [("Keep", "keep"), ("Skip", "skip"), ("Placeholder", "placeholder")])
+def test_only_silent_outputs_get_the_silent_action(setting, action):
+    levels = ExtractionPipeline.channel_levels(STDERR)
+    actions = pipeline(setting).plan_silent_outputs(BRANCHES, levels)
+    # Lead was not measured, so it is never treated as silent
+    assert actions == {"Drums": "written", "Bass": action, "Lead": "written"}
+
+
+def test_one_loud_channel_keeps_the_output():
+    levels = {0: (-80.0, -95.0), 1: (-12.0, -30.0)}
+    assert pipeline().plan_silent_outputs(BRANCHES[:1], levels) == {"Drums": "written"}
+
+
+def test_threshold_is_configurable():
+    levels = ExtractionPipeline.channel_levels(STDERR)
+    assert pipeline(threshold=-80.0).plan_silent_outputs(BRANCHES, levels)["Bass"] == "written"
+    assert pipeline(threshold=0.0).plan_silent_outputs(BRANCHES, levels)["Drums"] == "skip"
+
+
+def test_mono_outputs_are_judged_per_channel():
+    branches = pipeline(method="Mono").stem_branches("Mono", ["Bass"])
+    levels = ExtractionPipeline.channel_levels(STDERR)
+    assert pipeline().plan_silent_outputs(branches, levels) == {"Bass_Left": "skip", "Bass_Right": "skip"}
+    levels[3] = [-10.0, -20.0]
+    assert pipeline().plan_silent_outputs(branches, levels) == {"Bass_Left": "skip", "Bass_Right": "written"}
+
+
+def test_silence_settings_are_part_of_the_library_key():
+    song = {"sid": "sid-a", "title": "Believer", "artist": "Imagine Dragons"}
+    keys = {tuple(sorted(p.library_key(song).items())) for p in (
+        pipeline("Keep"), pipeline("Skip"), pipeline("Placeholder"), pipeline("Skip", threshold=-50.0))}
+    assert len(keys) == 4
+    # Keeping silent stems writes the same files whatever the threshold
+    assert pipeline("Keep").library_key(song) == pipeline("Keep", threshold=-50.0).library_key(song)
+    # A single mixed file is never checked for silence
+    assert pipeline("Skip", method="Single File").library_key(song) == pipeline("Keep", method="Single File").library_key(song)
@@ -0,0 +1,161 @@
+import time
+
+import pytest
+
+import FFR
+from FFR import AdaptiveConcurrency, SegmentFetcher
+
+
+def close_window(controller, size=1_000_000, ok=10, errors=0, throttled=0, saturated=True):
+    """Close a one-second window with the given totals"""
+    controller.window = {"start": time.monotonic() - 1.0, "bytes": size, "ok": ok, "errors": errors,
+                         "throttled": throttled, "saturated": saturated}
+    controller.adjust()
+
+
+def test_steps_up_while_throughput_grows():
+    controller = AdaptiveConcurrency(initial=4)
+    close_window(controller, size=1_000_000)
+    assert controller.limit == 5 and controller.state == "probing"
+    close_window(controller, size=1_200_000)
+    assert controller.limit == 6
+
+
+def test_settles_below_the_knee_and_holds():
+    controller = AdaptiveConcurrency(initial=4)
+    close_window(controller, size=1_000_000)
+    close_window(controller, size=1_010_000)
+    assert controller.limit == 4 and controller.state == "steady"
+    for _ in range(AdaptiveConcurrency.HOLD_WINDOWS):
+        close_window(controller, size=2_000_000)
+        assert controller.limit == 4
+    close_window(controller, size=2_000_000)
+    assert controller.limit == 5
+
+
+def test_halves_on_throttling():
+    controller = AdaptiveConcurrency(initial=8)
+    close_window(controller, throttled=1)
+    assert controller.limit == 4 and controller.state == "backoff"
+    close_window(controller, throttled=1)
+    close_window(controller, throttled=1)
+    close_window(controller, throttled=1)
+    assert controller.limit == AdaptiveConcurrency.MIN_LIMIT
+
+
+def test_halves_only_when_errors_exceed_a_tenth():
+    controller = AdaptiveConcurrency(initial=8)
+    close_window(controller, ok=10, errors=1)
+    assert controller.limit == 9
+    close_window(controller, ok=10, errors=2)
+    assert controller.limit == 4
+
+
+def test_idle_window_leaves_the_limit_alone():
+    controller = AdaptiveConcurrency(initial=4)
+    close_window(controller, saturated=False)
+    assert controller.limit == 4
+
+
+def test_never_exceeds_the_maximum():
+    controller = AdaptiveConcurrency(initial=AdaptiveConcurrency.MAX_LIMIT)
+    close_window(controller, size=1_000_000)
+    assert controller.limit == AdaptiveConcurrency.MAX_LIMIT
+
+
+def test_record_classifies_statuses():
+    controller = AdaptiveConcurrency()
+    controller.record(size=500, latency=0.2)
+    controller.record(status=429)
+    controller.record(status=503)
+    controller.record(status=0)
+    controller.record(status=500)
+    controller.record(status=404)  # a mirror missing the file is not congestion
+    window = controller.window
+    assert (window["ok"], window["bytes"], window["throttled"], window["errors"]) == (1, 500, 2, 2)
+    assert controller.snapshot()["latency"] == 0.2
+
+
+def test_saturation_is_recorded_when_demand_hits_the_limit():
+    controller = AdaptiveConcurrency(initial=1)
+    assert controller.acquire()
+    assert not controller.acquire(block=False)
+    assert controller.window["saturated"]
+    controller.release()
+    assert controller.acquire(block=False)
+
+
+class Probe:
+    """HEAD answers for segment_exists: one entry per attempt, an exception instance or a status code"""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.timeouts = []
+
+    def head(self, url, timeout):
+        self.timeouts.append(timeout)
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return type("Response", (), {'status_code': answer})()
+
+
+SEG_INFO = {'start_number': 1, 'media': "seg_$Number$.m4s"}
+
+
+def probing(pipeline, monkeypatch, *answers):
+    probe = pipeline._http = Probe(*answers)
+    monkeypatch.setattr(FFR.time, "sleep", lambda seconds: None)
+    return probe
+
+
+def test_probe_answers(pipeline, monkeypatch):
+    probing(pipeline, monkeypatch, 200, 404, 410)
+    assert pipeline.segment_exists("http://cdn/", SEG_INFO, 1)
+    assert not pipeline.segment_exists("http://cdn/", SEG_INFO, 2)
+    assert not pipeline.segment_exists("http://cdn/", SEG_INFO, 3)
+
+
+def test_timed_out_probe_is_retried_with_a_longer_wait(pipeline, monkeypatch):
+    import requests
+    probe = probing(pipeline, monkeypatch, requests.exceptions.ReadTimeout(), 503, 200)
+    assert pipeline.segment_exists("http://cdn/", SEG_INFO, 7)
+    first = probe.timeouts[0]
+    assert probe.timeouts == [first, 2 * first, 4 * first]
+
+
+def test_probe_that_never_answers_is_an_error_not_the_end(pipeline, monkeypatch):
+    import requests
+    probing(pipeline, monkeypatch, *[requests.exceptions.ConnectionError()] * 3)
+    with pytest.raises(Exception, match="segment 7"):
+        pipeline.segment_exists("http://cdn/", SEG_INFO, 7)
+
+
+def test_probe_attempts_are_configurable(pipeline, monkeypatch):
+    import requests
+    pipeline.probe_attempts = 1
+    probe = probing(pipeline, monkeypatch, requests.exceptions.ReadTimeout())
+    with pytest.raises(Exception):
+        pipeline.segment_exists("http://cdn/", SEG_INFO, 7)
+    assert len(probe.timeouts) == 1
+
+
+def test_probe_timeout_follows_the_host_latency(pipeline, monkeypatch):
+    probe = probing(pipeline, monkeypatch, 200, 200, 200, 200)
+    pipeline.segment_exists("http://cdn/", SEG_INFO, 1)
+    pipeline.segments.mark("cdn", 0.05)
+    pipeline.segment_exists("http://cdn/", SEG_INFO, 1)
+    pipeline.segments.mark("cdn", 10.0)
+    pipeline.segments.mark("cdn", 10.0)
+    pipeline.segment_exists("http://cdn/", SEG_INFO, 1)
+    pipeline.probe_timeout = 30
+    pipeline.segment_exists("http://cdn/", SEG_INFO, 1)
+    # Unknown host, fast host (floor), slow host (capped), fixed setting
+    assert probe.timeouts == [SegmentFetcher.TIMEOUT, SegmentFetcher.MIN_REQUEST_TIMEOUT, SegmentFetcher.TIMEOUT, 30]
+
+
+def test_request_timeout_scales_with_latency():
+    segments = SegmentFetcher(lambda: None, AdaptiveConcurrency())
+    segments.mark("cdn", 1.0)
+    assert segments.request_timeout("http://cdn/seg_1.m4s") == SegmentFetcher.LATENCY_MARGIN * 1.0
+    assert segments.request_timeout("http://other/seg_1.m4s") == SegmentFetcher.TIMEOUT